@@ -0,0 +1,21 @@
+from django.contrib import admin
+
+from .models import OutgoingEmail, Task
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'from_email', 'recipients', 'created', 'sent',
+                    'attempts', 'failed')
+    list_filter = ('failed', 'created')
+    search_fields = ('recipients',)
+    readonly_fields = ('from_email', 'recipients', 'message', 'created',
+                       'sent', 'attempts', 'last_error')
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'status', 'priority', 'attempts',
+                    'run_after', 'created')
+    list_filter = ('status', 'name')
+    search_fields = ('key',)
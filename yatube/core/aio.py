@@ -0,0 +1,116 @@
+"""Асинхронные представления под yatube.asgi.
+
+Django 2.2 сам не вызывает корутины, поэтому асинхронный вариант
+представления регистрируется рядом с обычным (``async_variant``), а
+ASGI-приложение вызывает его вместо WSGI-пути: middleware выполняются в
+пуле потоков, затем ждётся корутина представления. Синхронный код Django
+(ORM, шаблоны) представление выполняет через ``run_sync`` в ограниченном
+пуле ASGI_DB_THREADS, а кеш — через ``cache_get``/``cache_set`` в
+отдельном пуле, чтобы быстрые обращения к кешу не ждали в очереди за
+медленными запросами к базе.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.exception import response_for_exception
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+
+_executors = {}
+
+
+def _executor(name, size):
+    executor = _executors.get(name)
+    if executor is None:
+        executor = _executors[name] = ThreadPoolExecutor(
+            max_workers=size, thread_name_prefix=f'asgi-{name}')
+    return executor
+
+
+async def run_sync(func, *args, **kwargs):
+    """Выполняет ``func`` в пуле потоков для работы с базой."""
+    def call():
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return await asyncio.get_event_loop().run_in_executor(
+        _executor('db', settings.ASGI_DB_THREADS), call)
+
+
+async def run_cache(func, *args, **kwargs):
+    """Выполняет обращение к кешу в пуле потоков для кеша."""
+    return await asyncio.get_event_loop().run_in_executor(
+        _executor('cache', settings.ASGI_CACHE_THREADS),
+        lambda: func(*args, **kwargs))
+
+
+async def cache_get(key, default=None):
+    return await run_cache(cache.get, key, default)
+
+
+async def cache_set(key, value, timeout):
+    return await run_cache(cache.set, key, value, timeout)
+
+
+def async_variant(sync_view):
+    """Регистрирует асинхронный вариант ``sync_view``.
+
+    URLConf не меняется: ASGI-приложение находит представление по адресу
+    и, если у него есть ``async_view``, вызывает его.
+    """
+    def decorator(async_view):
+        sync_view.async_view = async_view
+        return async_view
+    return decorator
+
+
+class AsyncViewHandler:
+    """Обработка запроса асинхронным представлением с обычными
+    MIDDLEWARE проекта."""
+
+    def __init__(self):
+        self.middleware = [import_string(path)(None)
+                           for path in settings.MIDDLEWARE]
+
+    def process_request(self, request, match):
+        for middleware in self.middleware:
+            if hasattr(middleware, 'process_request'):
+                response = middleware.process_request(request)
+                if response is not None:
+                    return response
+        for middleware in self.middleware:
+            if hasattr(middleware, 'process_view'):
+                response = middleware.process_view(
+                    request, match.func, match.args, match.kwargs)
+                if response is not None:
+                    return response
+        # Пользователь загружается здесь, в пуле, а не при первом
+        # обращении к request.user внутри цикла событий.
+        if hasattr(request, 'user'):
+            getattr(request.user, 'pk', None)
+        return None
+
+    def process_response(self, request, response):
+        for middleware in reversed(self.middleware):
+            if hasattr(middleware, 'process_response'):
+                response = middleware.process_response(request, response)
+        return response
+
+    def handle_exception(self, request, exception):
+        return response_for_exception(request, exception)
+
+    async def get_response(self, request, match):
+        request.resolver_match = match
+        try:
+            response = await run_sync(self.process_request, request, match)
+            if response is None:
+                response = await match.func.async_view(
+                    request, *match.args, **match.kwargs)
+        except Exception as exception:
+            response = await run_sync(
+                self.handle_exception, request, exception)
+        return await run_sync(self.process_response, request, response)
@@ -0,0 +1,262 @@
+"""ASGI-приложение проекта.
+
+Django 2.2 не умеет работать по ASGI, поэтому обычные запросы передаются
+WSGI-приложению в ограниченном пуле потоков, а поток server-sent events
+(EVENTS_PATH) обслуживается прямо в цикле событий: ждущее соединение —
+это корутина с очередью, а не занятый поток. Представления, у которых
+есть асинхронный вариант (core.aio.async_variant), вызываются напрямую.
+"""
+import asyncio
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.core.exceptions import PermissionDenied
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import close_old_connections
+from django.http import Http404
+from django.utils.functional import SimpleLazyObject
+from django.urls import Resolver404, resolve
+from django.utils.module_loading import autodiscover_modules, import_string
+
+from . import broker, events
+from .aio import AsyncViewHandler
+
+SSE_HEADERS = [
+    (b'content-type', b'text/event-stream; charset=utf-8'),
+    (b'cache-control', b'no-cache'),
+    (b'x-accel-buffering', b'no'),
+]
+
+
+def build_environ(scope, body):
+    """WSGI-окружение для HTTP-запроса ASGI."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        if name in environ:
+            value = f'{environ[name]},{value}'
+        environ[name] = value
+    return environ
+
+
+async def read_body(receive):
+    body = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        body.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(body)
+
+
+def format_event(message):
+    data = json.dumps(message['data'], ensure_ascii=False)
+    return f'event: {message["event"]}\ndata: {data}\n\n'.encode()
+
+
+class ASGIApplication:
+    def __init__(self, wsgi_application, threads=None):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers=threads or settings.ASGI_THREADS,
+            thread_name_prefix='asgi')
+        self.resolve_channels = import_string(settings.EVENTS_CHANNELS)
+        self.broker_listener = None
+        self.async_handler = None
+        if settings.ASGI_ASYNC_VIEWS:
+            # Асинхронные варианты объявляются в <app>/async_views.py.
+            autodiscover_modules('async_views')
+            self.async_handler = AsyncViewHandler()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f'Неподдерживаемое соединение {scope["type"]}')
+        if scope['path'] == settings.EVENTS_PATH:
+            return await self.events(scope, receive, send)
+        match = self.async_match(scope['path'])
+        if match is not None:
+            return await self.async_view(scope, receive, send, match)
+        return await self.wsgi(scope, receive, send)
+
+    def async_match(self, path):
+        if self.async_handler is None:
+            return None
+        try:
+            match = resolve(path)
+        except Resolver404:
+            return None
+        return match if hasattr(match.func, 'async_view') else None
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self.start_broker_listener()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.broker_listener is not None:
+                    self.broker_listener.cancel()
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def start_broker_listener(self):
+        if settings.EVENTS_BROKER and self.broker_listener is None:
+            self.broker_listener = asyncio.ensure_future(
+                broker.listen_broker(settings.EVENTS_BROKER))
+
+    async def run_sync(self, func, *args):
+        """Выполняет синхронный код Django в пуле потоков."""
+        def call():
+            close_old_connections()
+            try:
+                return func(*args)
+            finally:
+                close_old_connections()
+        return await asyncio.get_event_loop().run_in_executor(
+            self.executor, call)
+
+    async def wsgi(self, scope, receive, send):
+        body = await read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_event_loop()
+        environ = build_environ(scope, body)
+
+        def send_sync(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def run():
+            response = {}
+
+            def start_response(status, headers, exc_info=None):
+                response['status'] = int(status.split(' ', 1)[0])
+                response['headers'] = [
+                    (name.lower().encode('latin-1'), value.encode('latin-1'))
+                    for name, value in headers
+                ]
+                return lambda data: None
+
+            result = self.wsgi_application(environ, start_response)
+            started = False
+            try:
+                for chunk in result:
+                    if not started:
+                        send_sync({'type': 'http.response.start',
+                                   'status': response['status'],
+                                   'headers': response['headers']})
+                        started = True
+                    if chunk:
+                        send_sync({'type': 'http.response.body',
+                                   'body': chunk, 'more_body': True})
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+            if not started:
+                send_sync({'type': 'http.response.start',
+                           'status': response['status'],
+                           'headers': response['headers']})
+            send_sync({'type': 'http.response.body', 'body': b''})
+
+        await loop.run_in_executor(self.executor, run)
+
+    async def async_view(self, scope, receive, send, match):
+        body = await read_body(receive)
+        if body is None:
+            return
+        request = WSGIRequest(build_environ(scope, body))
+        response = await self.async_handler.get_response(request, match)
+        headers = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                   for name, value in response.items()]
+        for cookie in response.cookies.values():
+            headers.append((b'set-cookie',
+                            cookie.output(header='').strip().encode()))
+        await send({'type': 'http.response.start',
+                    'status': response.status_code, 'headers': headers})
+        if response.streaming:
+            content = await self.run_sync(b''.join, response)
+        else:
+            content = response.content
+        response.close()
+        await send({'type': 'http.response.body', 'body': content})
+
+    def channels_for(self, environ):
+        """Каналы для запроса: пользователь и сессия подключаются так же,
+        как это делают SessionMiddleware и AuthenticationMiddleware."""
+        request = WSGIRequest(environ)
+        engine = import_string(f'{settings.SESSION_ENGINE}.SessionStore')
+        request.session = engine(
+            request.COOKIES.get(settings.SESSION_COOKIE_NAME))
+        request.user = SimpleLazyObject(lambda: get_user(request))
+        try:
+            return 200, self.resolve_channels(request)
+        except Http404:
+            return 404, None
+        except PermissionDenied:
+            return 403, None
+
+    async def events(self, scope, receive, send):
+        if await read_body(receive) is None:
+            return
+        environ = build_environ(scope, b'')
+        status, channels = await self.run_sync(self.channels_for, environ)
+        if status != 200:
+            await send({'type': 'http.response.start', 'status': status,
+                        'headers': [(b'content-type', b'text/plain')]})
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        self.start_broker_listener()
+        subscription = events.hub.subscribe(channels)
+        disconnect = asyncio.ensure_future(receive())
+        try:
+            await send({'type': 'http.response.start', 'status': 200,
+                        'headers': SSE_HEADERS})
+            await send({'type': 'http.response.body', 'more_body': True,
+                        'body': f'retry: {settings.EVENTS_RETRY}\n\n'
+                        .encode()})
+            while True:
+                message = asyncio.ensure_future(subscription.queue.get())
+                done, _ = await asyncio.wait(
+                    {message, disconnect}, timeout=settings.EVENTS_KEEPALIVE,
+                    return_when=asyncio.FIRST_COMPLETED)
+                if disconnect in done:
+                    message.cancel()
+                    return
+                if message in done:
+                    body = format_event(message.result())
+                else:
+                    message.cancel()
+                    body = b': keepalive\n\n'
+                await send({'type': 'http.response.body', 'body': body,
+                            'more_body': True})
+        finally:
+            events.hub.unsubscribe(subscription)
+            disconnect.cancel()
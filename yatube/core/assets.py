@@ -0,0 +1,149 @@
+"""Сборка статики: вычистка неиспользуемых правил CSS и предсжатие файлов."""
+import gzip
+import io
+import os
+import re
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+TOKEN_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_-]*')
+CLASS_RE = re.compile(r'\.(-?[_a-zA-Z][_a-zA-Z0-9-]*)')
+NOT_RE = re.compile(r':not\([^)]*\)')
+SOURCE_EXTENSIONS = ('.html', '.txt', '.py')
+
+# Внутри этих at-правил лежат обычные правила, их чистим рекурсивно.
+NESTED_AT_RULES = ('@media', '@supports', '@document', '@layer')
+
+
+def collect_used_tokens(directories):
+    """Все слова из шаблонов и модулей проекта.
+
+    Множество заведомо шире реально используемых классов: лишнее правило
+    в CSS безопаснее, чем вырезанный стиль, который задаётся из кода.
+    """
+    tokens = set()
+    for directory in directories:
+        for root, dirs, files in os.walk(directory):
+            dirs[:] = [name for name in dirs
+                       if name not in ('static', 'media', '__pycache__')]
+            for filename in files:
+                if not filename.endswith(SOURCE_EXTENSIONS):
+                    continue
+                path = os.path.join(root, filename)
+                with open(path, encoding='utf-8', errors='ignore') as source:
+                    tokens.update(TOKEN_RE.findall(source.read()))
+    return tokens
+
+
+def _split_blocks(css):
+    """Разбивает CSS верхнего уровня на пары (прелюдия, тело).
+
+    Для инструкций вида ``@charset ...;`` тело равно None.
+    """
+    blocks = []
+    depth = 0
+    start = 0
+    body_start = None
+    i = 0
+    length = len(css)
+    while i < length:
+        char = css[i]
+        if char == '/' and css.startswith('/*', i):
+            end = css.find('*/', i + 2)
+            i = length if end == -1 else end + 2
+            continue
+        if char in '"\'':
+            end = i + 1
+            while end < length and css[end] != char:
+                end += 2 if css[end] == '\\' else 1
+            i = end + 1
+            continue
+        if char == '{':
+            if depth == 0:
+                body_start = i + 1
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                blocks.append((css[start:body_start - 1].strip(),
+                               css[body_start:i]))
+                start = i + 1
+        elif char == ';' and depth == 0:
+            blocks.append((css[start:i + 1].strip(), None))
+            start = i + 1
+        i += 1
+    return blocks
+
+
+def _split_selectors(prelude):
+    selectors = []
+    depth = 0
+    current = []
+    for char in prelude:
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        if char == ',' and depth == 0:
+            selectors.append(''.join(current))
+            current = []
+        else:
+            current.append(char)
+    selectors.append(''.join(current))
+    return [selector.strip() for selector in selectors if selector.strip()]
+
+
+def _selector_used(selector, used):
+    classes = CLASS_RE.findall(NOT_RE.sub('', selector))
+    return all(name in used for name in classes)
+
+
+def _strip_comments(css):
+    return re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+
+
+def purge_css(css, used):
+    """Оставляет только правила, все классы селекторов которых встречаются
+    в ``used``. Селекторы без классов, ``@font-face``, ``@keyframes``
+    и прочие at-правила без селекторов не трогаются.
+    """
+    output = []
+    for prelude, body in _split_blocks(css):
+        if body is None:
+            output.append(prelude)
+            continue
+        if prelude.startswith(NESTED_AT_RULES):
+            inner = purge_css(body, used)
+            if inner:
+                output.append(f'{prelude}{{{inner}}}')
+            continue
+        if prelude.startswith('@'):
+            output.append(f'{prelude}{{{body}}}')
+            continue
+        selectors = [selector
+                     for selector in _split_selectors(_strip_comments(prelude))
+                     if _selector_used(selector, used)]
+        if selectors:
+            # Лицензионный комментарий /*! ... */ идёт перед первым правилом.
+            comment = re.match(r'\s*(/\*!.*?\*/)', prelude, flags=re.S)
+            header = comment.group(1) if comment else ''
+            output.append(f'{header}{",".join(selectors)}{{{body}}}')
+    return ''.join(output)
+
+
+def compress(content):
+    """Возвращает словарь {расширение: сжатые данные} для выгодных вариантов.
+    """
+    buffer = io.BytesIO()
+    # mtime=0 делает результат воспроизводимым между сборками.
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=9,
+                       mtime=0) as archive:
+        archive.write(content)
+    variants = {'.gz': buffer.getvalue()}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(content)
+    return {extension: data for extension, data in variants.items()
+            if len(data) < len(content) * 0.95}
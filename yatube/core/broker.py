@@ -0,0 +1,76 @@
+"""Брокер событий для нескольких процессов (EVENTS_BROKER).
+
+Публикующие процессы отправляют события брокеру (core.events.publish), а
+ASGI-процессы слушают его через ``listen_broker`` и раздают события своим
+подписчикам.
+"""
+import asyncio
+import json
+import logging
+
+from .events import SUBSCRIBE, hub, parse_address
+
+logger = logging.getLogger(__name__)
+
+MAX_LISTENER_BUFFER = 1024 * 1024
+
+
+async def listen_broker(address, reconnect_delay=1):
+    """Получает события от брокера и раздаёт их подписчикам процесса."""
+    host, port = parse_address(address)
+    while True:
+        writer = None
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.write(SUBSCRIBE)
+            await writer.drain()
+            async for line in reader:
+                hub.dispatch(json.loads(line))
+        except (OSError, ValueError):
+            logger.warning('Соединение с брокером событий %s потеряно',
+                           address, exc_info=True)
+        finally:
+            if writer is not None:
+                writer.close()
+        await asyncio.sleep(reconnect_delay)
+
+
+class Broker:
+    """Брокер для нескольких процессов: пересылает каждую строку-событие
+    всем подключившимся с командой SUBSCRIBE."""
+
+    def __init__(self):
+        self.server = None
+        self.connections = set()
+        self.listeners = set()
+
+    async def handle(self, reader, writer):
+        self.connections.add(writer)
+        try:
+            async for line in reader:
+                if line == SUBSCRIBE:
+                    self.listeners.add(writer)
+                    continue
+                for listener in list(self.listeners):
+                    if (listener.transport.get_write_buffer_size()
+                            > MAX_LISTENER_BUFFER):
+                        # Подписчик завис: отключаем, он переподключится.
+                        self.listeners.discard(listener)
+                        listener.close()
+                        continue
+                    listener.write(line)
+        except OSError:
+            pass
+        finally:
+            self.connections.discard(writer)
+            self.listeners.discard(writer)
+            writer.close()
+
+    async def serve(self, host, port):
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server
+
+    def close(self):
+        self.server.close()
+        for writer in list(self.connections):
+            writer.close()
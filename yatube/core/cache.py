@@ -0,0 +1,31 @@
+"""Счётчики версий для инвалидации кеша сменой ключа.
+
+Вместо удаления связанных записей увеличиваем версию, входящую в их
+ключи; старые записи просто перестают читаться и истекают сами. Начальное
+значение берётся от текущего времени, поэтому после вытеснения счётчика
+из кеша версия не вернётся к уже использованному числу.
+"""
+import time
+
+from django.core.cache import cache
+
+
+def _initial():
+    return int(time.time() * 1000)
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial(), None)
+        version = cache.get(key)
+    return version or _initial()
+
+
+def bump_version(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _initial()
+        cache.set(key, version, None)
+        return version
@@ -0,0 +1,154 @@
+"""Публикация событий для server-sent events.
+
+Событие — словарь ``{'channel', 'event', 'data'}``. Каналы — строки вроде
+``feed:index`` или ``post:42``; их смысл задаёт приложение, которое
+публикует события (см. posts.live).
+
+В одном процессе события раздаёт ``hub``: каждому подписчику-соединению
+соответствует небольшая asyncio-очередь, поэтому тысячи ждущих клиентов
+не занимают ни одного потока. Если процессов несколько, в EVENTS_BROKER
+указывается адрес брокера ``python manage.py eventbroker``: публикующие
+процессы отправляют ему события, а ASGI-процессы получают их обратно и
+раздают своим подписчикам (core.broker).
+
+Модуль импортируется при старте любого воркера (через сигналы posts), а
+публикации asyncio не нужен, поэтому он подключается только в
+Subscription: подписки бывают лишь в ASGI-процессе.
+"""
+import json
+import logging
+import socket
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBE = b'SUBSCRIBE\n'
+
+
+class Channels(list):
+    """Каналы подписки с фильтром событий.
+
+    Резолвер EVENTS_CHANNELS возвращает такой список, когда подписываться
+    на каждый нужный канал слишком накладно: подписка идёт на более общий
+    канал, а ``accept(message)`` отбрасывает лишние события.
+    """
+
+    def __init__(self, channels, accept=None):
+        super().__init__(channels)
+        self.accept = accept
+
+
+class Subscription:
+    def __init__(self, channels, maxsize):
+        import asyncio
+
+        self.channels = frozenset(channels)
+        self.accept = getattr(channels, 'accept', None)
+        self.loop = asyncio.get_event_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def deliver(self, message):
+        if self.accept is not None and not self.accept(message):
+            return
+        if self.queue.full():
+            # Клиент не успевает читать: лучше потерять событие, чем
+            # копить очередь в памяти.
+            self.dropped += 1
+            return
+        self.queue.put_nowait(message)
+
+
+class Hub:
+    """Раздача событий подписчикам внутри процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels = defaultdict(set)
+
+    def subscribe(self, channels, maxsize=None):
+        """Подписывает текущую корутину; вызывается внутри event loop."""
+        subscription = Subscription(
+            channels, maxsize or settings.EVENTS_QUEUE_SIZE)
+        with self._lock:
+            for channel in subscription.channels:
+                self._channels[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._channels.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._channels[channel]
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(set().union(*self._channels.values()))
+
+    def dispatch(self, message):
+        """Передаёт событие подписчикам; можно вызывать из любого потока."""
+        with self._lock:
+            subscribers = list(self._channels.get(message['channel'], ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.deliver, message)
+            except RuntimeError:
+                # Цикл событий подписчика уже закрыт.
+                self.unsubscribe(subscription)
+
+
+hub = Hub()
+
+
+def parse_address(address):
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+class BrokerPublisher:
+    """Отправка событий брокеру по постоянному соединению на поток."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.create_connection(
+            parse_address(settings.EVENTS_BROKER), timeout=2)
+        self._local.sock = sock
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, 'sock', None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+    def send(self, message):
+        line = json.dumps(message).encode() + b'\n'
+        for _ in range(2):
+            try:
+                sock = getattr(self._local, 'sock', None) or self._connect()
+                sock.sendall(line)
+                return
+            except OSError:
+                self._close()
+        logger.warning('Брокер событий %s недоступен, событие %s потеряно',
+                       settings.EVENTS_BROKER, message['channel'])
+
+
+_publisher = BrokerPublisher()
+
+
+def publish(channel, event, data):
+    message = {'channel': channel, 'event': event, 'data': data}
+    if settings.EVENTS_BROKER:
+        _publisher.send(message)
+    else:
+        hub.dispatch(message)
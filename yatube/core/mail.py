@@ -0,0 +1,135 @@
+"""Очередь исходящей почты.
+
+QueuedEmailBackend только складывает письма в таблицу OutgoingEmail и сразу
+возвращает управление, поэтому запрос (регистрация, сброс пароля) не ждёт
+SMTP. Команда ``sendqueuedmail`` отправляет накопленные письма порциями
+через одно соединение с EMAIL_DELIVERY_BACKEND и повторяет неудачные
+попытки с нарастающей задержкой.
+
+Несколько воркеров ``sendqueuedmail --loop`` не отправят одно письмо
+дважды: порция захватывается условным UPDATE, который сдвигает
+send_after на EMAIL_QUEUE_LEASE секунд вперёд. Письма упавшего воркера
+снова попадают в очередь, когда аренда истечёт.
+"""
+import logging
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        queued = [
+            OutgoingEmail(
+                from_email=message.from_email,
+                recipients='\n'.join(message.recipients()),
+                message=message.message().as_bytes(),
+            )
+            for message in email_messages if message.recipients()
+        ]
+        OutgoingEmail.objects.bulk_create(queued)
+        return len(queued)
+
+
+class _RawMessage:
+    def __init__(self, raw):
+        self.raw = raw
+
+    def as_bytes(self, unixfrom=False, linesep='\n'):
+        return re.sub(rb'\r?\n', linesep.encode(), self.raw)
+
+    def as_string(self, unixfrom=False, linesep='\n'):
+        return self.as_bytes(linesep=linesep).decode('utf-8', 'replace')
+
+
+class QueuedMessage:
+    """Письмо из очереди с интерфейсом EmailMessage, которого достаточно
+    стандартным почтовым бэкендам Django."""
+
+    encoding = None
+
+    def __init__(self, outgoing):
+        self.from_email = outgoing.from_email
+        self.to = outgoing.recipients.split('\n')
+        self.raw = bytes(outgoing.message)
+
+    def recipients(self):
+        return self.to
+
+    def message(self):
+        return _RawMessage(self.raw)
+
+
+def retry_delay(attempts):
+    return timedelta(
+        seconds=settings.EMAIL_QUEUE_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def _failed(email, error, now):
+    email.attempts += 1
+    email.last_error = repr(error)
+    email.failed = email.attempts >= settings.EMAIL_QUEUE_MAX_ATTEMPTS
+    email.send_after = now + retry_delay(email.attempts)
+    logger.warning('Не удалось отправить письмо %s (попытка %s): %r',
+                   email.pk, email.attempts, error)
+
+
+def claim(batch_size, now):
+    """Забирает до ``batch_size`` писем, которые пора отправить.
+
+    Письмо захвачено, если условный UPDATE застал у него тот же
+    send_after, что был при выборке: у письма, которое забрал другой
+    воркер, send_after уже сдвинут на время аренды.
+    """
+    candidates = OutgoingEmail.objects.pending(now).values_list(
+        'pk', 'send_after')[:batch_size]
+    lease = now + timedelta(seconds=settings.EMAIL_QUEUE_LEASE)
+    claimed = []
+    for pk, send_after in candidates:
+        if OutgoingEmail.objects.filter(
+                pk=pk, send_after=send_after, sent__isnull=True,
+                failed=False).update(send_after=lease):
+            claimed.append(pk)
+    emails = OutgoingEmail.objects.in_bulk(claimed)
+    return [emails[pk] for pk in claimed]
+
+
+def send_queued(batch_size=None):
+    """Отправляет одну порцию писем, возвращает (отправлено, с ошибкой)."""
+    now = timezone.now()
+    batch = claim(batch_size or settings.EMAIL_QUEUE_BATCH_SIZE, now)
+    if not batch:
+        return 0, 0
+    sent = failed = 0
+    connection = get_connection(settings.EMAIL_DELIVERY_BACKEND)
+    try:
+        connection.open()
+    except Exception as error:
+        for email in batch:
+            _failed(email, error, now)
+        OutgoingEmail.objects.bulk_update(
+            batch, ['attempts', 'last_error', 'failed', 'send_after'])
+        return 0, len(batch)
+    try:
+        for email in batch:
+            try:
+                connection.send_messages([QueuedMessage(email)])
+            except Exception as error:
+                _failed(email, error, now)
+                failed += 1
+            else:
+                email.sent = timezone.now()
+                sent += 1
+            email.save(update_fields=[
+                'attempts', 'last_error', 'failed', 'send_after', 'sent'])
+    finally:
+        connection.close()
+    return sent, failed
@@ -0,0 +1,174 @@
+import asyncio
+import gc
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from core import events
+from core.asgi import build_environ
+
+
+def memory():
+    """(виртуальная, резидентная) память процесса в байтах."""
+    gc.collect()
+    with open('/proc/self/statm') as statm:
+        size, resident = statm.read().split()[:2]
+    page = os.sysconf('SC_PAGE_SIZE')
+    return int(size) * page, int(resident) * page
+
+
+def per_connection(before, after, count):
+    return tuple((new - old) / count / 1024
+                 for old, new in zip(before, after))
+
+
+def make_scope(path, query=b''):
+    return {'type': 'http', 'method': 'GET', 'path': path,
+            'query_string': query, 'headers': [(b'host', b'localhost')]}
+
+
+class IdleClient:
+    """ASGI-клиент, который держит соединение, пока его не отпустят."""
+
+    def __init__(self, app, scope):
+        self.requested = False
+        self.released = asyncio.Event()
+        self.status = None
+        self.task = asyncio.ensure_future(app(scope, self.receive, self.send))
+
+    async def receive(self):
+        if not self.requested:
+            self.requested = True
+            return {'type': 'http.request', 'body': b''}
+        await self.released.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        if message['type'] == 'http.response.start':
+            self.status = message['status']
+
+    async def close(self):
+        self.released.set()
+        await self.task
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает ASGI (yatube.asgi) и WSGI в одном процессе: '
+            'пропускную способность при N одновременных клиентах и '
+            'память на ждущее соединение.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/')
+        parser.add_argument('--connections', type=int, default=100)
+        parser.add_argument('--requests', type=int, default=5,
+                            help='Запросов на одного клиента.')
+        parser.add_argument('--idle', type=int, default=1000,
+                            help='Ждущих соединений для замера памяти.')
+
+    def handle(self, *args, **options):
+        from yatube.asgi import application
+        from yatube.wsgi import application as wsgi_application
+
+        path, _, query = options['path'].partition('?')
+        clients, requests = options['connections'], options['requests']
+        rows = [
+            ('ASGI', *self.asgi_throughput(
+                application, path, query, clients, requests)),
+            ('WSGI', *self.wsgi_throughput(
+                wsgi_application, path, query, clients, requests)),
+        ]
+        self.stdout.write(
+            f'{options["path"]}: {clients} клиентов × {requests} запросов')
+        for name, elapsed, errors in rows:
+            total = clients * requests
+            self.stdout.write(
+                f'  {name}: {total / elapsed:8.1f} запр/с, '
+                f'{elapsed:6.2f} с, ошибок {errors}')
+
+        idle = options['idle']
+        self.stdout.write(
+            f'Память на ждущее соединение ({idle} шт.), КБ:')
+        for name, (virtual, resident) in (
+                ('ASGI, корутина SSE', self.asgi_idle_memory(
+                    application, idle)),
+                ('WSGI, поток на соединение', self.wsgi_idle_memory(idle))):
+            self.stdout.write(f'  {name}: виртуальная {virtual:8.1f}, '
+                              f'резидентная {resident:6.1f}')
+
+    def asgi_throughput(self, app, path, query, clients, requests):
+        async def client():
+            errors = 0
+            for _ in range(requests):
+                statuses = []
+
+                async def receive():
+                    return {'type': 'http.request', 'body': b''}
+
+                async def send(message):
+                    if message['type'] == 'http.response.start':
+                        statuses.append(message['status'])
+
+                await app(make_scope(path, query.encode()), receive, send)
+                errors += statuses[0] >= 400
+            return errors
+
+        async def run():
+            return sum(await asyncio.gather(
+                *(client() for _ in range(clients))))
+
+        started = time.perf_counter()
+        errors = asyncio.run(run())
+        return time.perf_counter() - started, errors
+
+    def wsgi_throughput(self, app, path, query, clients, requests):
+        def client():
+            errors = 0
+            for _ in range(requests):
+                statuses = []
+
+                def start_response(status, headers, exc_info=None):
+                    statuses.append(int(status.split()[0]))
+
+                result = app(build_environ(
+                    make_scope(path, query.encode()), b''), start_response)
+                b''.join(result)
+                result.close()
+                errors += statuses[0] >= 400
+            return errors
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(clients) as executor:
+            futures = [executor.submit(client) for _ in range(clients)]
+            errors = sum(future.result() for future in futures)
+        return time.perf_counter() - started, errors
+
+    def asgi_idle_memory(self, app, count):
+        async def run():
+            before = memory()
+            connections = [
+                IdleClient(app, make_scope('/events/', b'feed=index'))
+                for _ in range(count)
+            ]
+            while events.hub.subscriber_count() < count:
+                await asyncio.sleep(0.01)
+            after = memory()
+            for connection in connections:
+                await connection.close()
+            return per_connection(before, after, count)
+        return asyncio.run(run())
+
+    def wsgi_idle_memory(self, count):
+        release = threading.Event()
+        before = memory()
+        threads = [threading.Thread(target=release.wait)
+                   for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        after = memory()
+        release.set()
+        for thread in threads:
+            thread.join()
+        return per_connection(before, after, count)
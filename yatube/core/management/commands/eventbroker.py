@@ -0,0 +1,31 @@
+import asyncio
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.broker import Broker
+from core.events import parse_address
+
+
+class Command(BaseCommand):
+    help = ('Брокер server-sent events для нескольких процессов: '
+            'пересылает события всем ASGI-процессам.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--address', default=settings.EVENTS_BROKER or '127.0.0.1:8765',
+            help='host:port, по умолчанию EVENTS_BROKER.')
+
+    def handle(self, *args, **options):
+        host, port = parse_address(options['address'])
+        loop = asyncio.get_event_loop()
+        broker = Broker()
+        server = loop.run_until_complete(broker.serve(host, port))
+        self.stdout.write(f'Брокер событий слушает {host}:{port}')
+        try:
+            loop.run_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            broker.close()
+            loop.run_until_complete(server.wait_closed())
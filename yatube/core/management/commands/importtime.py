@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+# Что делает воркер при старте: поднимает WSGI-приложение (django.setup()
+# со всеми INSTALLED_APPS) и, при --urls, загружает URLConf, как при
+# первом запросе. В конце печатает время и пиковую RSS процесса.
+BOOT_SCRIPT = '''
+import resource, sys, time
+started = time.perf_counter()
+import yatube.wsgi
+if {urls}:
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+sys.stdout.write('%f %d' % (
+    time.perf_counter() - started,
+    resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+'''
+
+
+def parse_importtime(lines):
+    """Строки ``python -X importtime`` -> [(модуль, self мкс, всего мкс)]."""
+    modules = []
+    for line in lines:
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if not self_us.strip().isdigit():
+            continue
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+class Command(BaseCommand):
+    help = ('Запускает старт воркера в отдельном процессе с '
+            'python -X importtime и показывает, какие модули дольше '
+            'всего импортируются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=25)
+        parser.add_argument(
+            '--sort', choices=('self', 'cumulative'), default='cumulative')
+        parser.add_argument(
+            '--by-package', action='store_true',
+            help='Суммировать собственное время по пакетам верхнего уровня.')
+        parser.add_argument(
+            '--no-urls', action='store_true',
+            help='Не загружать URLConf.')
+
+    def handle(self, *args, **options):
+        script = BOOT_SCRIPT.format(urls=not options['no_urls'])
+        env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', script],
+            cwd=os.getcwd(), env=env, stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE, universal_newlines=True, check=True)
+        elapsed, max_rss = result.stdout.split()
+        modules = parse_importtime(result.stderr.splitlines())
+
+        if options['by_package']:
+            totals = defaultdict(int)
+            for name, self_us, _ in modules:
+                totals[name.split('.')[0]] += self_us
+            rows = sorted(totals.items(), key=lambda row: -row[1])
+            self.stdout.write(f'{"мс":>8}  пакет')
+            for name, self_us in rows[:options['top']]:
+                self.stdout.write(f'{self_us / 1000:8.1f}  {name}')
+        else:
+            index = 1 if options['sort'] == 'self' else 2
+            rows = sorted(modules, key=lambda row: -row[index])
+            self.stdout.write(f'{"свое, мс":>9} {"всего, мс":>10}  модуль')
+            for name, self_us, cumulative_us in rows[:options['top']]:
+                self.stdout.write(f'{self_us / 1000:9.1f} '
+                                  f'{cumulative_us / 1000:10.1f}  {name}')
+        self.stdout.write(
+            f'Модулей: {len(modules)}, старт: {float(elapsed) * 1000:.0f} мс, '
+            f'пиковая RSS: {int(max_rss) // 1024} МБ')
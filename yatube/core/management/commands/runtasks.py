@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.taskqueue import run_pending
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди core.Task.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, проверяя очередь раз в --interval.')
+        parser.add_argument('--interval', type=float, default=1)
+
+    def handle(self, *args, **options):
+        while True:
+            done, failed = run_pending(options['batch_size'])
+            while done or failed:
+                if options['verbosity'] > 1:
+                    self.stdout.write(
+                        f'Выполнено: {done}, с ошибкой: {failed}')
+                done, failed = run_pending(options['batch_size'])
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.mail import send_queued
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди OutgoingEmail порциями.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, проверяя очередь раз в --interval.')
+        parser.add_argument('--interval', type=float, default=5)
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_queued(options['batch_size'])
+            while sent or failed:
+                self.stdout.write(f'Отправлено: {sent}, с ошибкой: {failed}')
+                sent, failed = send_queued(options['batch_size'])
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,40 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = ('Удаляет просроченные сессии из базы небольшими порциями, '
+            'не блокируя запись надолго.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--pause', type=float, default=0.1,
+            help='Пауза между порциями в секундах.')
+
+    def handle(self, *args, **options):
+        engine = import_module(settings.SESSION_ENGINE)
+        if not hasattr(engine.SessionStore, 'get_model_class'):
+            self.stdout.write(
+                f'{settings.SESSION_ENGINE} не хранит сессии в базе.')
+            return
+        model = engine.SessionStore.get_model_class()
+        now = timezone.now()
+        total = 0
+        while True:
+            keys = list(
+                model.objects.filter(expire_date__lt=now)
+                .values_list('session_key', flat=True)
+                [:options['batch_size']]
+            )
+            if not keys:
+                break
+            total += model.objects.filter(session_key__in=keys).delete()[0]
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Удалено {total}')
+            time.sleep(options['pause'])
+        self.stdout.write(f'Удалено просроченных сессий: {total}')
@@ -0,0 +1,118 @@
+"""Отдача загруженных файлов (MEDIA_ROOT) без стриминга через Python.
+
+При MEDIA_SENDFILE = 'x-accel-redirect' (nginx) или 'x-sendfile'
+(Apache, lighttpd) представление только проверяет путь и отвечает
+заголовком, а сам файл отправляет фронт-сервер. Без фронт-сервера файл
+отдаёт FileResponse: с поддержкой Range и через ``wsgi.file_wrapper``,
+так что gunicorn и другие серверы передают его системным sendfile.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class FileRange:
+    """Часть открытого файла для ответа 206: ``read`` не выходит за
+    границу, а ``fileno`` позволяет серверу отправить её через sendfile
+    (длину он берёт из Content-Length)."""
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.left = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.left:
+            size = self.left
+        data = self.file.read(size)
+        self.left -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """(начало, длина) для одного диапазона ``bytes=a-b`` или None, если
+    заголовка нет или он не подходит (тогда отдаётся весь файл)."""
+    match = RANGE_RE.match(header or '')
+    if not match or not any(match.groups()):
+        return None
+    start, end = match.groups()
+    if not start:
+        length = min(int(end), size)
+        return (size - length, length) if length else None
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start > end:
+        return None
+    return start, end - start + 1
+
+
+def _sendfile_response(path, name, content_type):
+    response = HttpResponse(content_type=content_type)
+    if settings.MEDIA_SENDFILE == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = quote(
+            f'{settings.MEDIA_ACCEL_PREFIX}{name}')
+    else:
+        response['X-Sendfile'] = path
+    return response
+
+
+def file_response(request, path, name, max_age=None, immutable=False):
+    """Ответ с файлом ``path`` (``name`` — путь относительно MEDIA_ROOT)."""
+    stat = os.stat(path)
+    content_type, _ = mimetypes.guess_type(path)
+    content_type = content_type or 'application/octet-stream'
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                              stat.st_mtime, stat.st_size):
+        response = HttpResponse(status=304)
+    elif settings.MEDIA_SENDFILE:
+        response = _sendfile_response(path, name, content_type)
+    else:
+        file = open(path, 'rb')
+        byte_range = parse_range(request.META.get('HTTP_RANGE'),
+                                 stat.st_size)
+        if byte_range is None:
+            response = FileResponse(file, content_type=content_type)
+        else:
+            start, length = byte_range
+            response = FileResponse(FileRange(file, start, length),
+                                    status=206, content_type=content_type)
+            response['Content-Range'] = (
+                f'bytes {start}-{start + length - 1}/{stat.st_size}')
+            response['Content-Length'] = str(length)
+        response['Accept-Ranges'] = 'bytes'
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    patch_cache_control(response, public=True, max_age=(
+        settings.MEDIA_MAX_AGE if max_age is None else max_age))
+    if immutable:
+        patch_cache_control(response, immutable=True)
+    return response
+
+
+@require_safe
+def serve(request, path):
+    """Файл из MEDIA_ROOT по адресу MEDIA_URL<path>."""
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    return file_response(request, full_path, path)
@@ -0,0 +1,132 @@
+import re
+
+from django.conf import settings
+from django.contrib.sessions.middleware import \
+    SessionMiddleware as BaseSessionMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ACCEPT_RE = re.compile(r'\s*([^\s;,]+)\s*(?:;\s*q=([0-9.]+))?')
+
+
+def accepted_encodings(header):
+    encodings = set()
+    for match in ACCEPT_RE.finditer(header):
+        encoding, quality = match.groups()
+        try:
+            if quality is not None and float(quality) <= 0:
+                continue
+        except ValueError:
+            continue
+        encodings.add(encoding.lower())
+    return encodings
+
+
+def brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=settings.COMPRESS_BROTLI_QUALITY)
+    for item in sequence:
+        # flush() после каждого куска сохраняет раннюю отправку <head>.
+        data = compressor.process(item) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Сжимает ответы brotli или gzip в зависимости от Accept-Encoding.
+
+    Маленькие ответы, уже сжатые форматы (картинки, архивы), файлы
+    (FileResponse) и ответы с Content-Encoding не трогаются. Потоковые
+    ответы сжимаются покусочно.
+    """
+
+    def _skip(self, response):
+        """Ответы, которые сжимать не нужно или нельзя."""
+        if not settings.COMPRESS_ENABLED or response.has_header(
+                'Content-Encoding'):
+            return True
+        content_type = response.get('Content-Type', '').lower()
+        if content_type.startswith(tuple(settings.COMPRESS_SKIP_TYPES)):
+            return True
+        if (getattr(response, 'file_to_stream', None) is not None
+                or response.status_code == 206):
+            # Файл сервер отправит через wsgi.file_wrapper в обход
+            # streaming_content, а диапазон байтов сжимать нельзя.
+            return True
+        return not response.streaming and (
+            len(response.content) < settings.COMPRESS_MIN_SIZE)
+
+    def process_response(self, request, response):
+        if self._skip(response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = self.select_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if encoding == 'br':
+                response.streaming_content = brotli_sequence(
+                    response.streaming_content)
+            else:
+                response.streaming_content = compress_sequence(
+                    response.streaming_content)
+            del response['Content-Length']
+        else:
+            if encoding == 'br':
+                compressed = brotli.compress(
+                    response.content,
+                    quality=settings.COMPRESS_BROTLI_QUALITY)
+            else:
+                compressed = compress_string(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(response.content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    def select_encoding(self, header):
+        accepted = accepted_encodings(header)
+        for encoding in settings.COMPRESS_ENCODINGS:
+            if encoding == 'br' and brotli is None:
+                continue
+            if encoding in accepted:
+                return encoding
+        return None
+
+
+def session_readonly(view_func):
+    """Помечает представление, которое никогда не сохраняет сессию."""
+    view_func.session_readonly = True
+    return view_func
+
+
+class SessionMiddleware(BaseSessionMiddleware):
+    """SessionMiddleware, не пишущий сессию после представлений,
+    помеченных ``session_readonly``: даже при SESSION_SAVE_EVERY_REQUEST
+    чтение ленты не превращается в UPDATE таблицы django_session.
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if getattr(view_func, 'session_readonly', False):
+            request.session_readonly = True
+
+    def process_response(self, request, response):
+        if not getattr(request, 'session_readonly', False):
+            return super().process_response(request, response)
+        if request.session.accessed:
+            patch_vary_headers(response, ('Cookie',))
+        return response
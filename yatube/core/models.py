@@ -0,0 +1,77 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutgoingEmailQuerySet(models.QuerySet):
+    def pending(self, now=None):
+        return self.filter(
+            sent__isnull=True,
+            failed=False,
+            send_after__lte=now or timezone.now(),
+        ).order_by('send_after', 'pk')
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку: готовое MIME-сообщение и конверт."""
+    from_email = models.CharField('Отправитель', max_length=254)
+    recipients = models.TextField('Получатели')
+    message = models.BinaryField('Сообщение')
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    send_after = models.DateTimeField('Отправить после',
+                                      default=timezone.now)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    sent = models.DateTimeField('Отправлено', null=True, blank=True)
+    failed = models.BooleanField('Не доставлено', default=False)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    objects = OutgoingEmailQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'письмо в очереди'
+        verbose_name_plural = 'очередь писем'
+        indexes = [
+            models.Index(fields=['sent', 'failed', 'send_after']),
+        ]
+
+    def __str__(self):
+        return f'{self.from_email} → {self.recipients.replace(chr(10), ", ")}'
+
+
+class Task(models.Model):
+    """Отложенная задача для воркера ``runtasks``."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'в очереди'),
+        (RUNNING, 'выполняется'),
+        (DONE, 'выполнена'),
+        (FAILED, 'не выполнена'),
+    )
+
+    name = models.CharField('Задача', max_length=200)
+    payload = models.TextField('Аргументы', default='{}')
+    priority = models.SmallIntegerField('Приоритет', default=0)
+    key = models.CharField('Ключ идемпотентности', max_length=200,
+                           unique=True, null=True, blank=True)
+    status = models.CharField('Статус', max_length=10, choices=STATUSES,
+                              default=PENDING)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField('Максимум попыток',
+                                                    default=5)
+    run_after = models.DateTimeField('Выполнить после', default=timezone.now)
+    locked_until = models.DateTimeField('Занята до', null=True, blank=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    finished = models.DateTimeField('Завершена', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        verbose_name = 'задача'
+        verbose_name_plural = 'задачи'
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+        ]
+
+    def __str__(self):
+        return f'{self.name} [{self.status}]'
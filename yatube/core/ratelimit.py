@@ -0,0 +1,116 @@
+"""Ограничение частоты запросов на запись.
+
+Для каждого пользователя и каждого IP-адреса в кеше хранится корзина
+токенов: она пополняется равномерно со скоростью ``N/период`` и позволяет
+короткие всплески до N запросов. Ограничение намеренно «мягкое»: если кеш
+недоступен или процессу не хватает памяти, запрос пропускается без
+проверки, а не падает.
+"""
+import logging
+import math
+import os
+import re
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.shortcuts import render
+
+logger = logging.getLogger(__name__)
+
+RATE_RE = re.compile(r'^(\d+)/(\d*)([smhd])$')
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60), '100/5m' -> (100, 300)."""
+    match = RATE_RE.match(rate)
+    if match is None:
+        raise ValueError(f'Некорректная частота {rate!r}')
+    count, multiplier, unit = match.groups()
+    return int(count), int(multiplier or 1) * PERIODS[unit]
+
+
+def client_ip(request):
+    if settings.RATELIMIT_TRUST_FORWARDED:
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def under_memory_pressure():
+    limit = settings.RATELIMIT_MAX_RSS_MB
+    if not limit:
+        return False
+    try:
+        with open('/proc/self/statm') as statm:
+            resident_pages = int(statm.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return False
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') > limit * 1024 ** 2
+
+
+def consume(key, rate, now=None):
+    """Забирает токен из корзины ``key``.
+
+    Возвращает 0, если запрос разрешён, иначе число секунд до появления
+    следующего токена.
+    """
+    capacity, period = parse_rate(rate)
+    refill = capacity / period
+    now = time.time() if now is None else now
+    cache = caches[settings.RATELIMIT_CACHE]
+    tokens, updated = cache.get(key) or (capacity, now)
+    tokens = min(capacity, tokens + (now - updated) * refill)
+    if tokens < 1:
+        cache.set(key, (tokens, now), period)
+        return math.ceil((1 - tokens) / refill)
+    cache.set(key, (tokens - 1, now), period)
+    return 0
+
+
+def check(request, scope, rates):
+    """Проверяет все корзины запроса, возвращает задержку Retry-After."""
+    if not settings.RATELIMIT_ENABLED or under_memory_pressure():
+        return 0
+    rates = {**rates, **settings.RATELIMIT_RATES.get(scope, {})}
+    buckets = []
+    if rates.get('user') and request.user.is_authenticated:
+        buckets.append(('user', request.user.pk, rates['user']))
+    if rates.get('ip'):
+        buckets.append(('ip', client_ip(request), rates['ip']))
+    retry_after = 0
+    try:
+        for kind, ident, rate in buckets:
+            retry_after = max(retry_after, consume(
+                f'ratelimit:{scope}:{kind}:{ident}', rate))
+    except Exception:
+        logger.warning('Ограничение частоты %s пропущено', scope,
+                       exc_info=True)
+        return 0
+    return retry_after
+
+
+def ratelimit(scope, user=None, ip=None, methods=None):
+    """Ограничивает частоту вызова представления.
+
+    ``user`` и ``ip`` — частоты вида '10/m' для корзин пользователя и
+    адреса; RATELIMIT_RATES[scope] может их переопределить. ``methods``
+    ограничивает проверку перечисленными HTTP-методами.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if methods is None or request.method in methods:
+                retry_after = check(request, scope, {'user': user, 'ip': ip})
+                if retry_after:
+                    response = render(request, 'error_pages/429.html',
+                                      {'retry_after': retry_after},
+                                      status=429)
+                    response['Retry-After'] = str(retry_after)
+                    return response
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
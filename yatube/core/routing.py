@@ -0,0 +1,43 @@
+"""Ленивые представления для URLConf.
+
+Загрузка URLConf не должна импортировать все модули представлений с их
+формами, шаблонными помощниками и зависимостями: ``lazy_view`` принимает
+путь к представлению строкой и импортирует модуль при первом запросе к
+этому адресу. Отметки представления (``csrf_exempt``, ``session_readonly``,
+``async_view``) читаются у настоящего представления.
+"""
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
+
+
+class LazyView:
+    def __init__(self, dotted_path, **initkwargs):
+        self.dotted_path = dotted_path
+        self.initkwargs = initkwargs
+        self.__module__, _, self.__name__ = dotted_path.rpartition('.')
+        self.__qualname__ = self.__name__
+
+    @cached_property
+    def view(self):
+        view = import_string(self.dotted_path)
+        if hasattr(view, 'as_view'):
+            view = view.as_view(**self.initkwargs)
+        return view
+
+    def __call__(self, request, *args, **kwargs):
+        return self.view(request, *args, **kwargs)
+
+    def __getattr__(self, name):
+        # Вызывается только для атрибутов, которых нет у самой обёртки.
+        if name.startswith('__') or name == 'view':
+            raise AttributeError(name)
+        return getattr(self.view, name)
+
+    def __repr__(self):
+        return f'<LazyView {self.dotted_path}>'
+
+
+def lazy_view(dotted_path, **initkwargs):
+    """Представление по пути ``'app.views.name'``; для класса-представления
+    ``initkwargs`` передаются в ``as_view``."""
+    return LazyView(dotted_path, **initkwargs)
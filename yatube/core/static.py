@@ -0,0 +1,147 @@
+"""WSGI-обёртка, раздающая собранную статику из памяти процесса.
+
+Индекс STATIC_ROOT строится один раз при старте воркера: для каждого файла
+запоминаются размер, ETag, тип и готовые .br/.gz варианты, а содержимое
+небольших файлов читается в память, так что запрос к статике не доходит
+ни до Django, ни до диска.
+"""
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+from wsgiref.headers import Headers
+
+from django.conf import settings
+
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+CHUNK_SIZE = 64 * 1024
+
+
+def read_chunks(path):
+    with open(path, 'rb') as file:
+        yield from iter(lambda: file.read(CHUNK_SIZE), b'')
+
+
+class StaticVariant:
+    def __init__(self, path, encoding=None, preload=False):
+        stat = os.stat(path)
+        self.path = path
+        self.encoding = encoding
+        self.size = stat.st_size
+        self.etag = '"{:x}-{:x}{}"'.format(
+            int(stat.st_mtime), stat.st_size,
+            f'-{encoding}' if encoding else '')
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        self.content = None
+        if preload:
+            with open(path, 'rb') as file:
+                self.content = file.read()
+
+
+class StaticFile:
+    def __init__(self, path, name, budget):
+        content_type, _ = mimetypes.guess_type(name)
+        self.content_type = content_type or 'application/octet-stream'
+        if self.content_type.startswith('text/'):
+            self.content_type += '; charset=utf-8'
+        self.immutable = bool(HASHED_NAME_RE.search(name))
+        self.variants = {}
+        for encoding, extension in ENCODINGS:
+            if os.path.exists(path + extension):
+                self.variants[encoding] = budget.variant(
+                    path + extension, encoding)
+        self.variants[None] = budget.variant(path)
+
+    def select(self, accept_encoding):
+        accepted = {
+            token.split(';')[0].strip()
+            for token in accept_encoding.split(',')
+            if not token.replace(' ', '').endswith(';q=0')
+        }
+        for encoding, _ in ENCODINGS:
+            if encoding in accepted and encoding in self.variants:
+                return self.variants[encoding]
+        return self.variants[None]
+
+
+class _MemoryBudget:
+    def __init__(self, limit):
+        self.left = limit
+
+    def variant(self, path, encoding=None):
+        preload = os.path.getsize(path) <= self.left
+        if preload:
+            self.left -= os.path.getsize(path)
+        return StaticVariant(path, encoding, preload)
+
+
+class StaticFilesApp:
+    """Отдаёт файлы из ``root`` по префиксу ``prefix``, остальные запросы
+    передаёт обёрнутому приложению."""
+
+    def __init__(self, application, root=None, prefix=None,
+                 memory_limit=None):
+        self.application = application
+        self.root = root or settings.STATIC_ROOT
+        self.prefix = prefix or settings.STATIC_URL
+        self.max_age = settings.STATIC_MAX_AGE
+        self.files = self.build_index(
+            memory_limit if memory_limit is not None
+            else settings.STATIC_MEMORY_LIMIT)
+
+    def build_index(self, memory_limit):
+        files = {}
+        if not self.root or not os.path.isdir(self.root):
+            return files
+        budget = _MemoryBudget(memory_limit)
+        suffixes = tuple(extension for _, extension in ENCODINGS)
+        for directory, _, filenames in os.walk(self.root):
+            for filename in sorted(filenames):
+                path = os.path.join(directory, filename)
+                if filename.endswith(suffixes) and os.path.exists(
+                        path[:path.rindex('.')]):
+                    continue
+                name = os.path.relpath(path, self.root).replace(os.sep, '/')
+                files[name] = StaticFile(path, name, budget)
+        return files
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if not path.startswith(self.prefix):
+            return self.application(environ, start_response)
+        static_file = self.files.get(path[len(self.prefix):])
+        if static_file is None:
+            return self.application(environ, start_response)
+        if environ['REQUEST_METHOD'] not in ('GET', 'HEAD'):
+            start_response('405 Method Not Allowed',
+                           [('Allow', 'GET, HEAD')])
+            return [b'']
+        return self.serve(static_file, environ, start_response)
+
+    def serve(self, static_file, environ, start_response):
+        variant = static_file.select(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        headers = Headers([])
+        headers['Vary'] = 'Accept-Encoding'
+        headers['ETag'] = variant.etag
+        headers['Last-Modified'] = variant.last_modified
+        if static_file.immutable:
+            headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        else:
+            headers['Cache-Control'] = f'public, max-age={self.max_age}'
+        if environ.get('HTTP_IF_NONE_MATCH') == variant.etag:
+            start_response('304 Not Modified', headers.items())
+            return [b'']
+        headers['Content-Type'] = static_file.content_type
+        headers['Content-Length'] = str(variant.size)
+        if variant.encoding:
+            headers['Content-Encoding'] = variant.encoding
+        start_response('200 OK', headers.items())
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return [b'']
+        if variant.content is not None:
+            return [variant.content]
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper:
+            return file_wrapper(open(variant.path, 'rb'), CHUNK_SIZE)
+        return read_chunks(variant.path)
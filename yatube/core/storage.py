@@ -0,0 +1,151 @@
+import hashlib
+import os
+import posixpath
+import re
+import uuid
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import FileSystemStorage
+
+from .assets import collect_used_tokens, compress, purge_css
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest-хранилище, которое при collectstatic дополнительно
+    вычищает неиспользуемые правила из больших CSS-библиотек и кладёт
+    рядом с каждым файлом его .gz/.br варианты.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            yield from super().post_process(paths, dry_run, **options)
+            return
+        paths = dict(paths)
+        for name in self.purge(paths):
+            # Хеш и сжатие считаем от вычищенной копии, а не от исходника.
+            paths[name] = (self, name)
+        yield from super().post_process(paths, dry_run, **options)
+        for name in paths:
+            hashed_name = self.hashed_files.get(self.hash_key(name))
+            for path in {name, hashed_name} - {None}:
+                for compressed in self.compress(path):
+                    yield path, compressed, True
+
+    def purge(self, paths):
+        targets = [name for name in settings.STATIC_PURGE_CSS if name in paths]
+        if not targets:
+            return targets
+        used = collect_used_tokens(settings.STATIC_PURGE_SOURCES)
+        used.update(settings.STATIC_PURGE_SAFELIST)
+        for name in targets:
+            # Читаем исходник: копия в STATIC_ROOT могла быть вычищена
+            # прошлой сборкой под другой набор шаблонов.
+            source_storage, source_path = paths[name]
+            with source_storage.open(source_path) as original:
+                css = original.read().decode('utf-8')
+            self.delete(name)
+            self._save(name, ContentFile(purge_css(css, used).encode('utf-8')))
+        return targets
+
+    def compress(self, name):
+        if not name.endswith(settings.STATIC_COMPRESS_EXTENSIONS):
+            return []
+        with self.open(name) as original:
+            content = original.read()
+        written = []
+        for extension, data in compress(content).items():
+            compressed_name = name + extension
+            if self.exists(compressed_name):
+                self.delete(compressed_name)
+            self._save(compressed_name, ContentFile(data))
+            written.append(compressed_name)
+        return written
+
+
+SHARD_LEVELS = 2
+SHARDED_RE = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{2}/[^/]+$')
+
+
+def shard_name(name, key=None):
+    """``posts/photo.jpg`` -> ``posts/3f/a2/photo.jpg``.
+
+    Подкаталоги — первые байты md5 от ``key`` (по умолчанию от самого
+    имени, так что для одного имени результат всегда один и тот же).
+    """
+    dirname, basename = posixpath.split(name)
+    digest = hashlib.md5((key or name).encode()).hexdigest()
+    return posixpath.join(dirname, *_shards(digest), basename)
+
+
+def _shards(digest):
+    return [digest[level * 2:level * 2 + 2] for level in range(SHARD_LEVELS)]
+
+
+def is_sharded(name):
+    return bool(SHARDED_RE.search(name))
+
+
+class ShardedFileSystemStorage(FileSystemStorage):
+    """Хранилище, которое раскладывает новые файлы по подкаталогам
+    (shard_name), чтобы в одном каталоге не копились миллионы файлов.
+
+    upload_to поля не меняется: подкаталоги добавляются к его результату.
+    """
+
+    def generate_filename(self, filename):
+        filename = super().generate_filename(filename)
+        return shard_name(filename, key=uuid.uuid4().hex)
+
+
+def content_name(name, content):
+    """``posts/photo.JPG`` -> ``posts/3f/a2/3fa2…e1.jpg``: имя из sha256
+    содержимого, расширение от исходного имени."""
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    digest = digest.hexdigest()
+    dirname, basename = posixpath.split(name)
+    extension = posixpath.splitext(basename)[1].lower()
+    return posixpath.join(dirname, *_shards(digest), digest + extension)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, в котором имя файла — хеш его содержимого
+    (content_name).
+
+    Одинаковая картинка, загруженная повторно, не записывается ещё раз:
+    пост получает имя уже лежащего файла, а вместе с ним готовые
+    миниатюры sorl и уменьшенные копии, которые привязаны к имени.
+    Поэтому один файл могут разделять несколько постов, и удалять его
+    можно, только когда на него не осталось ссылок
+    (PostQuerySet.image_references).
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = content_name(name, content)
+        try:
+            # Свежий mtime показывает posts.orphans, что файл снова
+            # понадобился и удалять его нельзя.
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            pass
+        else:
+            return name
+        try:
+            return super().save(name, content, max_length=max_length)
+        except FileExistsError:
+            # Тот же файл одновременно записал другой процесс.
+            return name
+
+    def get_available_name(self, name, max_length=None):
+        # Имя задаёт содержимое, поэтому вместо занятого имени нельзя брать
+        # соседнее: save считает такой файл уже записанным.
+        if self.exists(name):
+            raise FileExistsError(name)
+        return name
@@ -0,0 +1,86 @@
+"""Потоковый рендеринг шаблонов Django.
+
+Шаблон рендерится по узлам верхнего уровня с учётом цепочки ``extends``.
+Всё, что стоит в базовом шаблоне до блоков из STREAMING_FLUSH_BLOCKS
+(``<head>``, шапка сайта), уходит клиенту отдельным куском ещё до того,
+как начнут выполняться запросы к базе внутри этих блоков.
+"""
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.template.base import TextNode
+from django.template.context import make_context
+from django.template.loader import get_template
+from django.template.loader_tags import (BLOCK_CONTEXT_KEY, BlockContext,
+                                         BlockNode, ExtendsNode)
+
+FLUSH = object()
+
+
+def _iter_extends(node, context):
+    # Повторяет ExtendsNode.render, но отдаёт узлы родителя по одному.
+    parent = node.get_parent(context)
+    if BLOCK_CONTEXT_KEY not in context.render_context:
+        context.render_context[BLOCK_CONTEXT_KEY] = BlockContext()
+    block_context = context.render_context[BLOCK_CONTEXT_KEY]
+    block_context.add_blocks(node.blocks)
+    for parent_node in parent.nodelist:
+        if not isinstance(parent_node, TextNode):
+            if not isinstance(parent_node, ExtendsNode):
+                blocks = {
+                    block.name: block for block in
+                    parent.nodelist.get_nodes_by_type(BlockNode)
+                }
+                block_context.add_blocks(blocks)
+            break
+    with context.render_context.push_state(parent, isolated_context=False):
+        yield from _iter_nodes(parent, context)
+
+
+def _iter_nodes(template, context):
+    for node in template.nodelist:
+        if isinstance(node, ExtendsNode):
+            yield from _iter_extends(node, context)
+            return
+    for node in template.nodelist:
+        if (isinstance(node, BlockNode)
+                and node.name in settings.STREAMING_FLUSH_BLOCKS):
+            yield FLUSH
+        yield node.render_annotated(context)
+
+
+def stream_template(template_name, context=None, request=None):
+    """Генератор кусков HTML; куски разделены точками сброса."""
+    template = get_template(template_name).template
+    context = make_context(context, request,
+                           autoescape=template.engine.autoescape)
+    buffer = []
+    with context.render_context.push_state(template):
+        with context.bind_template(template):
+            context.template_name = template.name
+            for piece in _iter_nodes(template, context):
+                if piece is FLUSH:
+                    if buffer:
+                        yield ''.join(buffer)
+                    buffer = []
+                else:
+                    buffer.append(piece)
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_render(request, template_name, context=None):
+    """Аналог django.shortcuts.render, отдающий StreamingHttpResponse."""
+    # Шаблон рендерится уже после process_response всех middleware, поэтому
+    # то, что они делают по итогам рендеринга, нужно запросить заранее.
+    if hasattr(request, 'session'):
+        # Страница зависит от пользователя: SessionMiddleware выставит
+        # Vary: Cookie, только если к сессии обращались.
+        request.session.accessed = True
+    # {% csrf_token %} в потоке уже не успеет попросить CsrfViewMiddleware
+    # поставить cookie csrftoken.
+    get_token(request)
+    return StreamingHttpResponse(
+        stream_template(template_name, context, request),
+        content_type='text/html; charset=utf-8',
+    )
@@ -0,0 +1,143 @@
+"""Очередь фоновых задач поверх таблицы core.Task, без внешнего брокера.
+
+Задачи объявляются декоратором ``@task`` в модулях ``<app>/tasks.py``
+(они импортируются при старте приложения core) и ставятся в очередь
+через ``enqueue``. Строка задачи пишется в той же транзакции, что и
+данные запроса, и выполняется воркером ``python manage.py runtasks``.
+При TASKS_ALWAYS_EAGER задачи выполняются сразу, без очереди.
+"""
+import json
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def task(name=None, priority=0, max_attempts=None):
+    """Регистрирует функцию как фоновую задачу."""
+    def decorator(func):
+        func.task_name = name or f'{func.__module__}.{func.__name__}'
+        func.task_priority = priority
+        func.task_max_attempts = max_attempts
+        registry[func.task_name] = func
+        return func
+    return decorator
+
+
+def _run_eager(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception('Задача %s завершилась ошибкой', func.task_name)
+
+
+def enqueue(func, args=(), kwargs=None, key=None, priority=None, delay=0):
+    """Ставит задачу в очередь и возвращает строку Task.
+
+    Повторный вызов с тем же ``key`` не создаёт новую задачу, а возвращает
+    уже существующую.
+    """
+    kwargs = kwargs or {}
+    if settings.TASKS_ALWAYS_EAGER:
+        _run_eager(func, args, kwargs)
+        return None
+    fields = {
+        'name': func.task_name,
+        'payload': json.dumps({'args': list(args), 'kwargs': kwargs}),
+        'priority': func.task_priority if priority is None else priority,
+        'max_attempts': (func.task_max_attempts
+                         or settings.TASKS_MAX_ATTEMPTS),
+        'run_after': timezone.now() + timedelta(seconds=delay),
+    }
+    if key is None:
+        return Task.objects.create(**fields)
+    try:
+        with transaction.atomic():
+            return Task.objects.create(key=key, **fields)
+    except IntegrityError:
+        return Task.objects.get(key=key)
+
+
+def claim(batch_size):
+    """Забирает до ``batch_size`` готовых задач, начиная с приоритетных.
+
+    Захват — условный UPDATE, поэтому несколько воркеров не выполнят
+    одну задачу дважды. Задачи упавшего воркера освобождаются по
+    истечении TASKS_LEASE секунд; задача, исчерпавшая попытки (например,
+    каждый раз убивающая воркер), помечается невыполненной.
+    """
+    now = timezone.now()
+    expired = Task.objects.filter(status=Task.RUNNING, locked_until__lt=now)
+    expired.filter(attempts__gte=F('max_attempts')).update(
+        status=Task.FAILED, finished=now,
+        last_error='Воркер не завершил задачу за TASKS_LEASE')
+    expired.update(status=Task.PENDING)
+    candidates = (
+        Task.objects.filter(status=Task.PENDING, run_after__lte=now)
+        .order_by('-priority', 'run_after', 'pk')
+        .values_list('pk', flat=True)[:batch_size]
+    )
+    lease = now + timedelta(seconds=settings.TASKS_LEASE)
+    claimed = []
+    for pk in candidates:
+        if Task.objects.filter(pk=pk, status=Task.PENDING).update(
+                status=Task.RUNNING, locked_until=lease,
+                attempts=F('attempts') + 1):
+            claimed.append(pk)
+    return list(Task.objects.filter(pk__in=claimed)
+                .order_by('-priority', 'run_after', 'pk'))
+
+
+def execute(task_row):
+    func = registry.get(task_row.name)
+    try:
+        if func is None:
+            raise LookupError(f'Задача {task_row.name} не зарегистрирована')
+        payload = json.loads(task_row.payload)
+        with transaction.atomic():
+            func(*payload['args'], **payload['kwargs'])
+    except Exception as error:
+        logger.exception('Задача %s (%s) завершилась ошибкой',
+                         task_row.name, task_row.pk)
+        task_row.last_error = repr(error)
+        if task_row.attempts >= task_row.max_attempts:
+            task_row.status = Task.FAILED
+            task_row.finished = timezone.now()
+        else:
+            task_row.status = Task.PENDING
+            task_row.run_after = timezone.now() + timedelta(
+                seconds=settings.TASKS_RETRY_DELAY
+                * 2 ** (task_row.attempts - 1))
+        task_row.locked_until = None
+        task_row.save(update_fields=['status', 'run_after', 'finished',
+                                     'locked_until', 'last_error'])
+        return False
+    if task_row.key is None:
+        # Без ключа идемпотентности выполненная задача больше не нужна.
+        task_row.delete()
+    else:
+        task_row.status = Task.DONE
+        task_row.finished = timezone.now()
+        task_row.locked_until = None
+        task_row.save(update_fields=['status', 'finished', 'locked_until'])
+    return True
+
+
+def run_pending(batch_size=None):
+    """Выполняет одну порцию задач, возвращает (успешно, с ошибкой)."""
+    done = failed = 0
+    for task_row in claim(batch_size or settings.TASKS_BATCH_SIZE):
+        if execute(task_row):
+            done += 1
+        else:
+            failed += 1
+    return done, failed
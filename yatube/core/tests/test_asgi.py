@@ -0,0 +1,138 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.wsgi import get_wsgi_application
+from django.test import SimpleTestCase, override_settings
+
+from core import broker, events
+from core.asgi import ASGIApplication
+
+
+class Connection:
+    """Клиент ASGI-приложения: запрос без тела и сбор ответа."""
+
+    def __init__(self, app, path, query=b''):
+        self.messages = []
+        self.disconnected = asyncio.Event()
+        self.received = asyncio.Event()
+        self.requested = False
+        scope = {'type': 'http', 'method': 'GET', 'path': path,
+                 'query_string': query, 'headers': [], 'http_version': '1.1'}
+        self.task = asyncio.ensure_future(app(scope, self.receive, self.send))
+
+    async def receive(self):
+        if not self.requested:
+            self.requested = True
+            return {'type': 'http.request', 'body': b''}
+        await self.disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        self.messages.append(message)
+        self.received.set()
+
+    def body(self):
+        return b''.join(message.get('body', b'')
+                        for message in self.messages
+                        if message['type'] == 'http.response.body')
+
+    async def close(self):
+        self.disconnected.set()
+        await self.task
+
+
+async def wait_for(predicate, timeout=5):
+    for _ in range(int(timeout / 0.01)):
+        if predicate():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError('Условие не выполнилось')
+
+
+class ASGIApplicationTest(SimpleTestCase):
+    def setUp(self):
+        self.app = ASGIApplication(get_wsgi_application(), threads=4)
+
+    def tearDown(self):
+        self.app.executor.shutdown()
+
+    def test_regular_request_served_by_wsgi(self):
+        async def scenario():
+            connection = Connection(self.app, '/about/author/')
+            await connection.task
+            return connection
+        connection = asyncio.run(scenario())
+        self.assertEqual(connection.messages[0]['status'], 200)
+        self.assertIn('Об авторе'.encode(), connection.body())
+
+    def test_idle_connections_do_not_hold_threads(self):
+        """Тысяча ждущих клиентов обслуживается без новых потоков, и
+        событие доходит до каждого."""
+        before = threading.active_count()
+
+        async def scenario():
+            connections = [Connection(self.app, '/events/', b'feed=index')
+                           for _ in range(1000)]
+            await wait_for(lambda: events.hub.subscriber_count() == 1000)
+            threads = threading.active_count()
+            events.publish('feed:index', 'post', {'id': 1})
+            await wait_for(lambda: all(b'event: post' in c.body()
+                                       for c in connections))
+            for connection in connections:
+                await connection.close()
+            return threads, connections
+        threads, connections = asyncio.run(scenario())
+        # Прибавиться могут только потоки пула ASGIApplication.
+        self.assertLessEqual(threads, before + 4)
+        self.assertEqual(events.hub.subscriber_count(), 0)
+        self.assertIn(b'data: {"id": 1}', connections[0].body())
+        self.assertEqual(dict(connections[0].messages[0]['headers'])[
+            b'content-type'], b'text/event-stream; charset=utf-8')
+
+    def test_unknown_feed_is_404(self):
+        async def scenario():
+            connection = Connection(self.app, '/events/', b'feed=missing')
+            await connection.task
+            return connection
+        connection = asyncio.run(scenario())
+        self.assertEqual(connection.messages[0]['status'], 404)
+
+
+class BrokerTest(SimpleTestCase):
+    def test_events_pass_through_broker(self):
+        """Событие, отправленное брокеру одним процессом, доходит до
+        подписчиков другого."""
+        async def scenario():
+            server_broker = broker.Broker()
+            server = await server_broker.serve('127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            address = f'127.0.0.1:{port}'
+            listener = asyncio.ensure_future(
+                broker.listen_broker(address, reconnect_delay=0.05))
+            subscription = events.hub.subscribe(['post:7'])
+            loop = asyncio.get_event_loop()
+            # Соединение публикующего потока живёт в этом потоке.
+            publisher = ThreadPoolExecutor(1)
+            try:
+                with override_settings(EVENTS_BROKER=address):
+                    for _ in range(100):
+                        await loop.run_in_executor(
+                            publisher, events.publish, 'post:7', 'comment',
+                            {'id': 3})
+                        try:
+                            return await asyncio.wait_for(
+                                subscription.queue.get(), 0.05)
+                        except asyncio.TimeoutError:
+                            continue
+            finally:
+                events.hub.unsubscribe(subscription)
+                await loop.run_in_executor(
+                    publisher, events._publisher._close)
+                publisher.shutdown()
+                listener.cancel()
+                server_broker.close()
+                await asyncio.sleep(0.05)
+        message = asyncio.run(scenario())
+        self.assertEqual(message, {'channel': 'post:7', 'event': 'comment',
+                                   'data': {'id': 3}})
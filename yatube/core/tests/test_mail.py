@@ -0,0 +1,122 @@
+import socketserver
+import threading
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import mail as queue
+from core.models import OutgoingEmail
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Минимальный SMTP-сервер: принимает любые письма и запоминает их."""
+
+    def reply(self, line):
+        self.wfile.write(line + b'\r\n')
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply(b'220 localhost')
+        for line in self.rfile:
+            command = line[:4].upper()
+            if command == b'DATA':
+                self.reply(b'354 End data with <CR><LF>.<CR><LF>')
+                body = []
+                for data in self.rfile:
+                    if data == b'.\r\n':
+                        break
+                    body.append(data)
+                self.server.messages.append(b''.join(body))
+                self.reply(b'250 OK')
+            elif command == b'QUIT':
+                self.reply(b'221 Bye')
+                return
+            else:
+                self.reply(b'250 OK')
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.connections = 0
+        self.messages = []
+
+
+class QueuedEmailTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.smtp = SMTPStandIn()
+        threading.Thread(target=cls.smtp.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.smtp.shutdown()
+        cls.smtp.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.smtp.connections = 0
+        self.smtp.messages = []
+
+    def send(self, count):
+        with override_settings(EMAIL_BACKEND='core.mail.QueuedEmailBackend'):
+            for number in range(count):
+                mail.send_mail(f'Письмо {number}', 'Текст',
+                               'noreply@yatube.ru', [f'user{number}@ya.ru'])
+
+    def deliver(self, port):
+        with override_settings(
+                EMAIL_DELIVERY_BACKEND=(
+                    'django.core.mail.backends.smtp.EmailBackend'),
+                EMAIL_HOST='127.0.0.1', EMAIL_PORT=port):
+            call_command('sendqueuedmail', stdout=StringIO())
+
+    def test_messages_queued_then_sent_over_one_connection(self):
+        """Письма сначала попадают в очередь, а воркер отправляет их
+        одним SMTP-соединением."""
+        self.send(3)
+        self.assertEqual(OutgoingEmail.objects.pending().count(), 3)
+        self.assertEqual(self.smtp.messages, [])
+        self.deliver(self.smtp.server_address[1])
+        self.assertEqual(len(self.smtp.messages), 3)
+        self.assertEqual(self.smtp.connections, 1)
+        self.assertIn(b'user0@ya.ru', self.smtp.messages[0])
+        self.assertFalse(OutgoingEmail.objects.filter(
+            sent__isnull=True).exists())
+
+    def test_failed_delivery_retried_later(self):
+        """При недоступном SMTP письмо остаётся в очереди с задержкой."""
+        self.send(1)
+        closed = SMTPStandIn()
+        port = closed.server_address[1]
+        closed.server_close()
+        with self.assertLogs('core.mail', 'WARNING'):
+            self.deliver(port)
+        email = OutgoingEmail.objects.get()
+        self.assertIsNone(email.sent)
+        self.assertEqual(email.attempts, 1)
+        self.assertGreater(email.send_after, timezone.now())
+        self.assertFalse(OutgoingEmail.objects.pending().exists())
+
+    def test_batch_claimed_by_one_worker(self):
+        """Порцию забирает один воркер; письма упавшего воркера снова
+        доступны, когда истечёт аренда."""
+        self.send(3)
+        now = timezone.now()
+        first = queue.claim(2, now)
+        self.assertEqual(len(first), 2)
+        second = queue.claim(10, now)
+        self.assertEqual(len(second), 1)
+        self.assertEqual(queue.claim(10, now), [])
+        later = now + timedelta(seconds=settings.EMAIL_QUEUE_LEASE + 1)
+        self.assertEqual(
+            {email.pk for email in queue.claim(10, later)},
+            {email.pk for email in first + second})
@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import Client, SimpleTestCase, override_settings
+from django.utils.http import http_date
+
+from core.media import parse_range
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+CONTENT = b'0123456789' * 300
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, MEDIA_SENDFILE='',
+                   COMPRESS_MIN_SIZE=200)
+class MediaServeTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'posts'), exist_ok=True)
+        for name in ('posts/data.txt', 'posts/photo.jpg'):
+            with open(os.path.join(TEMP_MEDIA_ROOT, name), 'wb') as file:
+                file.write(CONTENT)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def get(self, path, **headers):
+        response = Client().get(f'{settings.MEDIA_URL}{path}', **headers)
+        if response.streaming:
+            body = b''.join(response.streaming_content)
+        else:
+            body = response.content
+        response.close()
+        return response, body
+
+    def test_whole_file(self):
+        """Файл отдаётся целиком, без сжатия, с Accept-Ranges и кешем."""
+        response, body = self.get('posts/data.txt',
+                                  HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, CONTENT)
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn('public', response['Cache-Control'])
+
+    def test_ranges(self):
+        """Диапазоны байтов отдаются ответом 206."""
+        response, body = self.get('posts/photo.jpg', HTTP_RANGE='bytes=5-14')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, CONTENT[5:15])
+        self.assertEqual(response['Content-Range'],
+                         f'bytes 5-14/{len(CONTENT)}')
+        self.assertEqual(response['Content-Length'], '10')
+        response, body = self.get('posts/photo.jpg', HTTP_RANGE='bytes=-4')
+        self.assertEqual(body, CONTENT[-4:])
+
+    def test_parse_range(self):
+        cases = {
+            'bytes=0-0': (0, 1),
+            'bytes=10-': (10, 20),
+            'bytes=-5': (25, 5),
+            'bytes=25-100': (25, 5),
+            'bytes=40-50': None,
+            'bytes=-0': None,
+            'bytes=1-2,4-5': None,
+            'items=1-2': None,
+            None: None,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                self.assertEqual(parse_range(header, 30), expected)
+
+    def test_front_server_headers(self):
+        """С MEDIA_SENDFILE тело пустое, файл отправляет фронт-сервер."""
+        with self.settings(MEDIA_SENDFILE='x-accel-redirect'):
+            response, body = self.get('posts/photo.jpg')
+        self.assertEqual(response['X-Accel-Redirect'],
+                         '/protected-media/posts/photo.jpg')
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(body, b'')
+        with self.settings(MEDIA_SENDFILE='x-sendfile'):
+            response, _ = self.get('posts/photo.jpg')
+        self.assertEqual(
+            response['X-Sendfile'],
+            os.path.join(TEMP_MEDIA_ROOT, 'posts', 'photo.jpg'))
+
+    def test_not_modified_and_missing(self):
+        """304 для неизменённого файла, 404 для отсутствующего и для
+        выхода за MEDIA_ROOT."""
+        mtime = os.stat(os.path.join(TEMP_MEDIA_ROOT, 'posts/photo.jpg'))
+        response, _ = self.get(
+            'posts/photo.jpg',
+            HTTP_IF_MODIFIED_SINCE=http_date(mtime.st_mtime))
+        self.assertEqual(response.status_code, 304)
+        for path in ('posts/missing.jpg', '../settings.py', 'posts'):
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path)[0].status_code, 404)
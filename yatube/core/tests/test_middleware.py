@@ -0,0 +1,41 @@
+import gzip
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.middleware import CompressionMiddleware
+
+
+@override_settings(COMPRESS_ENCODINGS=['gzip'], COMPRESS_MIN_SIZE=200)
+class CompressionMiddlewareTest(SimpleTestCase):
+    def process(self, response, accept='gzip, deflate'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept)
+        middleware = CompressionMiddleware(lambda request: response)
+        return middleware(request)
+
+    def test_html_compressed(self):
+        """Большой HTML сжимается gzip и помечается Vary."""
+        html = '<p>Пост</p>' * 200
+        response = self.process(HttpResponse(html))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content).decode(), html)
+
+    def test_small_and_media_skipped(self):
+        """Маленькие ответы и картинки не сжимаются."""
+        small = self.process(HttpResponse('ok'))
+        image = self.process(
+            HttpResponse(b'\x89PNG' * 500, content_type='image/png'))
+        refused = self.process(HttpResponse('x' * 1000), accept='gzip;q=0')
+        for response in (small, image, refused):
+            with self.subTest(response=response):
+                self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_compressed_by_chunks(self):
+        """Потоковый ответ сжимается покусочно."""
+        response = self.process(
+            StreamingHttpResponse(iter(['<head>', '<body>' * 100])))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        body = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body).decode(),
+                         '<head>' + '<body>' * 100)
@@ -0,0 +1,54 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.ratelimit import consume, parse_rate
+
+User = get_user_model()
+
+
+@override_settings(RATELIMIT_ENABLED=True,
+                   RATELIMIT_RATES={'follow': {'user': '3/m'}})
+class RateLimitTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='bot')
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.url = reverse('posts:profile_follow',
+                           kwargs={'username': self.author.username})
+
+    def test_parse_rate(self):
+        """Частота разбирается в (количество, период в секундах)."""
+        self.assertEqual(parse_rate('10/m'), (10, 60))
+        self.assertEqual(parse_rate('100/5m'), (100, 300))
+
+    def test_bucket_refills(self):
+        """Корзина пополняется со временем."""
+        self.assertEqual(consume('bucket', '1/m', now=0), 0)
+        self.assertEqual(consume('bucket', '1/m', now=1), 59)
+        self.assertEqual(consume('bucket', '1/m', now=61), 0)
+
+    def test_follow_spam_gets_429(self):
+        """После исчерпания лимита подписка отвечает 429 с Retry-After."""
+        for _ in range(3):
+            self.assertEqual(self.client.get(self.url).status_code, 302)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+
+    def test_cache_failure_skips_limit(self):
+        """Ошибка кеша не ломает запрос: лимит просто не проверяется."""
+        with mock.patch('core.ratelimit.consume',
+                        side_effect=MemoryError), \
+                self.assertLogs('core.ratelimit', 'WARNING'):
+            for _ in range(5):
+                self.assertEqual(self.client.get(self.url).status_code, 302)
@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+from django.urls import resolve
+
+from core.management.commands.importtime import parse_importtime
+from core.routing import LazyView
+from posts import views
+
+
+class LazyViewTest(SimpleTestCase):
+    def test_urlconf_does_not_import_views(self):
+        """Загрузка URLConf не импортирует модули представлений."""
+        script = (
+            'import sys, django; django.setup()\n'
+            'from django.urls import get_resolver, reverse\n'
+            'get_resolver().url_patterns\n'
+            'reverse("posts:index")\n'
+            'print(",".join(name for name in ("posts.views", "about.views", '
+            '"users.views") if name in sys.modules))\n'
+        )
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+            'DJANGO_SETTINGS_MODULE', 'yatube.settings'))
+        result = subprocess.run(
+            [sys.executable, '-c', script], cwd=settings.BASE_DIR, env=env,
+            stdout=subprocess.PIPE, universal_newlines=True, check=True)
+        self.assertEqual(result.stdout.strip(), '')
+
+    def test_resolved_view_proxies_marks(self):
+        """Адрес разрешается в ленивую обёртку, а отметки и путь берутся
+        у настоящего представления."""
+        match = resolve('/updates/')
+        self.assertIsInstance(match.func, LazyView)
+        self.assertEqual(match._func_path, 'posts.views.feed_updates')
+        self.assertIs(match.func.view, views.feed_updates)
+        self.assertIs(match.func.session_readonly, True)
+        with self.assertRaises(AttributeError):
+            match.func.no_such_mark
+
+    def test_class_based_view(self):
+        """Для класса-представления вызывается as_view с параметрами."""
+        match = resolve('/auth/login/')
+        self.assertEqual(match.func.view.view_initkwargs,
+                         {'template_name': 'users/login.html'})
+
+
+class ImportTimeTest(SimpleTestCase):
+    def test_parse(self):
+        lines = [
+            'import time: self [us] | cumulative | imported package',
+            'import time:       421 |        421 |   _io',
+            'import time:      3315 |       8106 | posts.views',
+            'что-то другое',
+        ]
+        self.assertEqual(parse_importtime(lines), [
+            ('_io', 421, 421), ('posts.views', 3315, 8106)])
@@ -0,0 +1,57 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from core.middleware import SessionMiddleware, session_readonly
+
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db',
+                   SESSION_SAVE_EVERY_REQUEST=True)
+class SessionReadonlyTest(TestCase):
+    def run_view(self, view):
+        request = RequestFactory().get('/')
+        middleware = SessionMiddleware(lambda request: view(request))
+        middleware.process_request(request)
+        middleware.process_view(request, view, (), {})
+        return middleware.process_response(request, view(request))
+
+    def test_readonly_view_does_not_save_session(self):
+        """Помеченное представление не создаёт строку в django_session."""
+        @session_readonly
+        def readonly(request):
+            request.session['seen'] = True
+            return HttpResponse()
+
+        def regular(request):
+            request.session['seen'] = True
+            return HttpResponse()
+
+        response = self.run_view(readonly)
+        self.assertEqual(Session.objects.count(), 0)
+        self.assertIn('Cookie', response['Vary'])
+        self.run_view(regular)
+        self.assertEqual(Session.objects.count(), 1)
+
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db')
+class SweepSessionsTest(TestCase):
+    def test_only_expired_sessions_removed(self):
+        """sweepsessions порциями удаляет только просроченные сессии."""
+        past = timezone.now() - timedelta(days=1)
+        future = timezone.now() + timedelta(days=1)
+        Session.objects.bulk_create(
+            [Session(session_key=f'old{i}', session_data='',
+                     expire_date=past) for i in range(5)]
+            + [Session(session_key='fresh', session_data='',
+                       expire_date=future)]
+        )
+        call_command('sweepsessions', batch_size=2, pause=0,
+                     stdout=StringIO())
+        self.assertEqual(
+            list(Session.objects.values_list('session_key', flat=True)),
+            ['fresh'])
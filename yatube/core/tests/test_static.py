@@ -0,0 +1,98 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from core.assets import purge_css
+from core.static import StaticFilesApp
+
+TEMP_STATIC_ROOT = tempfile.mkdtemp()
+
+
+class PurgeCssTest(SimpleTestCase):
+    def test_unused_rules_removed(self):
+        """Правила с неиспользуемыми классами вырезаются,
+        остальные сохраняются вместе с медиазапросами."""
+        css = (
+            ':root{--a:1}.btn{color:red}.carousel{color:blue}'
+            '.nav .active,.tooltip{margin:0}'
+            '@media (min-width:576px){.container{width:1px}.toast{x:y}}'
+            '@keyframes spin{from{opacity:0}}'
+        )
+        purged = purge_css(css, {'btn', 'nav', 'active', 'container'})
+        self.assertIn(':root{--a:1}', purged)
+        self.assertIn('.btn{color:red}', purged)
+        self.assertIn('.nav .active{margin:0}', purged)
+        self.assertIn('@media (min-width:576px){.container{width:1px}}',
+                      purged)
+        self.assertIn('@keyframes spin', purged)
+        self.assertNotIn('carousel', purged)
+        self.assertNotIn('tooltip', purged)
+        self.assertNotIn('toast', purged)
+
+
+@override_settings(
+    STATIC_ROOT=TEMP_STATIC_ROOT,
+    STATICFILES_STORAGE='core.storage.CompressedManifestStaticFilesStorage',
+)
+class StaticBuildTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(TEMP_STATIC_ROOT,
+                               'staticfiles.json')) as manifest:
+            cls.paths = json.load(manifest)['paths']
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_STATIC_ROOT, ignore_errors=True)
+
+    def request(self, path, **environ):
+        app = StaticFilesApp(lambda environ, start_response: [b'django'],
+                             root=TEMP_STATIC_ROOT, prefix='/static/')
+        result = {}
+
+        def start_response(status, headers):
+            result['status'] = status
+            result['headers'] = dict(headers)
+
+        environ.setdefault('REQUEST_METHOD', 'GET')
+        body = b''.join(app({'PATH_INFO': path, **environ}, start_response))
+        return result.get('status'), result.get('headers'), body
+
+    def test_collectstatic_builds_hashed_compressed_files(self):
+        """collectstatic кладёт хешированные файлы и их сжатые варианты,
+        а bootstrap уменьшается за счёт неиспользуемых правил."""
+        hashed = self.paths['css/bootstrap.min.css']
+        self.assertNotEqual(hashed, 'css/bootstrap.min.css')
+        path = os.path.join(TEMP_STATIC_ROOT, hashed)
+        self.assertTrue(os.path.exists(path + '.gz'))
+        source = os.path.join(settings.BASE_DIR, 'static', 'css',
+                              'bootstrap.min.css')
+        self.assertLess(os.path.getsize(path), os.path.getsize(source) / 2)
+
+    def test_hashed_file_served_precompressed(self):
+        """Хешированный файл отдаётся сжатым и кешируется навсегда."""
+        hashed = self.paths['css/bootstrap.min.css']
+        status, headers, body = self.request(
+            f'/static/{hashed}', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', headers['Cache-Control'])
+        self.assertIn(b'.navbar', gzip.decompress(body))
+        status, _, _ = self.request(
+            f'/static/{hashed}', HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_NONE_MATCH=headers['ETag'])
+        self.assertEqual(status, '304 Not Modified')
+
+    def test_unknown_path_passed_to_django(self):
+        """Неизвестные пути уходят в обёрнутое приложение."""
+        _, _, body = self.request('/static/missing.css')
+        self.assertEqual(body, b'django')
@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import Task
+from core.taskqueue import claim, enqueue, run_pending, task
+
+calls = []
+
+
+@task(name='tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task(name='tests.explode', max_attempts=2)
+def explode():
+    raise RuntimeError('boom')
+
+
+@override_settings(TASKS_ALWAYS_EAGER=False, TASKS_RETRY_DELAY=0)
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_priority_order_and_cleanup(self):
+        """Воркер выполняет задачи по приоритету и удаляет выполненные."""
+        enqueue(record, args=('low',))
+        enqueue(record, args=('high',), priority=5)
+        self.assertEqual(calls, [])
+        self.assertEqual(run_pending(), (2, 0))
+        self.assertEqual(calls, ['high', 'low'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_idempotency_key(self):
+        """Задача с тем же ключом ставится и выполняется один раз."""
+        first = enqueue(record, args=('once',), key='record:once')
+        second = enqueue(record, args=('once',), key='record:once')
+        self.assertEqual(first.pk, second.pk)
+        run_pending()
+        enqueue(record, args=('once',), key='record:once')
+        run_pending()
+        self.assertEqual(calls, ['once'])
+        self.assertEqual(Task.objects.get().status, Task.DONE)
+
+    def test_retries_then_fails(self):
+        """Упавшая задача повторяется, затем помечается невыполненной."""
+        enqueue(explode)
+        with self.assertLogs('core.taskqueue', 'ERROR'):
+            self.assertEqual(run_pending(), (0, 1))
+            self.assertEqual(Task.objects.get().status, Task.PENDING)
+            self.assertEqual(run_pending(), (0, 1))
+        failed = Task.objects.get()
+        self.assertEqual(failed.status, Task.FAILED)
+        self.assertEqual(failed.attempts, 2)
+
+    def test_expired_lease_requeued_until_attempts_used(self):
+        """Задача упавшего воркера возвращается в очередь, пока не
+        исчерпает попытки, затем помечается невыполненной."""
+        enqueue(explode)
+        expired = timezone.now() - timedelta(seconds=1)
+        self.assertEqual(len(claim(10)), 1)
+        Task.objects.update(locked_until=expired)
+        self.assertEqual(len(claim(10)), 1)
+        Task.objects.update(locked_until=expired)
+        self.assertEqual(claim(10), [])
+        failed = Task.objects.get()
+        self.assertEqual(failed.status, Task.FAILED)
+        self.assertEqual(failed.attempts, 2)
+        self.assertIsNotNone(failed.finished)
+        self.assertIn('TASKS_LEASE', failed.last_error)
+
+    def test_delayed_task_waits(self):
+        """Отложенная задача не выполняется раньше срока."""
+        enqueue(record, args=('later',), delay=60)
+        self.assertEqual(run_pending(), (0, 0))
+        Task.objects.update(run_after=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(run_pending(), (1, 0))
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_eager_mode(self):
+        """В eager-режиме задача выполняется сразу, без записи в очередь."""
+        enqueue(record, args=('now',))
+        self.assertEqual(calls, ['now'])
+        self.assertFalse(Task.objects.exists())
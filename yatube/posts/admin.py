@@ -1,22 +1,143 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.template.response import TemplateResponse
+from django.utils.text import capfirst
 
+from . import deletion
 from .models import Comment, Follow, Group, Post
 
 EMPTY_VALUE_DISPLAY = '-пусто-'
 
 
-class PostAdmin(admin.ModelAdmin):
+def bulk_action(modeladmin, request, queryset, title, counts, perform,
+                form_class=None):
+    """Массовое действие со страницей подтверждения.
+
+    Страница показывает ``counts`` ({модель: число строк}, считаются
+    через COUNT) и форму ``form_class``, если она нужна. После
+    подтверждения вызывается ``perform(cleaned_data)``; его строка
+    показывается сообщением, а админка возвращается к списку.
+    """
+    confirmed = request.POST.get('post') == 'yes'
+    form = None
+    if form_class is not None:
+        form = form_class(request.POST if confirmed else None)
+    if confirmed and (form is None or form.is_valid()):
+        message = perform(form.cleaned_data if form else {})
+        modeladmin.message_user(request, message, messages.SUCCESS)
+        return None
+    context = {
+        **modeladmin.admin_site.each_context(request),
+        'title': title,
+        'opts': modeladmin.model._meta,
+        'counts': [(model._meta.verbose_name_plural, count)
+                   for model, count in counts.items() if count],
+        'form': form,
+        'action': request.POST.get('action'),
+        # Отмеченные строки и признак «выбрать все» передаются дальше как
+        # есть: при выборе всех строк действие снова строит queryset по
+        # фильтрам из адреса, и id не перечисляются.
+        'select_across': request.POST.get('select_across') == '1',
+        'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+        'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+    }
+    request.current_app = modeladmin.admin_site.name
+    return TemplateResponse(request, 'admin/posts/bulk_action.html',
+                            context)
+
+
+def _counts_message(done):
+    return ', '.join(f'{model._meta.verbose_name_plural}: {count}'
+                     for model, count in done.items())
+
+
+class MoveToGroupForm(forms.Form):
+    group = forms.ModelChoiceField(Group.objects.all(), required=False,
+                                   label='Группа', empty_label='Без группы')
+
+
+class ChunkedDeleteMixin:
+    """Удаление из админки через posts.deletion: каскад идёт порциями в
+    коротких транзакциях, а страница подтверждения показывает только
+    число затронутых строк, не загружая их."""
+
+    def delete_view(self, request, object_id, extra_context=None):
+        # ModelAdmin.delete_view оборачивает всё в одну транзакцию, и
+        # порции deletion.delete стали бы в ней точками сохранения.
+        return self._delete_view(request, object_id, extra_context)
+
+    def delete_model(self, request, obj):
+        deletion.delete(self.model._default_manager.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        deletion.delete(queryset)
+
+    def get_deleted_objects(self, objs, request):
+        queryset = self.model._default_manager.filter(
+            pk__in=[obj.pk for obj in objs])
+        to_delete = [f'{capfirst(self.opts.verbose_name)}: {obj}'
+                     for obj in objs]
+        model_count = {}
+        perms_needed = set()
+        for model, count in deletion.summary(queryset).items():
+            if not count:
+                continue
+            model_count[model._meta.verbose_name_plural] = count
+            model_admin = self.admin_site._registry.get(model)
+            if (model_admin is not None
+                    and not model_admin.has_delete_permission(request)):
+                perms_needed.add(model._meta.verbose_name)
+        return to_delete, model_count, perms_needed, []
+
+
+class PostAdmin(ChunkedDeleteMixin, admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
     list_editable = ('group',)
     search_fields = ('text',)
-    list_filter = ('pub_date',)
+    list_filter = ('pub_date', 'group')
     empty_value_display = EMPTY_VALUE_DISPLAY
+    actions = ('move_to_group', 'delete_by_author', 'purge_comments')
+
+    def move_to_group(self, request, queryset):
+        def perform(data):
+            done = deletion.update(queryset, {'group': data['group']})
+            return f'Перенесено постов: {done[Post]}'
+        return bulk_action(self, request, queryset,
+                           'Перенести посты в группу',
+                           {Post: queryset.count()}, perform,
+                           MoveToGroupForm)
+    move_to_group.short_description = 'Перенести в группу'
+
+    def delete_by_author(self, request, queryset):
+        posts = Post.objects.filter(author__in=queryset.values('author'))
+
+        def perform(data):
+            # Список авторов фиксируется заранее: подзапрос по выбранным
+            # постам опустел бы после первой порции.
+            authors = set(queryset.values_list('author', flat=True))
+            done = deletion.delete(Post.objects.filter(author__in=authors))
+            return f'Удалено: {_counts_message(done)}'
+        return bulk_action(self, request, queryset,
+                           'Удалить все посты авторов выбранных постов',
+                           deletion.summary(posts), perform)
+    delete_by_author.short_description = 'Удалить все посты авторов'
+
+    def purge_comments(self, request, queryset):
+        comments = Comment.objects.filter(post__in=queryset)
+
+        def perform(data):
+            return f'Удалено: {_counts_message(deletion.delete(comments))}'
+        return bulk_action(self, request, queryset,
+                           'Удалить комментарии выбранных постов',
+                           {Comment: comments.count()}, perform)
+    purge_comments.short_description = 'Удалить комментарии'
 
 
 admin.site.register(Post, PostAdmin)
 
 
-class GroupAdmin(admin.ModelAdmin):
+class GroupAdmin(ChunkedDeleteMixin, admin.ModelAdmin):
     list_display = (
         'title',
         'slug',
@@ -29,7 +150,7 @@ admin.site.register(Group, GroupAdmin)
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(ChunkedDeleteMixin, admin.ModelAdmin):
     list_display = ("pk", "post", "author", "text", "created")
     search_fields = ("post",)
     list_filter = ("post",)
@@ -37,5 +158,5 @@ class CommentAdmin(admin.ModelAdmin):
 
 
 @admin.register(Follow)
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(ChunkedDeleteMixin, admin.ModelAdmin):
     list_display = ("user", "author")
@@ -0,0 +1,124 @@
+"""Асинхронные варианты лент и страницы поста для yatube.asgi.
+
+Контекст и шаблоны те же, что у представлений из views.py. Независимые
+запросы (число постов и сама страница, подписки автора) выполняются
+одновременно в пуле core.aio, шаблон рендерится там же: в нём остаются
+обращения к базе и к миниатюрам.
+"""
+import asyncio
+
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.core.paginator import Paginator
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404, render
+
+from core.aio import async_variant, cache_get, cache_set, run_cache, run_sync
+
+from . import detail, follows, groups, views
+from .cache import feed_version
+from .forms import CommentForm
+from .models import Post, User
+from .utils import prepare_posts
+
+
+async def feed_page(request, posts):
+    """Страница ленты, как у utils.pagination, но число постов и сами
+    посты страницы запрашиваются параллельно."""
+    limit = settings.PAGINATOR_LIMIT
+    try:
+        number = max(int(request.GET.get('page') or 1), 1)
+    except ValueError:
+        number = 1
+    bottom = (number - 1) * limit
+    count, rows = await asyncio.gather(
+        run_sync(posts.count),
+        run_sync(prepare_posts, posts[bottom:bottom + limit]),
+    )
+    paginator = Paginator(posts, limit)
+    paginator.count = count
+    page = paginator.get_page(number)
+    if page.number != number:
+        # Номер за последней страницей: get_page вернул последнюю.
+        rows = await run_sync(prepare_posts, page.object_list)
+    page.object_list = rows
+    return page
+
+
+async def _constant(value):
+    return value
+
+
+@async_variant(views.index)
+async def index(request):
+    # Как и cache_feed_page, кешируем одну копию страницы для анонимов.
+    key = None
+    if not request.user.is_authenticated:
+        version = await run_cache(feed_version)
+        key = f'posts:index:{version}:{request.GET.get("page", "")}'
+        content = await cache_get(key)
+        if content is not None:
+            return HttpResponse(content)
+    posts = Post.objects.select_related(
+        'author').with_viewer_flags(request.user)
+    response = await run_sync(render, request, 'posts/index.html', {
+        'page_obj': await feed_page(request, posts), 'index': views.index,
+    })
+    if key is not None:
+        await cache_set(key, response.content, 20)
+    return response
+
+
+@async_variant(views.group_posts)
+async def group_posts(request, slug):
+    group = await run_sync(groups.get_by_slug_or_404, slug)
+    posts = group.posts.select_related(
+        'author').with_viewer_flags(request.user)
+    return await run_sync(render, request, 'posts/group_list.html', {
+        'group': group, 'page_obj': await feed_page(request, posts),
+    })
+
+
+@async_variant(views.profile)
+async def profile(request, username):
+    author = await run_sync(get_object_or_404, User, username=username)
+    if request.user.is_authenticated:
+        following = run_sync(follows.is_following, request.user.pk,
+                             author.pk)
+    else:
+        following = _constant(False)
+    page, following, followers, followings = await asyncio.gather(
+        feed_page(request, author.posts.all()),
+        following,
+        run_sync(follows.follower_ids, author.pk),
+        run_sync(follows.following_ids, author.pk),
+    )
+    return await run_sync(render, request, 'posts/profile.html', {
+        'author': author, 'following': following,
+        'follower_count': len(followers),
+        'following_count': len(followings),
+        'page_obj': page,
+    })
+
+
+@async_variant(views.post_detail)
+async def post_detail(request, post_id):
+    post, comments = await run_sync(
+        detail.load, post_id, request.GET.get('page'))
+    return await run_sync(render, request, 'posts/post_detail.html', {
+        'posts': post,
+        'post': post,
+        'form': CommentForm(),
+        'comments': comments,
+    })
+
+
+@async_variant(views.follow_index)
+async def follow_index(request):
+    if not request.user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+    authors = await run_sync(follows.following_ids, request.user.pk)
+    posts = follows.followed_posts(request.user, authors)
+    return await run_sync(render, request, 'posts/follow.html', {
+        'page_obj': await feed_page(request, posts),
+    })
@@ -0,0 +1,48 @@
+import hashlib
+from functools import wraps
+
+from django.core.cache import cache
+from django.utils.cache import patch_response_headers
+from django.utils.translation import get_language
+
+from core.cache import bump_version, get_version
+
+FEED_VERSION_KEY = 'posts:feed_version'
+
+
+def feed_version():
+    return get_version(FEED_VERSION_KEY)
+
+
+def bump_feed_version():
+    """Сбрасывает кеш главной страницы: старые ключи больше не читаются."""
+    bump_version(FEED_VERSION_KEY)
+
+
+def cache_feed_page(timeout, key_prefix):
+    """Кеш страницы для анонимов с ключом, который зависит от версии ленты.
+
+    Анонимы видят одну и ту же страницу, и она кешируется одной копией.
+    Вошедшему пользователю страница рендерится каждый раз: в ней его имя и
+    кнопки подписки, а копия на каждого почти не давала бы попаданий.
+    Общие для всех карточки постов кешируются отдельно (posts.cards), и
+    кнопка подписки вставляется в них при выводе.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if (request.method not in ('GET', 'HEAD')
+                    or request.user.is_authenticated):
+                return view_func(request, *args, **kwargs)
+            path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+            key = f'{key_prefix}:{feed_version()}:{get_language()}:{path}'
+            response = cache.get(key)
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+                if (response.status_code == 200 and not response.streaming
+                        and not response.cookies):
+                    patch_response_headers(response, timeout)
+                    cache.set(key, response, timeout)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,62 @@
+"""Кеш HTML карточек постов в ленте.
+
+Карточка (ссылка на автора, дата, картинка, текст) рендерится один раз и
+кешируется под ключом из id поста, его ``updated_at`` и подписи автора,
+так что правка поста или смена имени автора просто дают новый ключ.
+``attach_posts`` читает карточки всей страницы одним ``cache.get_many``;
+миниатюры ищутся и шаблон рендерится только для промахов. Кнопка
+подписки зависит от зрителя и в кеш не попадает: кешированный HTML
+разрезан на части до и после неё (CardHTML).
+"""
+import hashlib
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
+
+from . import thumbnails
+
+# Увеличить при изменении posts/includes/card_body.html.
+TEMPLATE_VERSION = 3
+TEMPLATE_NAME = 'posts/includes/card_body.html'
+# Место кнопки подписки в card_body.html.
+FOLLOW_SLOT = '<!-- follow -->'
+
+CardHTML = namedtuple('CardHTML', 'head tail')
+
+
+def card_key(post):
+    author = post.author
+    signature = hashlib.md5(
+        f'{author.username}\n{author.get_full_name()}'.encode()).hexdigest()
+    return (f'post_card:{TEMPLATE_VERSION}:{get_language()}:{post.pk}:'
+            f'{post.updated_at.timestamp():.6f}:{signature[:12]}')
+
+
+def _render(post):
+    head, _, tail = render_to_string(
+        TEMPLATE_NAME, {'post': post}).partition(FOLLOW_SLOT)
+    return head, tail
+
+
+def attach_posts(posts):
+    """Подставляет в ``post.card`` HTML карточек (CardHTML) и возвращает
+    список постов."""
+    posts = list(posts)
+    keys = {card_key(post): post for post in posts}
+    found = cache.get_many(list(keys))
+    missing = [post for key, post in keys.items() if key not in found]
+    if missing:
+        # Миниатюры sorl нужны только картинкам без сохранённых размеров.
+        thumbnails.attach_posts(
+            [post for post in missing if post.image and not post.image_width])
+        rendered = {card_key(post): _render(post) for post in missing}
+        cache.set_many(rendered, settings.POST_CARD_CACHE_TIMEOUT)
+        found.update(rendered)
+    for key, post in keys.items():
+        head, tail = found[key]
+        post.card = CardHTML(mark_safe(head), mark_safe(tail))
+    return posts
@@ -0,0 +1,135 @@
+"""Удаление и массовое изменение пользователей, групп и постов порциями.
+
+``queryset.delete()`` собирает в память все связанные объекты каскада
+(посты автора, все комментарии к ним, подписки в обе стороны) и удаляет
+их одной транзакцией, которая надолго блокирует SQLite. Здесь каскад
+разложен на шаги — сначала самые дальние связи, затем сами объекты, —
+и каждый шаг идёт порциями по DELETE_CHUNK_SIZE строк в отдельной
+короткой транзакции. Сигналы моделей срабатывают как обычно, так что
+кеши и файлы картинок освобождаются по ходу удаления. Так же порциями
+идёт массовое изменение ``update`` (действия админки); оно сигналы не
+вызывает, поэтому кеш постов сбрасывается здесь.
+
+Прерванное удаление можно просто повторить: уже удалённые порции
+повторно не выбираются.
+"""
+from collections import namedtuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import detail
+from .cache import bump_feed_version
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+# Шаг каскада: строки ``queryset``; ``update`` — поля, которые нужно
+# обнулить вместо удаления (SET_NULL). Каждая модель входит в план не
+# больше одного раза.
+Step = namedtuple('Step', 'queryset update')
+
+
+def _post_steps(posts):
+    return [
+        Step(Comment.objects.filter(post__in=posts), None),
+        Step(posts, None),
+    ]
+
+
+def _user_steps(users):
+    return [
+        Step(Follow.objects.filter(Q(user__in=users) | Q(author__in=users)),
+             None),
+        Step(Comment.objects.filter(
+            Q(author__in=users) | Q(post__author__in=users)), None),
+        Step(Post.objects.filter(author__in=users), None),
+        Step(users, None),
+    ]
+
+
+def _group_steps(groups):
+    return [
+        Step(Post.objects.filter(group__in=groups), {'group': None}),
+        Step(groups, None),
+    ]
+
+
+STEPS = {
+    User: _user_steps,
+    Group: _group_steps,
+    Post: _post_steps,
+    Comment: lambda comments: [Step(comments, None)],
+    Follow: lambda follows: [Step(follows, None)],
+}
+
+
+def plan(queryset):
+    """Шаги удаления объектов ``queryset`` (модели из STEPS)."""
+    return STEPS[queryset.model](queryset)
+
+
+def summary(queryset):
+    """{модель: сколько строк удалится} для подтверждения удаления."""
+    return {step.queryset.model: step.queryset.count()
+            for step in plan(queryset) if step.update is None}
+
+
+def _run_chunk(step, pks):
+    rows = step.queryset.model.objects.filter(pk__in=pks)
+    with transaction.atomic():
+        if step.update is None:
+            rows.delete()
+        elif step.queryset.model is Post:
+            # update() обходит auto_now, а по updated_at строится ключ
+            # закешированной карточки поста (posts.cards).
+            rows.update(**step.update, updated_at=timezone.now())
+        else:
+            rows.update(**step.update)
+    if step.update is not None and step.queryset.model is Post:
+        # update() не вызывает сигналы.
+        for pk in pks:
+            detail.invalidate(pk)
+
+
+def _run(steps, chunk_size, progress):
+    chunk_size = chunk_size or settings.DELETE_CHUNK_SIZE
+    done = {}
+    for step in steps:
+        model = step.queryset.model
+        total = step.queryset.count()
+        count = last_pk = 0
+        # Порции по возрастанию pk: изменённые строки (update) остаются в
+        # выборке и не должны попасть в следующую порцию.
+        while True:
+            pks = list(step.queryset.filter(pk__gt=last_pk).order_by(
+                'pk').values_list('pk', flat=True)[:chunk_size])
+            if not pks:
+                break
+            _run_chunk(step, pks)
+            last_pk = pks[-1]
+            count += len(pks)
+            if progress is not None:
+                progress(model, count, total)
+        done[model] = count
+    if any(done.values()):
+        bump_feed_version()
+    return done
+
+
+def delete(queryset, chunk_size=None, progress=None):
+    """Удаляет объекты ``queryset`` со всем каскадом порциями.
+
+    ``progress(model, done, total)`` вызывается после каждой порции.
+    Возвращает {модель: сколько строк обработано}.
+    """
+    return _run(plan(queryset), chunk_size, progress)
+
+
+def update(queryset, fields, chunk_size=None, progress=None):
+    """Массовый ``queryset.update(**fields)`` теми же порциями, со
+    сбросом кешей изменённых постов."""
+    return _run([Step(queryset, fields)], chunk_size, progress)
@@ -0,0 +1,71 @@
+"""Загрузка страницы поста фиксированным числом запросов.
+
+Пост читается одним запросом вместе с автором, группой, числом постов
+автора и числом комментариев; страница комментариев — вторым запросом
+вместе с авторами. Оба результата кешируются под ключом с версией поста,
+которую сбрасывают изменения поста и его комментариев (posts.signals).
+Число постов автора и подписи группы могут отставать не дольше
+POST_DETAIL_CACHE_TIMEOUT секунд.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.http import Http404
+
+from core.cache import bump_version, get_version
+
+from .models import Comment, Post
+
+
+def _version_key(post_id):
+    return f'post_detail:version:{post_id}'
+
+
+def invalidate(post_id):
+    bump_version(_version_key(post_id))
+
+
+def _load_post(post_id):
+    author_posts = (
+        Post.objects.filter(author=OuterRef('author'))
+        .order_by().values('author').annotate(count=Count('pk'))
+        .values('count')
+    )
+    post = (
+        Post.objects.select_related('author', 'group')
+        .annotate(
+            comment_count=Count('comments'),
+            author_post_count=Subquery(author_posts,
+                                       output_field=IntegerField()),
+        )
+        .filter(pk=post_id).order_by().first()
+    )
+    if post is None:
+        raise Http404('Пост не найден')
+    return post
+
+
+def load(post_id, page_number=None):
+    """Возвращает (пост, страница комментариев)."""
+    prefix = f'post_detail:{post_id}:{get_version(_version_key(post_id))}'
+    timeout = settings.POST_DETAIL_CACHE_TIMEOUT
+    post = cache.get(prefix)
+    if post is None:
+        post = _load_post(post_id)
+        cache.set(prefix, post, timeout)
+    paginator = Paginator(
+        Comment.objects.filter(post_id=post_id).select_related('author')
+        .order_by('created', 'pk'),
+        settings.PAGINATOR_LIMIT,
+    )
+    # Число комментариев уже посчитано вместе с постом.
+    paginator.count = post.comment_count
+    page = paginator.get_page(page_number)
+    key = f'{prefix}:comments:{page.number}'
+    comments = cache.get(key)
+    if comments is None:
+        comments = list(page.object_list)
+        cache.set(key, comments, timeout)
+    page.object_list = comments
+    return post, page
@@ -0,0 +1,87 @@
+"""Граф подписок поверх модели Follow.
+
+Для каждого пользователя в кеше лежат два отсортированных массива id:
+на кого он подписан и кто подписан на него. Массивы хранятся компактно
+(8 байт на id) под ключом с номером версии; при изменении подписки версия
+увеличивается, и следующее чтение строит массив заново одним запросом.
+"""
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.cache import bump_version, get_version
+
+from .models import Follow, Post
+
+FOLLOWING = 'following'
+FOLLOWERS = 'followers'
+
+# Для каждого направления: (поле владельца, поле со связанными id).
+_FIELDS = {
+    FOLLOWING: ('user_id', 'author_id'),
+    FOLLOWERS: ('author_id', 'user_id'),
+}
+
+
+def _version_key(direction, user_id):
+    return f'follows:version:{direction}:{user_id}'
+
+
+def _ids(direction, user_id):
+    key = (f'follows:{direction}:{user_id}:'
+           f'{get_version(_version_key(direction, user_id))}')
+    ids = array('q')
+    data = cache.get(key)
+    if data is None:
+        owner, related = _FIELDS[direction]
+        ids.extend(
+            Follow.objects.filter(**{owner: user_id})
+            .order_by(related).values_list(related, flat=True).distinct()
+        )
+        cache.set(key, ids.tobytes(), settings.FOLLOW_CACHE_TIMEOUT)
+    else:
+        ids.frombytes(data)
+    return ids
+
+
+def following_ids(user_id):
+    """Отсортированный массив id авторов, на которых подписан user_id."""
+    return _ids(FOLLOWING, user_id)
+
+
+def follower_ids(user_id):
+    """Отсортированный массив id подписчиков user_id."""
+    return _ids(FOLLOWERS, user_id)
+
+
+def contains(ids, value):
+    """Есть ли ``value`` в отсортированном массиве ``ids``."""
+    index = bisect_left(ids, value)
+    return index < len(ids) and ids[index] == value
+
+
+def is_following(user_id, author_id):
+    return contains(following_ids(user_id), author_id)
+
+
+def following_map(user_id, author_ids):
+    """{author_id: подписан ли user_id} для страницы авторов разом."""
+    ids = following_ids(user_id)
+    return {author_id: contains(ids, author_id) for author_id in author_ids}
+
+
+def followed_posts(user, authors):
+    """Посты авторов ``authors`` (id, на которых подписан ``user``)."""
+    if len(authors) <= settings.FOLLOW_IN_LIMIT:
+        posts = Post.objects.filter(author_id__in=list(authors))
+    else:
+        posts = Post.objects.filter(author__following__user=user)
+    return posts.select_related('author')
+
+
+def invalidate(user_id, author_id):
+    """Сбрасывает кеш после изменения подписки user_id -> author_id."""
+    bump_version(_version_key(FOLLOWING, user_id))
+    bump_version(_version_key(FOLLOWERS, author_id))
@@ -0,0 +1,67 @@
+"""Справочник групп в памяти процесса.
+
+Группы меняются редко, а нужны почти на каждой странице: в адресе ленты
+группы и в подписи каждой карточки. Поэтому все строки Group загружаются
+одним запросом и держатся в памяти GROUP_CACHE_TIMEOUT секунд. Сохранение
+или удаление группы сбрасывает справочник в текущем процессе; остальные
+процессы увидят изменение, когда истечёт срок.
+"""
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+
+from .models import Group
+
+Snapshot = namedtuple('Snapshot', 'expires by_slug by_id')
+
+_lock = threading.Lock()
+_snapshot = None
+
+
+def _load():
+    global _snapshot
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.expires > time.monotonic():
+        return snapshot
+    with _lock:
+        snapshot = _snapshot
+        if snapshot is None or snapshot.expires <= time.monotonic():
+            groups = list(Group.objects.all())
+            snapshot = _snapshot = Snapshot(
+                time.monotonic() + settings.GROUP_CACHE_TIMEOUT,
+                {group.slug: group for group in groups},
+                {group.pk: group for group in groups},
+            )
+    return snapshot
+
+
+def clear():
+    global _snapshot
+    _snapshot = None
+
+
+def get_by_id(group_id):
+    return _load().by_id.get(group_id)
+
+
+def get_by_slug_or_404(slug):
+    group = _load().by_slug.get(slug)
+    if group is None:
+        # Группа могла появиться в другом процессе: проверяем базу.
+        group = get_object_or_404(Group, slug=slug)
+        clear()
+    return group
+
+
+def attach_posts(posts):
+    """Возвращает список постов с группами из справочника."""
+    posts = list(posts)
+    for post in posts:
+        if post.group_id is not None:
+            group = get_by_id(post.group_id)
+            if group is not None:
+                post.group = group
+    return posts
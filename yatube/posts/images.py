@@ -0,0 +1,107 @@
+"""Сведения о картинке поста, которые считаются один раз при загрузке.
+
+Размеры, вес файла, преобладающий цвет и крошечное превью-заглушка
+(LQIP, data URI на несколько сотен байт) хранятся в полях поста, поэтому
+шаблонам не нужно открывать исходный файл, чтобы задать размеры ``<img>``
+и фон на время загрузки картинки. Pillow импортируется при первом
+обращении, а не при старте воркера.
+"""
+import base64
+import logging
+from io import BytesIO
+
+from django.core.exceptions import SuspiciousFileOperation
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 40
+ORIENTATION_TAG = 0x0112
+TRANSPOSE = {
+    2: 'FLIP_LEFT_RIGHT', 3: 'ROTATE_180', 4: 'FLIP_TOP_BOTTOM',
+    5: 'TRANSPOSE', 6: 'ROTATE_270', 7: 'TRANSVERSE', 8: 'ROTATE_90',
+}
+# Ориентации, при которых ширина и высота меняются местами.
+ROTATED = (5, 6, 7, 8)
+
+EMPTY = {
+    'image_width': None,
+    'image_height': None,
+    'image_size': None,
+    'image_color': '',
+    'image_placeholder': '',
+}
+
+
+def describe(image):
+    """Поля поста для картинки ``image`` (FieldFile, в том числе ещё не
+    сохранённой загрузки). Файл, который не читается как картинка, даёт
+    пустые значения."""
+    from PIL import Image
+
+    if not image:
+        return dict(EMPTY)
+    try:
+        image.open('rb')
+        with Image.open(image) as source:
+            width, height = source.size
+            orientation = source.getexif().get(ORIENTATION_TAG, 1)
+            # Для JPEG декодируется сразу уменьшенная копия.
+            source.draft('RGB', (PLACEHOLDER_SIZE * 4,) * 2)
+            small = source.convert('RGB')
+        size = image.size
+    except (OSError, ValueError, SuspiciousFileOperation) as error:
+        logger.warning('Не удалось прочитать картинку %s: %s', image.name,
+                       error)
+        return dict(EMPTY)
+    finally:
+        if image._committed:
+            image.close()
+        else:
+            # Загрузку ещё сохранит само поле.
+            image.seek(0)
+    # Как и sorl (THUMBNAIL_ORIENTATION), учитываем EXIF-ориентацию.
+    if orientation in TRANSPOSE:
+        small = small.transpose(getattr(Image, TRANSPOSE[orientation]))
+        if orientation in ROTATED:
+            width, height = height, width
+    small.thumbnail((PLACEHOLDER_SIZE * 4,) * 2)
+    return {
+        'image_width': width,
+        'image_height': height,
+        'image_size': size,
+        'image_color': dominant_color(small),
+        'image_placeholder': placeholder(small),
+    }
+
+
+def dominant_color(image):
+    """Самый частый цвет палитры из восьми цветов, ``#rrggbb``."""
+    from PIL import Image
+
+    paletted = image.convert('P', palette=Image.ADAPTIVE, colors=8)
+    _, index = max(paletted.getcolors())
+    red, green, blue = paletted.getpalette()[index * 3:index * 3 + 3]
+    return f'#{red:02x}{green:02x}{blue:02x}'
+
+
+def placeholder(image):
+    """Размытое превью не больше PLACEHOLDER_SIZE точек как data URI."""
+    small = image.copy()
+    small.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    buffer = BytesIO()
+    small.save(buffer, 'JPEG', quality=PLACEHOLDER_QUALITY, optimize=True)
+    data = base64.b64encode(buffer.getvalue()).decode('ascii')
+    return f'data:image/jpeg;base64,{data}'
+
+
+def thumbnail_size(width, height, geometry, upscale=False):
+    """Размер миниатюры sorl с ``crop`` для картинки ``width``×``height``
+    и геометрии ``'960x339'``: картинка масштабируется, чтобы закрыть
+    рамку, и обрезается по ней; без ``upscale`` не увеличивается."""
+    box_width, box_height = (int(side) for side in geometry.split('x'))
+    factor = max(box_width / width, box_height / height)
+    if not upscale:
+        factor = min(factor, 1)
+    return (min(box_width, int(round(width * factor))),
+            min(box_height, int(round(height * factor))))
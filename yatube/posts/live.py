@@ -0,0 +1,137 @@
+"""Новые посты и комментарии без перезагрузки страницы.
+
+Опрос: клиент передаёт id самого свежего поста, который у него уже есть,
+и получает только более новые посты (или лишь их число). Отбор идёт по
+индексу pub_date; ETag ответа — id самого нового поста ленты и версия
+кеша лент (posts.cache), поэтому повторный опрос без изменений
+заканчивается ответом 304, а правка или удаление любого поста меняет ETag.
+
+Server-sent events: те же параметры ленты (или ``post=<id>`` для
+комментариев поста) переводятся в каналы core.events, куда после
+фиксации транзакции публикуются новые посты и комментарии.
+"""
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.db.models import Q
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+
+from core import events
+
+from . import follows, groups
+from .models import Post, User
+
+
+def feed_posts(request):
+    """Посты ленты, указанной параметрами feed, slug и username."""
+    feed = request.GET.get('feed', 'index')
+    if feed == 'index':
+        return Post.objects.all()
+    if feed == 'group':
+        return Post.objects.filter(
+            group=groups.get_by_slug_or_404(request.GET.get('slug')))
+    if feed == 'profile':
+        author = get_object_or_404(User,
+                                   username=request.GET.get('username'))
+        return Post.objects.filter(author=author)
+    if feed == 'follow':
+        if not request.user.is_authenticated:
+            raise PermissionDenied
+        return follows.followed_posts(
+            request.user, follows.following_ids(request.user.pk))
+    raise Http404(f'Неизвестная лента {feed}')
+
+
+def newest_id(posts):
+    return posts.order_by('-pub_date', '-pk').values_list(
+        'pk', flat=True).first()
+
+
+def newer_than(posts, since):
+    """Посты новее поста ``since`` (по дате публикации, затем по id)."""
+    if since is None:
+        return posts
+    since_date = Post.objects.filter(pk=since).values_list(
+        'pub_date', flat=True).first()
+    if since_date is None:
+        return posts.filter(pk__gt=since)
+    return posts.filter(
+        Q(pub_date__gt=since_date) | Q(pub_date=since_date, pk__gt=since))
+
+
+def serialize(post):
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'author': post.author.username,
+        'author_id': post.author_id,
+        'pub_date': post.pub_date.isoformat(),
+        'group': post.group.slug if post.group else None,
+        'url': reverse('posts:post_detail', args=[post.pk]),
+    }
+
+
+def updates(posts, since, count_only=False):
+    """Словарь ответа: число новых постов и не больше PAGINATOR_LIMIT
+    самых свежих из них."""
+    posts = newer_than(posts, since)
+    if count_only:
+        return {'count': posts.count()}
+    limit = settings.PAGINATOR_LIMIT
+    page = list(posts.select_related('author').order_by(
+        '-pub_date', '-pk')[:limit + 1])
+    count = len(page) if len(page) <= limit else posts.count()
+    for post in page:
+        if post.group_id is not None:
+            post.group = groups.get_by_id(post.group_id)
+    return {'count': count,
+            'posts': [serialize(post) for post in page[:limit]]}
+
+
+def event_channels(request):
+    """Каналы событий для параметров запроса (см. EVENTS_CHANNELS)."""
+    if 'post' in request.GET:
+        post = get_object_or_404(Post.objects.only('pk'),
+                                 pk=request.GET['post'])
+        return [f'post:{post.pk}']
+    feed = request.GET.get('feed', 'index')
+    if feed == 'index':
+        return ['feed:index']
+    if feed == 'group':
+        group = groups.get_by_slug_or_404(request.GET.get('slug'))
+        return [f'feed:group:{group.pk}']
+    if feed == 'profile':
+        author = get_object_or_404(User.objects.only('pk'),
+                                   username=request.GET.get('username'))
+        return [f'feed:author:{author.pk}']
+    if feed == 'follow':
+        if not request.user.is_authenticated:
+            raise PermissionDenied
+        authors = follows.following_ids(request.user.pk)
+        if len(authors) <= settings.FOLLOW_IN_LIMIT:
+            return [f'feed:author:{author_id}' for author_id in authors]
+        # Не держим на соединение тысячи каналов: слушаем общую ленту и
+        # пропускаем только посты авторов из подписок.
+        return events.Channels(['feed:index'], accept=lambda message: (
+            follows.contains(authors, message['data']['author_id'])))
+    raise Http404(f'Неизвестная лента {feed}')
+
+
+def announce_post(post):
+    data = serialize(post)
+    channels = ['feed:index', f'feed:author:{post.author_id}']
+    if post.group_id is not None:
+        channels.append(f'feed:group:{post.group_id}')
+    for channel in channels:
+        events.publish(channel, 'post', data)
+
+
+def announce_comment(comment):
+    events.publish(f'post:{comment.post_id}', 'comment', {
+        'id': comment.pk,
+        'post': comment.post_id,
+        'author': comment.author.username,
+        'text': comment.text,
+        'created': comment.created.isoformat(),
+    })
@@ -0,0 +1,59 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts import detail, images
+from posts.cache import bump_feed_version
+from posts.models import Post
+
+FIELDS = list(images.EMPTY)
+
+
+def describe(post):
+    post.set_image_meta(images.describe(post.image))
+    # bulk_update не вызывает save(), а по updated_at строится ключ
+    # закешированной карточки поста.
+    post.updated_at = timezone.now()
+    return post
+
+
+class Command(BaseCommand):
+    help = ('Заполняет размеры, вес, цвет и превью-заглушку картинок '
+            'у постов, сохранённых до появления этих полей.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Сколько картинок читать одновременно.')
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересчитать и уже заполненные посты.')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').order_by('pk')
+        if not options['all']:
+            posts = posts.filter(image_width__isnull=True)
+        posts = posts.only('pk', 'image', 'updated_at', *FIELDS)
+        last_pk = 0
+        total = 0
+        # Pillow отпускает GIL при декодировании, поэтому картинки
+        # читаются в потоках, а запись в базу идёт порциями из этого.
+        with ThreadPoolExecutor(options['workers']) as executor:
+            while True:
+                batch = list(
+                    posts.filter(pk__gt=last_pk)[:options['batch_size']])
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                described = list(executor.map(describe, batch))
+                Post.objects.bulk_update(described, FIELDS + ['updated_at'])
+                for post in described:
+                    detail.invalidate(post.pk)
+                total += len(described)
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'Обработано {total}')
+        if total:
+            bump_feed_version()
+        self.stdout.write(f'Обработано картинок: {total}')
@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import deletion
+from posts.models import Group, Post
+
+# Модель и поле, по которому в командной строке указываются объекты.
+TARGETS = {
+    'user': (get_user_model(), 'username'),
+    'group': (Group, 'slug'),
+    'post': (Post, 'pk'),
+}
+
+
+class Command(BaseCommand):
+    help = ('Удаляет пользователей (по username), группы (по slug) или '
+            'посты (по id) со всем каскадом порциями в коротких '
+            'транзакциях. Прерванное удаление можно запустить снова.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', choices=sorted(TARGETS))
+        parser.add_argument('keys', nargs='+')
+        parser.add_argument(
+            '--chunk-size', type=int, default=None,
+            help='Строк в одной транзакции (по умолчанию '
+                 'DELETE_CHUNK_SIZE).')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, сколько строк будет удалено.')
+
+    def handle(self, *args, **options):
+        model, field = TARGETS[options['target']]
+        queryset = model._default_manager.filter(
+            **{f'{field}__in': options['keys']})
+        if not queryset.exists():
+            raise CommandError('Ничего не найдено.')
+        if options['dry_run']:
+            counts = deletion.summary(queryset)
+            verb = 'Будет удалено'
+        else:
+            counts = deletion.delete(queryset, options['chunk_size'],
+                                     progress=self.progress(options))
+            verb = 'Обработано'
+        for counted_model, count in counts.items():
+            self.stdout.write(
+                f'{verb} {counted_model._meta.verbose_name_plural}: {count}')
+
+    def progress(self, options):
+        if options['verbosity'] < 2:
+            return None
+
+        def report(model, done, total):
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: {done}/{total}')
+        return report
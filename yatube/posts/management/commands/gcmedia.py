@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+
+from posts import orphans
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Удаляет картинки постов, на которые не ссылается ни один '
+            'пост, вместе с их миниатюрами и уменьшенными копиями.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--min-age', type=int, default=3600,
+            help='Не трогать файлы моложе стольких секунд: пост с только '
+                 'что загруженной картинкой может ещё не быть сохранён.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, сколько места можно освободить.')
+
+    def handle(self, *args, **options):
+        storage = orphans.image_storage()
+        upload_to = Post._meta.get_field('image').upload_to
+        keys = orphans.referenced_keys()
+        if options['verbosity'] > 1:
+            self.stdout.write(f'Картинок в базе: {len(keys)}')
+        found = orphans.scan(storage, keys, upload_to,
+                             min_age=options['min_age'])
+        removed = size = 0
+        batch = []
+        for name, file_size in found:
+            if options['verbosity'] > 1:
+                self.stdout.write(name)
+            batch.append((name, file_size))
+            if len(batch) >= options['batch_size']:
+                count, freed = self.reclaim(batch, options)
+                removed, size = removed + count, size + freed
+                batch = []
+        if batch:
+            count, freed = self.reclaim(batch, options)
+            removed, size = removed + count, size + freed
+        verb = 'Можно удалить' if options['dry_run'] else 'Удалено'
+        self.stdout.write(
+            f'{verb} картинок: {removed}, {size / 2 ** 20:.1f} МБ')
+
+    def reclaim(self, batch, options):
+        if options['dry_run']:
+            return len(batch), sum(file_size for _, file_size in batch)
+        # Пока шёл обход, на файл мог сослаться новый пост.
+        sizes = dict(batch)
+        deleted = orphans.collect(list(sizes), grace=options['min_age'])
+        return len(deleted), sum(sizes[name] for name in deleted)
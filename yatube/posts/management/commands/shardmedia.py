@@ -0,0 +1,108 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.storage import is_sharded, shard_name
+from posts import detail, orphans
+from posts.cache import bump_feed_version
+from posts.models import Post
+
+
+def move(storage, name):
+    """Переносит файл ``name`` по адресу shard_name(name) и возвращает
+    новое имя (None, если файла нет ни там, ни там).
+
+    Повторный запуск после сбоя безопасен: файл, уже перенесённый, но не
+    записанный в базу, просто находится на новом месте.
+    """
+    target = shard_name(name)
+    try:
+        source_path, target_path = storage.path(name), storage.path(target)
+    except SuspiciousFileOperation:
+        return None
+    if os.path.exists(source_path):
+        if os.path.exists(target_path):
+            # Новая загрузка с тем же именем уже попала в этот подкаталог.
+            # Хранилище поля (ContentAddressedStorage) соседних имён не
+            # выдаёт, поэтому свободное имя ищется в обычном.
+            target = FileSystemStorage(
+                location=storage.location).get_available_name(target)
+            target_path = storage.path(target)
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        os.replace(source_path, target_path)
+    elif not os.path.exists(target_path):
+        return None
+    return target
+
+
+class Command(BaseCommand):
+    help = ('Переносит картинки постов из плоского каталога в '
+            'подкаталоги (core.storage.shard_name) и обновляет пути в базе '
+            'порциями. Можно прервать и запустить снова.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--workers', type=int, default=8,
+            help='Сколько файлов переносить одновременно.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать, сколько картинок нужно перенести.')
+
+    def handle(self, *args, **options):
+        storage = Post._meta.get_field('image').storage
+        posts = Post.objects.exclude(image='').order_by('pk').only(
+            'pk', 'image', 'updated_at')
+        last_pk = 0
+        moved = missing = 0
+        with ThreadPoolExecutor(options['workers']) as executor:
+            while True:
+                batch = list(
+                    posts.filter(pk__gt=last_pk)[:options['batch_size']])
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                batch = [post for post in batch
+                         if not is_sharded(post.image.name)]
+                if options['dry_run']:
+                    moved += len(batch)
+                    continue
+                changed, lost = self.migrate(storage, executor, batch)
+                moved, missing = moved + changed, missing + lost
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'Перенесено {moved}')
+        if moved and not options['dry_run']:
+            bump_feed_version()
+        verb = 'Нужно перенести' if options['dry_run'] else 'Перенесено'
+        self.stdout.write(f'{verb} картинок: {moved}, без файла: {missing}')
+
+    def migrate(self, storage, executor, batch):
+        """Переносит файлы порции и пути в базе; возвращает (перенесено,
+        без файла)."""
+        # Одну картинку могут разделять несколько постов.
+        names = sorted({post.image.name for post in batch})
+        targets = dict(zip(names, executor.map(
+            lambda name: move(storage, name), names)))
+        changed = []
+        for post in batch:
+            target = targets[post.image.name]
+            if target is None:
+                continue
+            post.image = target
+            # bulk_update обходит auto_now, а по updated_at строится ключ
+            # закешированной карточки поста.
+            post.updated_at = timezone.now()
+            changed.append(post)
+        Post.objects.bulk_update(changed, ['image', 'updated_at'])
+        # Миниатюры и уменьшенные копии привязаны к имени файла: для
+        # старых имён их больше никто не найдёт и не удалит.
+        for name, target in targets.items():
+            if target is not None and target != name:
+                orphans.purge_derivatives(storage, name)
+        for post in changed:
+            detail.invalidate(post.pk)
+        return len(changed), len(batch) - len(changed)
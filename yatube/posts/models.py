@@ -1,6 +1,10 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from core.storage import ContentAddressedStorage
+
+from . import images
+
 User = get_user_model()
 
 
@@ -20,11 +24,45 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def with_viewer_flags(self, user):
+        """Добавляет к постам флаги для карточек ленты: подписан ли
+        ``user`` на автора (author_followed) и его ли это пост (is_own).
+
+        Оба флага считаются в том же запросе, что и сами посты.
+        """
+        if not user.is_authenticated:
+            return self.annotate(
+                author_followed=models.Value(
+                    False, output_field=models.BooleanField()),
+                is_own=models.Value(
+                    False, output_field=models.BooleanField()),
+            )
+        return self.annotate(
+            author_followed=models.Exists(Follow.objects.filter(
+                user=user, author=models.OuterRef('author'))),
+            is_own=models.Case(
+                models.When(author_id=user.pk, then=models.Value(True)),
+                default=models.Value(False),
+                output_field=models.BooleanField(),
+            ),
+        )
+
+    def image_references(self, names):
+        """Сколько постов ссылается на каждую картинку из ``names``:
+        {имя: число}, картинок без ссылок в словаре нет."""
+        return dict(
+            self.order_by().filter(image__in=names).values_list('image')
+            .annotate(references=models.Count('pk')))
+
+
 class Post(models.Model):
     text = models.TextField(verbose_name='Текст поста',
                             help_text='Это обязательное поле для заполнения')
     pub_date = models.DateTimeField('Дата публикации', db_index=True,
                                     auto_now_add=True)
+    # Версия поста для кеша карточек (posts.cards).
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
     author = models.ForeignKey(
         User,
         related_name='posts',
@@ -43,8 +81,23 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True
     )
+    # Заполняются при сохранении картинки (posts.images.describe).
+    image_width = models.PositiveIntegerField(null=True, blank=True,
+                                              editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True,
+                                               editable=False)
+    image_size = models.PositiveIntegerField(
+        'Размер картинки, байт', null=True, blank=True, editable=False)
+    image_color = models.CharField(max_length=7, blank=True, editable=False)
+    image_placeholder = models.TextField(blank=True, editable=False)
+
+    objects = PostQuerySet.as_manager()
+    # Имя картинки при загрузке из базы: по нему save() понимает, что
+    # картинку заменили, а сигнал post_save — какой файл освободился.
+    _loaded_image = None
 
     class Meta:
         ordering = ['-pub_date']
@@ -54,6 +107,26 @@ class Post(models.Model):
     def __str__(self):
         return self.text[:20]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super().from_db(db, field_names, values)
+        if 'image' in field_names:
+            post._loaded_image = values[field_names.index('image')]
+        return post
+
+    def save(self, *args, **kwargs):
+        if not self.image:
+            self.set_image_meta(images.EMPTY)
+        elif (self.image_width is None
+              or self.image.name != self._loaded_image):
+            self.set_image_meta(images.describe(self.image))
+        super().save(*args, **kwargs)
+        self._loaded_image = self.image.name
+
+    def set_image_meta(self, meta):
+        for name, value in meta.items():
+            setattr(self, name, value)
+
 
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE,
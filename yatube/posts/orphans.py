@@ -0,0 +1,170 @@
+"""Удаление картинок постов, на которые больше нет ссылок.
+
+Картинки хранятся по хешу содержимого (core.storage), и один файл могут
+разделять несколько постов, поэтому файл удаляется, только когда на него
+не ссылается ни один пост. ``release`` вызывается, когда пост удалён или
+его картинку заменили: проверка и удаление идут после фиксации
+транзакции, чтобы откат не оставил пост без файла. Всё, что пропущено
+(старые данные, упавший процесс), находит команда gcmedia.
+
+Новый пост ссылается на уже лежащий файл ещё до фиксации своей
+транзакции, поэтому проверка ссылок его не видит. ContentAddressedStorage
+при повторной загрузке обновляет mtime файла, а пропавший файл записывает
+заново; ``detach`` сначала атомарно переименовывает файл и только потом
+смотрит на mtime, так что файл, который успели взять снова, возвращается
+на место.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from functools import partial
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def image_storage():
+    from .models import Post
+
+    return Post._meta.get_field('image').storage
+
+
+def release(names):
+    """Удаляет после фиксации транзакции те картинки из ``names``, на
+    которые не осталось ссылок."""
+    names = [name for name in names if name]
+    if names:
+        transaction.on_commit(partial(collect, names))
+
+
+def collect(names, grace=None):
+    """Удаляет картинки без ссылок вместе с миниатюрами и уменьшенными
+    копиями; возвращает список удалённых. Файлы, которые загружали за
+    последние ``grace`` секунд (по умолчанию IMAGE_REUSE_GRACE), остаются
+    до gcmedia."""
+    from .models import Post
+
+    if grace is None:
+        grace = settings.IMAGE_REUSE_GRACE
+    references = Post.objects.image_references(names)
+    storage = image_storage()
+    deleted = []
+    for name in names:
+        if name not in references and detach(storage, name, grace):
+            purge(storage, name)
+            deleted.append(name)
+    return deleted
+
+
+def detach(storage, name, grace):
+    """Удаляет файл картинки, если его не загружали за последние
+    ``grace`` секунд; True, если файла больше нет."""
+    try:
+        path = storage.path(name)
+    except SuspiciousFileOperation:
+        return False
+    trash = f'{path}.{os.getpid()}.{threading.get_ident()}.deleted'
+    try:
+        os.rename(path, trash)
+    except FileNotFoundError:
+        return True
+    except OSError:
+        logger.exception('Не удалось удалить картинку %s', name)
+        return False
+    if time.time() - os.stat(trash).st_mtime < grace:
+        # Если save тем временем записал файл заново, содержимое то же.
+        os.replace(trash, path)
+        return False
+    os.remove(trash)
+    return True
+
+
+def purge(storage, name):
+    """Удаляет файл ``name``, его миниатюры sorl и уменьшенные копии
+    posts.resize."""
+    if purge_derivatives(storage, name):
+        try:
+            storage.delete(name)
+        except OSError:
+            logger.exception('Не удалось удалить картинку %s', name)
+
+
+def purge_derivatives(storage, name):
+    """Удаляет миниатюры sorl и уменьшенные копии картинки ``name``, сам
+    файл остаётся; False, если имя вне MEDIA_ROOT или удалить не вышло."""
+    from sorl.thumbnail import default
+    from sorl.thumbnail.images import ImageFile
+
+    from .resize import derivative_name
+
+    try:
+        default.kvstore.delete(ImageFile(name, storage))
+        for size in settings.RESIZE_SIZES:
+            width, height = size.split('x')
+            default_storage.delete(derivative_name(width, height, name))
+    except SuspiciousFileOperation:
+        # Имя вне MEDIA_ROOT: такого файла у нас нет.
+        return False
+    except OSError:
+        logger.exception('Не удалось удалить копии картинки %s', name)
+        return False
+    return True
+
+
+def name_key(name):
+    """64-битный ключ имени файла для сравнения множеств в gcmedia."""
+    return int.from_bytes(
+        hashlib.blake2b(name.encode(), digest_size=8).digest(), 'big')
+
+
+def referenced_keys():
+    """Отсортированный массив ключей всех картинок, на которые ссылаются
+    посты: 8 байт на картинку вместо строки в set."""
+    from .models import Post
+
+    keys = array('Q', (
+        name_key(name) for name in Post.objects.exclude(image='')
+        .order_by().values_list('image', flat=True).iterator()))
+    return array('Q', sorted(keys))
+
+
+def is_referenced(keys, name):
+    """Есть ли имя среди ``keys``. При совпадении ключей у разных имён
+    файл считается используемым, так что ошибка только оставляет лишний
+    файл и никогда не удаляет нужный."""
+    key = name_key(name)
+    index = bisect_left(keys, key)
+    return index < len(keys) and keys[index] == key
+
+
+def scan(storage, keys, prefix, min_age=0):
+    """Файлы в каталоге ``prefix`` хранилища, на которые не ссылаются
+    посты: (имя, размер). Файлы моложе ``min_age`` секунд пропускаются —
+    их пост может ещё не быть сохранён."""
+    root = storage.path(prefix)
+    deadline = time.time() - min_age
+    stack = [root]
+    while stack:
+        try:
+            entries = list(os.scandir(stack.pop()))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(entry.path)
+                continue
+            stat = entry.stat(follow_symlinks=False)
+            if stat.st_mtime > deadline:
+                continue
+            name = os.path.relpath(entry.path, storage.location).replace(
+                os.sep, '/')
+            if not is_referenced(keys, name):
+                yield name, stat.st_size
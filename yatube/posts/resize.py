@@ -0,0 +1,103 @@
+"""Картинки постов нужного размера по запросу.
+
+Шаблон получает подписанный адрес ``resize_url`` и ничего не создаёт во
+время рендеринга. Картинка уменьшается при первом запросе к адресу и
+сохраняется в MEDIA_ROOT по тому же пути, что и в адресе, поэтому дальше
+её отдаёт веб-сервер (или представление resize_image, если файл уже
+есть). Подпись не даёт заказывать произвольные размеры и пути, а
+блокировка по пути — делать одну и ту же картинку в нескольких потоках.
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.signing import Signer
+from django.utils.crypto import constant_time_compare
+
+SALT = 'posts.resize'
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def derivative_name(width, height, path):
+    return f'{settings.RESIZE_PREFIX}/{width}x{height}/{path}'
+
+
+def signature(width, height, path):
+    return Signer(salt=SALT).signature(derivative_name(width, height, path))
+
+
+def resize_url(path, size):
+    """Подписанный адрес картинки ``path`` размера ``'480x170'``."""
+    if size not in settings.RESIZE_SIZES:
+        raise ValueError(f'Размера {size} нет в RESIZE_SIZES')
+    width, height = (int(side) for side in size.split('x'))
+    name = derivative_name(width, height, path)
+    return (f'{settings.MEDIA_URL}{name}'
+            f'?s={signature(width, height, path)}')
+
+
+def is_allowed(width, height, path, sign):
+    return (f'{width}x{height}' in settings.RESIZE_SIZES
+            and constant_time_compare(sign,
+                                      signature(width, height, path)))
+
+
+@contextmanager
+def path_lock(name):
+    """Блокировка на время создания одного файла: запросы к другим
+    файлам не ждут."""
+    with _locks_guard:
+        lock, users = _locks.get(name, (None, 0))
+        if lock is None:
+            lock = threading.Lock()
+        _locks[name] = (lock, users + 1)
+    try:
+        with lock:
+            yield
+    finally:
+        with _locks_guard:
+            lock, users = _locks[name]
+            if users == 1:
+                del _locks[name]
+            else:
+                _locks[name] = (lock, users - 1)
+
+
+def render(source, target, width, height):
+    """Вписывает картинку в рамку с обрезкой по центру, как crop='center'
+    у sorl, и атомарно записывает результат."""
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as image:
+        image_format = image.format or 'JPEG'
+        image = ImageOps.exif_transpose(image)
+        if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        resized = ImageOps.fit(image, (width, height), Image.LANCZOS)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Временный файл, чтобы другой процесс не отдал недописанную картинку.
+    temporary = f'{target}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        resized.save(temporary, image_format,
+                     quality=settings.RESIZE_QUALITY)
+        os.replace(temporary, target)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def ensure(width, height, path):
+    """Путь к файлу картинки нужного размера; создаёт его при первом
+    обращении. FileNotFoundError, если исходной картинки нет."""
+    target = default_storage.path(derivative_name(width, height, path))
+    if os.path.exists(target):
+        return target
+    with path_lock(target):
+        # Пока ждали блокировку, файл мог сделать другой поток.
+        if not os.path.exists(target):
+            render(default_storage.path(path), target, width, height)
+    return target
@@ -0,0 +1,44 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import detail, follows, groups, live, orphans
+from .models import Comment, Follow, Group, Post
+
+
+@receiver([post_save, post_delete], sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    follows.invalidate(instance.user_id, instance.author_id)
+
+
+@receiver([post_save, post_delete], sender=Group)
+def group_changed(sender, **kwargs):
+    groups.clear()
+
+
+@receiver([post_save, post_delete], sender=Post)
+def post_changed(sender, instance, created=False, **kwargs):
+    detail.invalidate(instance.pk)
+    if created:
+        transaction.on_commit(partial(live.announce_post, instance))
+
+
+@receiver(post_save, sender=Post)
+def post_image_replaced(sender, instance, **kwargs):
+    # Post.save обновляет _loaded_image уже после сигнала.
+    if instance._loaded_image != instance.image.name:
+        orphans.release([instance._loaded_image])
+
+
+@receiver(post_delete, sender=Post)
+def post_image_deleted(sender, instance, **kwargs):
+    orphans.release([instance.image.name])
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def comment_changed(sender, instance, created=False, **kwargs):
+    detail.invalidate(instance.post_id)
+    if created:
+        transaction.on_commit(partial(live.announce_comment, instance))
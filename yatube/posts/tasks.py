@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.http import Http404
+
+from core.taskqueue import enqueue, task
+
+from . import detail, follows, resize
+from .cache import bump_feed_version
+from .models import Post
+
+
+@task(priority=10)
+def invalidate_feeds():
+    bump_feed_version()
+
+
+@task()
+def resize_image(post_id):
+    """Заранее делает уменьшенные копии картинки поста, чтобы первый показ
+    не ждал их создания."""
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is None or not post.image:
+        return
+    for size in (settings.POST_IMAGE_SIZE, settings.POST_IMAGE_SMALL_SIZE):
+        width, height = (int(side) for side in size.split('x'))
+        try:
+            resize.ensure(width, height, post.image.name)
+        except FileNotFoundError:
+            # Картинку успели заменить или удалить.
+            return
+
+
+@task()
+def warm_post_detail(post_id):
+    """Заново кеширует страницу поста после нового комментария."""
+    try:
+        detail.load(post_id)
+    except Http404:
+        pass
+
+
+@task()
+def warm_follows(user_id, author_id):
+    """Заново кеширует массивы подписок после изменения подписки."""
+    follows.following_ids(user_id)
+    follows.follower_ids(author_id)
+
+
+def post_saved(post):
+    enqueue(invalidate_feeds)
+    if post.image:
+        enqueue(resize_image, args=(post.pk,),
+                key=f'resize:{post.pk}:{post.image.name}')
+
+
+def comment_saved(comment):
+    enqueue(warm_post_detail, args=(comment.post_id,))
+
+
+def follow_changed(user_id, author_id):
+    enqueue(warm_follows, args=(user_id, author_id))
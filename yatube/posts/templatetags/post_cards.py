@@ -0,0 +1,16 @@
+from django import template
+
+from posts import cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_card(post):
+    """HTML карточки поста (cards.CardHTML). Лента подставляет карточки
+    всей страницы заранее (cards.attach_posts), здесь — запасной путь для
+    отдельного поста."""
+    card = getattr(post, 'card', None)
+    if card is None:
+        card = cards.attach_posts([post])[0].card
+    return card
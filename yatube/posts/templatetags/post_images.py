@@ -0,0 +1,45 @@
+from collections import namedtuple
+
+from django import template
+from django.conf import settings
+
+from posts import thumbnails
+from posts.resize import resize_url
+
+register = template.Library()
+
+PostImage = namedtuple('PostImage', 'src width height small small_width')
+
+
+def _size(size):
+    return tuple(int(side) for side in size.split('x'))
+
+
+@register.simple_tag
+def post_image(post):
+    """Картинка поста для карточки и страницы поста:
+    ``{% post_image post as image %}``; None, если картинки нет.
+
+    У картинки с сохранёнными размерами это подписанные адреса копий
+    POST_IMAGE_SIZE и POST_IMAGE_SMALL_SIZE (posts.resize), которые
+    создаются при первом запросе, а не при рендеринге. Картинку, которую
+    ещё не обработала backfillimages, выводит миниатюра sorl; для страницы
+    ленты её заранее находит thumbnails.attach_posts.
+    """
+    if not post.image:
+        return None
+    if post.image_width and post.image_height:
+        width, height = _size(settings.POST_IMAGE_SIZE)
+        small_width, _ = _size(settings.POST_IMAGE_SMALL_SIZE)
+        return PostImage(
+            resize_url(post.image.name, settings.POST_IMAGE_SIZE),
+            width, height,
+            resize_url(post.image.name, settings.POST_IMAGE_SMALL_SIZE),
+            small_width)
+    if not hasattr(post, 'thumbnail'):
+        thumbnails.attach_posts([post])
+    if post.thumbnail is None:
+        return None
+    # У миниатюры, которую sorl не смог прочитать, размера нет.
+    width, height = post.thumbnail.size or (None, None)
+    return PostImage(post.thumbnail.url, width, height, '', None)
@@ -0,0 +1,99 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.cache import feed_version
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(DELETE_CHUNK_SIZE=2)
+class AdminBulkActionsTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.old = Group.objects.create(title='Старая', slug='old',
+                                        description='Описание')
+        self.new = Group.objects.create(title='Новая', slug='new',
+                                        description='Описание')
+        self.posts = [
+            Post.objects.create(text=f'Пост {index}', author=self.author,
+                                group=self.old)
+            for index in range(5)
+        ]
+        self.reader_post = Post.objects.create(text='Пост читателя',
+                                               author=self.reader)
+        for post in self.posts[:3]:
+            Comment.objects.create(post=post, author=self.reader,
+                                   text='Комментарий')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.author, author=self.reader)
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        self.client = Client()
+        self.client.force_login(admin)
+
+    def run_action(self, url, action, selected, **data):
+        return self.client.post(url, {
+            'action': action, '_selected_action': selected, **data})
+
+    def test_move_to_group(self):
+        """Перенос в группу: подтверждение с числом постов, затем один
+        UPDATE на порцию и сброс кешей."""
+        url = reverse('admin:posts_post_changelist')
+        selected = [post.pk for post in self.posts]
+        response = self.run_action(url, 'move_to_group', selected)
+        self.assertTemplateUsed(response, 'admin/posts/bulk_action.html')
+        self.assertEqual(response.context['counts'], [('Посты', 5)])
+        self.assertEqual(Post.objects.filter(group=self.new).count(), 0)
+
+        version = feed_version()
+        with mock.patch('posts.deletion.detail.invalidate') as invalidate:
+            response = self.run_action(url, 'move_to_group', selected,
+                                       post='yes', group=self.new.pk)
+        self.assertRedirects(response, url)
+        self.assertEqual(Post.objects.filter(group=self.new).count(), 5)
+        self.assertEqual(invalidate.call_count, 5)
+        self.assertNotEqual(feed_version(), version)
+
+    def test_select_across(self):
+        """При выборе всех строк подтверждение не перечисляет их id, а
+        действие применяется ко всем строкам по фильтру списка."""
+        url = (reverse('admin:posts_post_changelist')
+               + f'?group__id__exact={self.old.pk}')
+        response = self.run_action(url, 'move_to_group',
+                                   [self.posts[0].pk], select_across='1')
+        self.assertEqual(response.context['counts'], [('Посты', 5)])
+        self.assertContains(response, 'name="_selected_action"', count=1)
+        self.assertContains(response, 'name="select_across"')
+        self.run_action(url, 'move_to_group', [self.posts[0].pk],
+                        select_across='1', post='yes', group='')
+        self.assertEqual(Post.objects.filter(group=None).count(), 6)
+
+    def test_delete_by_author(self):
+        """Все посты авторов удаляются, даже не выбранные."""
+        url = reverse('admin:posts_post_changelist')
+        response = self.run_action(url, 'delete_by_author',
+                                   [self.posts[0].pk])
+        self.assertEqual(response.context['counts'],
+                         [('comments', 3), ('Посты', 5)])
+        self.run_action(url, 'delete_by_author', [self.posts[0].pk],
+                        post='yes')
+        self.assertEqual(list(Post.objects.all()), [self.reader_post])
+
+    def test_purge_comments(self):
+        url = reverse('admin:posts_post_changelist')
+        self.run_action(url, 'purge_comments',
+                        [post.pk for post in self.posts[:2]], post='yes')
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(Post.objects.count(), 6)
+
+    def test_remove_follows(self):
+        url = reverse('admin:auth_user_changelist')
+        response = self.run_action(url, 'remove_follows', [self.author.pk])
+        self.assertEqual(response.context['counts'], [('Подписки', 2)])
+        self.run_action(url, 'remove_follows', [self.author.pk],
+                        post='yes')
+        self.assertFalse(Follow.objects.exists())
@@ -0,0 +1,99 @@
+import asyncio
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.wsgi import get_wsgi_application
+from django.test import Client, TransactionTestCase
+from django.urls import reverse
+
+from core.asgi import ASGIApplication
+from posts import groups
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+async def asgi_get(app, path, query=b'', cookie=None):
+    """GET-запрос к ASGI-приложению: (статус, заголовки, тело)."""
+    headers = [(b'host', b'testserver')]
+    if cookie:
+        headers.append((b'cookie', cookie.encode()))
+    scope = {'type': 'http', 'method': 'GET', 'path': path,
+             'query_string': query, 'headers': headers}
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+    return messages[0]['status'], dict(messages[0]['headers']), body
+
+
+class AsyncViewsTest(TransactionTestCase):
+    """Асинхронные варианты отдают те же страницы, что и WSGI."""
+
+    def setUp(self):
+        cache.clear()
+        groups.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        self.post = Post.objects.create(
+            text='Пост', author=self.author, group=self.group)
+        for number in range(12):
+            Post.objects.create(text=f'Пост {number}', author=self.author)
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='Комментарий')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.app = ASGIApplication(get_wsgi_application(), threads=2)
+
+    def tearDown(self):
+        self.app.executor.shutdown()
+
+    def fetch(self, url, cookie=None):
+        path, _, query = url.partition('?')
+        with mock.patch.object(ASGIApplication, 'wsgi') as wsgi:
+            result = asyncio.run(
+                asgi_get(self.app, path, query.encode(), cookie))
+        wsgi.assert_not_called()
+        return result
+
+    def test_pages_match_wsgi(self):
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=2',
+            reverse('posts:group_list', args=['group']),
+            reverse('posts:profile', args=['author']) + '?page=9',
+            reverse('posts:post_detail', args=[self.post.pk]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                expected = Client().get(url)
+                status, _, body = self.fetch(url)
+                self.assertEqual(status, expected.status_code)
+                self.assertEqual(body.decode(), expected.content.decode())
+
+    def test_follow_index_uses_session(self):
+        url = reverse('posts:follow_index')
+        status, headers, _ = self.fetch(url)
+        self.assertEqual(status, 302)
+        self.assertTrue(headers[b'location'].startswith(b'/auth/login/'))
+        client = Client()
+        client.force_login(self.reader)
+        cookie = (f'{settings.SESSION_COOKIE_NAME}='
+                  f'{client.cookies[settings.SESSION_COOKIE_NAME].value}')
+        status, _, body = self.fetch(url, cookie)
+        self.assertEqual(status, 200)
+        self.assertEqual(body.decode(), client.get(url).content.decode())
+
+    def test_missing_post_is_404(self):
+        status, _, _ = self.fetch(
+            reverse('posts:post_detail', args=[self.post.pk + 100]))
+        self.assertEqual(status, 404)
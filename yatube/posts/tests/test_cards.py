@@ -0,0 +1,96 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import cards
+from posts.models import Group, Post
+from posts.tests.test_images import make_image
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class CardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {number}', author=cls.author,
+                                group=cls.group, image=make_image())
+            for number in range(3)
+        ]
+        cls.url = reverse('posts:group_list', args=[cls.group.slug])
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cached_cards_not_rendered_again(self):
+        """Повторная страница собирается из кеша одним get_many, без
+        рендеринга карточек и поиска миниатюр."""
+        first = Client().get(self.url).content.decode()
+        with mock.patch.object(cache, 'get_many',
+                               wraps=cache.get_many) as get_many, \
+                mock.patch('posts.cards._render') as render, \
+                mock.patch('posts.cards.thumbnails.attach_posts') as attach:
+            second = Client().get(self.url).content.decode()
+        get_many.assert_called_once()
+        render.assert_not_called()
+        attach.assert_not_called()
+        self.assertEqual(first, second)
+        self.assertIn('Лев Толстой', second)
+
+    def test_edit_and_author_rename_change_key(self):
+        """Правка поста и смена имени автора дают новый ключ карточки."""
+        cards.attach_posts(Post.objects.all())
+        post = Post.objects.get(pk=self.posts[0].pk)
+        key = cards.card_key(post)
+        post.text = 'Новый текст'
+        post.save()
+        self.assertNotEqual(cards.card_key(post), key)
+        self.assertIn('Новый текст', Client().get(self.url).content.decode())
+
+        key = cards.card_key(post)
+        User.objects.filter(pk=self.author.pk).update(first_name='Алексей')
+        post = Post.objects.select_related('author').get(pk=post.pk)
+        self.assertNotEqual(cards.card_key(post), key)
+        self.assertIn('Алексей Толстой',
+                      Client().get(self.url).content.decode())
+
+    def test_follow_button_not_cached(self):
+        """Кнопка подписки выводится для каждого зрителя своя поверх общей
+        кешированной карточки."""
+        self.assertNotContains(Client().get(self.url), 'Подписаться')
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(self.url)
+        self.assertContains(response, 'Подписаться', count=3)
+        self.assertContains(response, 'Пост 0')
+
+    def test_backfill_changes_card(self):
+        """backfillimages пишет поля bulk_update в обход save(), но
+        закешированные карточки всё равно обновляются."""
+        color = self.posts[0].image_color
+        Post.objects.update(image_width=None, image_height=None,
+                            image_color='')
+        self.assertNotContains(Client().get(self.url), color)
+        call_command('backfillimages', stdout=StringIO())
+        self.assertContains(Client().get(self.url), color, count=3)
@@ -0,0 +1,95 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import deletion
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ChunkedDeletionTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(title='Группа', slug='group',
+                                          description='Описание')
+        self.posts = [
+            Post.objects.create(text=f'Пост {index}', author=self.author,
+                                group=self.group)
+            for index in range(5)
+        ]
+        self.reader_post = Post.objects.create(text='Пост читателя',
+                                               author=self.reader,
+                                               group=self.group)
+        for post in self.posts:
+            Comment.objects.create(post=post, author=self.reader,
+                                   text='Комментарий')
+        Comment.objects.create(post=self.reader_post, author=self.author,
+                               text='Ответ')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.author, author=self.reader)
+
+    def test_delete_user_in_chunks(self):
+        """Пользователь удаляется со всем каскадом порциями, чужие посты
+        остаются."""
+        progress = mock.Mock()
+        done = deletion.delete(User.objects.filter(pk=self.author.pk),
+                               chunk_size=2, progress=progress)
+        self.assertEqual(done, {Follow: 2, Comment: 6, Post: 5, User: 1})
+        progress.assert_any_call(Post, 2, 5)
+        progress.assert_any_call(Post, 5, 5)
+        self.assertEqual(progress.call_count, 1 + 3 + 3 + 1)
+        self.assertFalse(User.objects.filter(username='author').exists())
+        self.assertEqual(list(Post.objects.all()), [self.reader_post])
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+
+    def test_delete_group_keeps_posts(self):
+        """Посты удалённой группы остаются без группы, кеш их страниц
+        сбрасывается."""
+        updated_at = Post.objects.latest('updated_at').updated_at
+        with mock.patch('posts.deletion.detail.invalidate') as invalidate:
+            deletion.delete(Group.objects.all(), chunk_size=4)
+        self.assertEqual(invalidate.call_count, 6)
+        self.assertFalse(Group.objects.exists())
+        self.assertEqual(Post.objects.filter(group=None).count(), 6)
+        self.assertFalse(
+            Post.objects.filter(updated_at__lte=updated_at).exists())
+
+    def test_command(self):
+        """chunkdelete с --dry-run только считает строки, без него
+        удаляет и пишет прогресс."""
+        output = StringIO()
+        call_command('chunkdelete', 'user', 'author', dry_run=True,
+                     stdout=output)
+        self.assertIn('Будет удалено Посты: 5', output.getvalue())
+        self.assertTrue(User.objects.filter(username='author').exists())
+        output = StringIO()
+        call_command('chunkdelete', 'post', str(self.reader_post.pk),
+                     chunk_size=1, verbosity=2, stdout=output)
+        self.assertIn('comments: 1/1', output.getvalue())
+        self.assertFalse(Post.objects.filter(
+            pk=self.reader_post.pk).exists())
+
+    def test_admin_delete(self):
+        """Админка подтверждает удаление числом строк и удаляет через
+        posts.deletion."""
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        client = Client()
+        client.force_login(admin)
+        url = reverse('admin:auth_user_delete', args=[self.author.pk])
+        response = client.get(url)
+        self.assertEqual(dict(response.context['model_count']),
+                         {'Подписки': 2, 'comments': 6, 'Посты': 5,
+                          'пользователи': 1})
+        with mock.patch('posts.admin.deletion.delete',
+                        wraps=deletion.delete) as delete:
+            client.post(url, {'post': 'yes'})
+        delete.assert_called_once()
+        self.assertFalse(User.objects.filter(username='author').exists())
+        self.assertEqual(Comment.objects.count(), 0)
@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class PostDetailLoaderTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.post = Post.objects.create(
+            text='Пост', author=cls.author, group=cls.group)
+        Post.objects.create(text='Ещё пост', author=cls.author)
+        commenters = [User.objects.create_user(username=f'reader{number}')
+                      for number in range(12)]
+        for user in commenters:
+            Comment.objects.create(post=cls.post, author=user, text='Ок')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.url = reverse('posts:post_detail', args=[self.post.pk])
+
+    def test_fixed_number_of_queries_then_cache(self):
+        """Страница поста собирается двумя запросами, повторно — из кеша."""
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        post = response.context['post']
+        self.assertEqual(post.author_post_count, 2)
+        self.assertEqual(post.comment_count, 12)
+        self.assertEqual(len(response.context['comments']), 10)
+        self.assertContains(response, 'reader9')
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+    def test_second_comments_page(self):
+        response = self.client.get(self.url, {'page': 2})
+        self.assertEqual(
+            [comment.author.username
+             for comment in response.context['comments']],
+            ['reader10', 'reader11'])
+
+    def test_comment_and_edit_invalidate_cache(self):
+        """Новый комментарий и правка поста сразу видны на странице."""
+        self.client.get(self.url)
+        Comment.objects.create(post=self.post, author=self.author,
+                               text='Свежий комментарий')
+        response = self.client.get(self.url, {'page': 2})
+        self.assertContains(response, 'Свежий комментарий')
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        self.assertContains(self.client.get(self.url), 'Исправленный пост')
+
+    def test_missing_post_is_404(self):
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk + 100]))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,109 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import follows
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class FollowGraphTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.authors = [User.objects.create_user(username=f'author{number}')
+                       for number in range(3)]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cache_follows_subscription_changes(self):
+        """Кеш подписок обновляется при подписке и отписке."""
+        self.assertFalse(follows.is_following(
+            self.reader.pk, self.authors[0].pk))
+        Follow.objects.create(user=self.reader, author=self.authors[0])
+        self.assertTrue(follows.is_following(
+            self.reader.pk, self.authors[0].pk))
+        self.assertEqual(list(follows.follower_ids(self.authors[0].pk)),
+                         [self.reader.pk])
+        Follow.objects.filter(user=self.reader).delete()
+        self.assertFalse(follows.is_following(
+            self.reader.pk, self.authors[0].pk))
+        self.assertEqual(len(follows.follower_ids(self.authors[0].pk)), 0)
+
+    def test_repeated_lookup_served_from_cache(self):
+        """Повторная проверка подписки не обращается к базе."""
+        Follow.objects.create(user=self.reader, author=self.authors[1])
+        follows.is_following(self.reader.pk, self.authors[1].pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                follows.following_map(
+                    self.reader.pk, [author.pk for author in self.authors]),
+                {self.authors[0].pk: False, self.authors[1].pk: True,
+                 self.authors[2].pk: False})
+
+    def test_follow_list_pages(self):
+        """Страницы подписчиков и подписок показывают пользователей."""
+        for author in self.authors:
+            Follow.objects.create(user=self.reader, author=author)
+        client = Client()
+        response = client.get(
+            reverse('posts:following', args=[self.reader.username]))
+        self.assertEqual([user.username for user in response.context[
+            'page_obj']], ['author0', 'author1', 'author2'])
+        response = client.get(
+            reverse('posts:followers', args=[self.authors[2].username]))
+        self.assertContains(response, '@reader')
+        response = client.get(
+            reverse('posts:profile', args=[self.authors[2].username]))
+        self.assertEqual(response.context['follower_count'], 1)
+
+
+class FeedFollowFlagsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.authors = [User.objects.create_user(username=f'author{number}')
+                       for number in range(4)]
+        for author in cls.authors + [cls.reader]:
+            Post.objects.create(text='Пост', author=author, group=cls.group)
+        Follow.objects.create(user=cls.reader, author=cls.authors[0])
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_flags_annotated_in_feed(self):
+        """Посты ленты несут флаги подписки и авторства читателя."""
+        response = self.client.get(
+            reverse('posts:group_list', args=[self.group.slug]))
+        flags = {post.author.username: (post.author_followed, post.is_own)
+                 for post in response.context['page_obj']}
+        self.assertEqual(flags['author0'], (True, False))
+        self.assertEqual(flags['author1'], (False, False))
+        self.assertEqual(flags['reader'], (False, True))
+        self.assertContains(response, reverse(
+            'posts:profile_unfollow', args=['author0']))
+        self.assertContains(response, reverse(
+            'posts:profile_follow', args=['author1']))
+        self.assertNotContains(response, reverse(
+            'posts:profile_follow', args=['reader']))
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        """Кнопки подписки на карточках не добавляют запросов."""
+        url = reverse('posts:group_list', args=[self.group.slug])
+        self.client.get(url)
+        with self.assertNumQueries(4):
+            self.client.get(url)
+        for number in range(4, 9):
+            Post.objects.create(
+                text='Пост', group=self.group,
+                author=User.objects.create_user(username=f'author{number}'))
+        cache.clear()
+        with self.assertNumQueries(4):
+            self.client.get(url)
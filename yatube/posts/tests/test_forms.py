@@ -1,19 +1,19 @@
 import shutil
 import tempfile
 
-from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
+from core.models import Task
 from posts.forms import PostForm
 from posts.models import Group, Post
 
 User = get_user_model()
 
 
-TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
@@ -73,7 +73,8 @@ class PostCreateFormTests(TestCase):
         self.assertTrue(Post.objects.filter(
             text=self.post.text,
             group=PostCreateFormTests.group,
-            image='posts/small.gif').exists())
+            image__regex=r'^posts/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.gif$',
+        ).exists())
 
     def test_form_edit(self):
         """
@@ -105,3 +106,39 @@ class PostCreateFormTests(TestCase):
         self.assertEqual(edited_post.text, form_data['text'])
         self.assertEqual(edited_post.group, self.group)
         self.assertEqual(edited_post.author, PostCreateFormTests.author)
+
+    @override_settings(TASKS_ALWAYS_EAGER=False)
+    def test_form_create_enqueues_followup(self):
+        """Создание поста с картинкой ставит в очередь сброс кеша ленты
+        и подготовку уменьшенных копий, а не выполняет их в запросе."""
+        uploaded = SimpleUploadedFile(
+            name='queued.gif',
+            content=(b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x00'
+                     b'\x01\x00\x21\xf9\x04\x01\x0a\x00\x01\x00\x2c'
+                     b'\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02'
+                     b'\x4c\x01\x00\x3b'),
+            content_type='image/gif'
+        )
+        self.authorized_client.post(reverse('posts:post_create'), data={
+            'text': 'Пост с очередью', 'image': uploaded,
+        })
+        self.assertEqual(
+            sorted(Task.objects.values_list('name', flat=True)),
+            ['posts.tasks.invalidate_feeds',
+             'posts.tasks.resize_image'])
+
+    @override_settings(TASKS_ALWAYS_EAGER=False)
+    def test_comment_and_follow_enqueue_followup(self):
+        """Комментарий и подписка ставят в очередь прогрев кешей
+        страницы поста и графа подписок."""
+        self.authorized_client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            data={'text': 'Комментарий'})
+        reader = User.objects.create_user(username='reader')
+        client = Client()
+        client.force_login(reader)
+        client.get(reverse('posts:profile_follow',
+                           args=[self.author.username]))
+        self.assertEqual(
+            sorted(Task.objects.values_list('name', flat=True)),
+            ['posts.tasks.warm_follows', 'posts.tasks.warm_post_detail'])
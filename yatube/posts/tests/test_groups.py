@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import groups
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class GroupDirectoryTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Первая', slug='first', description='Описание')
+        cls.empty = Group.objects.create(
+            title='Вторая', slug='second', description='Описание')
+        for number in range(3):
+            cls.last = Post.objects.create(
+                text=f'Пост {number}', author=cls.user, group=cls.group)
+
+    def setUp(self):
+        groups.clear()
+        self.client = Client()
+
+    def test_directory_counts_posts_in_one_query(self):
+        """Справочник групп считает посты и дату последнего одним
+        запросом."""
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('posts:group_index'))
+            directory = {group.slug: group
+                         for group in response.context['groups']}
+        self.assertEqual(directory['first'].post_count, 3)
+        self.assertEqual(directory['first'].last_post, self.last.pub_date)
+        self.assertEqual(directory['second'].post_count, 0)
+        self.assertIsNone(directory['second'].last_post)
+
+    def test_groups_served_from_memory(self):
+        """Повторные ленты группы не читают Group из базы, а сохранение
+        группы сбрасывает справочник."""
+        url = reverse('posts:group_list', args=['first'])
+        self.client.get(url)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.context['page_obj'][0].group.title,
+                         'Первая')
+        self.group.title = 'Переименована'
+        self.group.save()
+        response = self.client.get(url)
+        self.assertContains(response, 'Переименована')
+
+    def test_unknown_group_is_404(self):
+        response = self.client.get(
+            reverse('posts:group_list', args=['missing']))
+        self.assertEqual(response.status_code, 404)
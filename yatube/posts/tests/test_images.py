@@ -0,0 +1,124 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import images
+from posts.resize import resize_url
+from posts.models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image(name='photo.png', size=(400, 200), color=(200, 30, 30)):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(),
+                              content_type='image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageMetaTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_meta_computed_on_upload(self):
+        """Размеры, вес, цвет и заглушка считаются при сохранении."""
+        upload = make_image()
+        post = Post.objects.create(text='Пост', author=self.author,
+                                   image=upload)
+        post.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_height), (400, 200))
+        self.assertEqual(post.image_size, upload.size)
+        self.assertEqual(post.image_color, '#c81e1e')
+        self.assertTrue(
+            post.image_placeholder.startswith('data:image/jpeg;base64,'))
+        self.assertLess(len(post.image_placeholder), 1000)
+
+    def test_file_not_reopened_without_new_image(self):
+        """Сохранение без новой картинки не открывает файл, замена
+        картинки пересчитывает сведения, удаление — очищает."""
+        post = Post.objects.create(text='Пост', author=self.author,
+                                   image=make_image())
+        post = Post.objects.get(pk=post.pk)
+        with mock.patch('posts.images.describe') as describe:
+            post.text = 'Новый текст'
+            post.save()
+        describe.assert_not_called()
+
+        post.image = make_image('wide.png', size=(100, 300))
+        post.save()
+        self.assertEqual((post.image_width, post.image_height), (100, 300))
+
+        post.image = ''
+        post.save()
+        post.refresh_from_db()
+        self.assertIsNone(post.image_width)
+        self.assertEqual(post.image_placeholder, '')
+
+    def test_card_renders_size_and_placeholder(self):
+        """Карточка и страница поста выводят размеры миниатюры и фон из
+        сохранённых полей."""
+        post = Post.objects.create(text='Пост', author=self.author,
+                                   image=make_image(size=(480, 100)))
+        response = Client().get(reverse('posts:index'))
+        self.assertContains(response, 'width="960" height="339"')
+        self.assertContains(response, post.image_color)
+        with mock.patch('sorl.thumbnail.templatetags.thumbnail.'
+                        'ThumbnailNode._render') as tag:
+            response = Client().get(
+                reverse('posts:post_detail', args=[post.pk]))
+        tag.assert_not_called()
+        self.assertContains(response, 'width="960" height="339"')
+        self.assertContains(response, resize_url(post.image.name, '960x339'))
+
+    def test_backfill(self):
+        """Команда заполняет посты, сохранённые без сведений."""
+        post = Post.objects.create(text='Пост', author=self.author,
+                                   image=make_image())
+        Post.objects.filter(pk=post.pk).update(
+            image_width=None, image_height=None, image_color='')
+        updated_at = Post.objects.get(pk=post.pk).updated_at
+        output = StringIO()
+        call_command('backfillimages', workers=2, stdout=output)
+        post.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_height), (400, 200))
+        self.assertEqual(post.image_color, '#c81e1e')
+        self.assertGreater(post.updated_at, updated_at)
+        self.assertIn('Обработано картинок: 1', output.getvalue())
+
+
+class ThumbnailSizeTest(TestCase):
+    def test_crop(self):
+        """Размер совпадает с миниатюрой sorl с crop."""
+        cases = [
+            ((1920, 1080, '960x339', False), (960, 339)),
+            ((400, 200, '960x339', False), (400, 200)),
+            ((400, 200, '960x339', True), (960, 339)),
+            ((2000, 300, '960x339', False), (960, 300)),
+        ]
+        for args, expected in cases:
+            with self.subTest(args=args):
+                self.assertEqual(images.thumbnail_size(*args[:3],
+                                                       upscale=args[3]),
+                                 expected)
@@ -0,0 +1,160 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts import deletion, live
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class FeedUpdatesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.old = Post.objects.create(text='Старый', author=cls.author)
+        cls.new = [
+            Post.objects.create(text=f'Новый {number}', author=cls.author,
+                                group=cls.group)
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        self.client = Client()
+        self.url = reverse('posts:feed_updates')
+
+    def test_returns_only_newer_posts(self):
+        response = self.client.get(self.url, {'since': self.old.pk})
+        data = response.json()
+        self.assertEqual(data['count'], 3)
+        self.assertEqual(data['newest'], self.new[-1].pk)
+        self.assertEqual([post['id'] for post in data['posts']],
+                         [post.pk for post in reversed(self.new)])
+        self.assertEqual(data['posts'][0]['group'], 'group')
+
+    def test_count_only_and_feed_filters(self):
+        data = self.client.get(self.url, {
+            'feed': 'group', 'slug': 'group', 'since': self.new[0].pk,
+            'count_only': 1,
+        }).json()
+        self.assertEqual(data, {'count': 2, 'newest': self.new[-1].pk})
+        data = self.client.get(self.url, {
+            'feed': 'profile', 'username': 'reader'}).json()
+        self.assertEqual(data['count'], 0)
+
+    def test_follow_feed_requires_login(self):
+        response = self.client.get(self.url, {'feed': 'follow'})
+        self.assertEqual(response.status_code, 403)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client.force_login(self.reader)
+        data = self.client.get(self.url, {
+            'feed': 'follow', 'since': self.new[1].pk}).json()
+        self.assertEqual(data['count'], 1)
+
+    @override_settings(FOLLOW_IN_LIMIT=0)
+    def test_follow_feed_over_in_limit(self):
+        """За FOLLOW_IN_LIMIT лента подписок строится через JOIN, а не
+        через author_id IN (...)."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client.force_login(self.reader)
+        data = self.client.get(self.url, {
+            'feed': 'follow', 'since': self.old.pk}).json()
+        self.assertEqual(data['count'], 3)
+
+    def test_unchanged_feed_is_not_modified(self):
+        """Повторный опрос с тем же ETag получает 304, новый пост
+        меняет ETag."""
+        params = {'since': self.new[-1].pk}
+        etag = self.client.get(self.url, params)['ETag']
+        response = self.client.get(self.url, params,
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(text='Свежий', author=self.author)
+        response = self.client.get(self.url, params,
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 1)
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_edit_or_delete_of_older_post_changes_etag(self):
+        """Правка и удаление не самого нового поста не дают устаревшего
+        ответа 304."""
+        params = {'since': self.old.pk}
+        etag = self.client.get(self.url, params)['ETag']
+        self.client.force_login(self.author)
+        self.client.post(reverse('posts:post_edit', args=[self.new[0].pk]),
+                         {'text': 'Исправлен'})
+        response = self.client.get(self.url, params,
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['posts'][-1]['text'], 'Исправлен')
+        etag = response['ETag']
+        deletion.delete(Post.objects.filter(pk=self.new[1].pk))
+        response = self.client.get(self.url, params,
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 2)
+
+
+class EventChannelsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.post = Post.objects.create(text='Пост', author=cls.author,
+                                       group=cls.group)
+
+    def channels(self, **params):
+        request = RequestFactory().get('/events/', params)
+        request.user = self.author
+        return live.event_channels(request)
+
+    def test_channels_for_feeds(self):
+        self.assertEqual(self.channels(), ['feed:index'])
+        self.assertEqual(self.channels(feed='group', slug='group'),
+                         [f'feed:group:{self.group.pk}'])
+        self.assertEqual(self.channels(feed='profile', username='author'),
+                         [f'feed:author:{self.author.pk}'])
+        self.assertEqual(self.channels(post=self.post.pk),
+                         [f'post:{self.post.pk}'])
+
+    @override_settings(FOLLOW_IN_LIMIT=1)
+    def test_follow_channels_over_in_limit(self):
+        """За FOLLOW_IN_LIMIT подписка идёт на общую ленту с фильтром по
+        авторам вместо канала на каждого автора."""
+        other = User.objects.create_user(username='other')
+        stranger = User.objects.create_user(username='stranger')
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=self.author)
+        request = RequestFactory().get('/events/', {'feed': 'follow'})
+        request.user = reader
+        self.assertEqual(live.event_channels(request),
+                         [f'feed:author:{self.author.pk}'])
+        Follow.objects.create(user=reader, author=other)
+        channels = live.event_channels(request)
+        self.assertEqual(channels, ['feed:index'])
+        posts = [Post.objects.create(text='Пост', author=author)
+                 for author in (self.author, other, stranger)]
+        self.assertEqual(
+            [channels.accept({'channel': 'feed:index', 'event': 'post',
+                              'data': live.serialize(post)})
+             for post in posts],
+            [True, True, False])
+
+    def test_announcements_go_to_matching_channels(self):
+        with mock.patch('core.events.publish') as publish:
+            live.announce_post(self.post)
+            live.announce_comment(Comment.objects.create(
+                post=self.post, author=self.author, text='Ок'))
+        self.assertEqual(
+            [call[0][:2] for call in publish.call_args_list],
+            [('feed:index', 'post'),
+             (f'feed:author:{self.author.pk}', 'post'),
+             (f'feed:group:{self.group.pk}', 'post'),
+             (f'post:{self.post.pk}', 'comment')])
@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+
+from posts import orphans, resize
+from posts.models import Post
+from posts.tests.test_images import make_image
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, IMAGE_REUSE_GRACE=0)
+class OrphanedMediaTest(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+
+    def create(self, color=(200, 30, 30)):
+        return Post.objects.create(text='Пост', author=self.author,
+                                   image=make_image(color=color))
+
+    def test_replaced_and_deleted_images_removed(self):
+        """Заменённая картинка удаляется вместе с миниатюрой и уменьшенной
+        копией, общая с другим постом — только когда исчезнет последний."""
+        from sorl.thumbnail import get_thumbnail
+
+        post = self.create()
+        old_path = post.image.path
+        thumbnail = get_thumbnail(post.image, '100x100')
+        derivative = resize.ensure(480, 170, post.image.name)
+        self.assertTrue(thumbnail.exists())
+        post.image = make_image(color=(0, 0, 255))
+        post.save()
+        for path in (old_path, derivative,
+                     os.path.join(TEMP_MEDIA_ROOT, thumbnail.name)):
+            self.assertFalse(os.path.exists(path), path)
+
+        other = self.create(color=(0, 0, 255))
+        self.assertEqual(other.image.name, post.image.name)
+        post.delete()
+        self.assertTrue(os.path.exists(other.image.path))
+        self.author.delete()
+        self.assertFalse(os.path.exists(other.image.path))
+
+    def test_gcmedia(self):
+        """gcmedia находит файлы без ссылок, --dry-run только считает,
+        свежие файлы не трогаются."""
+        post = self.create()
+        orphan = self.create(color=(0, 255, 0))
+        orphan_path = orphan.image.path
+        # Удаление в обход сигналов, как у данных из старых версий.
+        Post.objects.filter(pk=orphan.pk).update(image='')
+
+        output = StringIO()
+        call_command('gcmedia', min_age=0, dry_run=True, stdout=output)
+        self.assertIn('Можно удалить картинок: 1', output.getvalue())
+        self.assertTrue(os.path.exists(orphan_path))
+
+        output = StringIO()
+        call_command('gcmedia', stdout=output)
+        self.assertIn('Удалено картинок: 0', output.getvalue())
+
+        output = StringIO()
+        call_command('gcmedia', min_age=0, batch_size=1, stdout=output)
+        self.assertIn('Удалено картинок: 1', output.getvalue())
+        self.assertFalse(os.path.exists(orphan_path))
+        self.assertTrue(os.path.exists(post.image.path))
+
+    def test_referenced_keys(self):
+        post = self.create()
+        keys = orphans.referenced_keys()
+        self.assertTrue(orphans.is_referenced(keys, post.image.name))
+        self.assertFalse(orphans.is_referenced(keys, 'posts/other.png'))
+
+    @override_settings(IMAGE_REUSE_GRACE=60)
+    def test_reuploaded_image_kept(self):
+        """Файл, который снова загрузили для ещё не сохранённого поста,
+        не удаляется вслед за старым постом; gcmedia уберёт его позже."""
+        post = self.create()
+        name, path = post.image.name, post.image.path
+        hour_ago = time.time() - 3600
+        os.utime(path, (hour_ago, hour_ago))
+        storage = orphans.image_storage()
+        self.assertEqual(storage.save('posts/photo.png', make_image()), name)
+        post.delete()
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(orphans.collect([name]), [])
+        os.utime(path, (hour_ago, hour_ago))
+        self.assertEqual(orphans.collect([name]), [name])
+        self.assertFalse(os.path.exists(path))
+
+    def test_save_keeps_content_name(self):
+        """Пропавший файл записывается заново, а файл, который другой
+        процесс записал одновременно, не получает соседнего имени."""
+        storage = orphans.image_storage()
+        name = storage.save('posts/photo.png', make_image())
+        path = storage.path(name)
+        os.remove(path)
+        self.assertEqual(storage.save('posts/photo.png', make_image()), name)
+        self.assertTrue(os.path.exists(path))
+        with mock.patch('core.storage.os.utime',
+                        side_effect=FileNotFoundError):
+            self.assertEqual(storage.save('posts/copy.png', make_image()),
+                             name)
+        self.assertEqual(os.listdir(os.path.dirname(path)),
+                         [os.path.basename(path)])
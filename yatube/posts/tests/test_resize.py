@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import resize
+from posts.models import Post
+from posts.tests.test_images import make_image
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ResizeEndpointTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(
+            text='Пост', author=cls.author,
+            image=make_image(size=(1200, 800)))
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        shutil.rmtree(os.path.join(TEMP_MEDIA_ROOT, settings.RESIZE_PREFIX),
+                      ignore_errors=True)
+        self.url = resize.resize_url(self.post.image.name, '480x170')
+
+    def test_generated_once_and_cached(self):
+        """Первый запрос создаёт картинку на диске, повторный отдаёт
+        готовый файл с долгим кешированием."""
+        response = Client().get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('public', response['Cache-Control'])
+        target = os.path.join(
+            TEMP_MEDIA_ROOT,
+            resize.derivative_name(480, 170, self.post.image.name))
+        with Image.open(target) as image:
+            self.assertEqual(image.size, (480, 170))
+        response.close()
+        with mock.patch('posts.resize.render') as render:
+            response = Client().get(self.url)
+            b''.join(response.streaming_content)
+            response.close()
+        render.assert_not_called()
+
+    def test_signature_and_allowlist(self):
+        """Без подписи, с чужой подписью и для размера не из RESIZE_SIZES
+        ответ 404."""
+        path = self.post.image.name
+        bad = [
+            self.url.split('?')[0],
+            self.url.replace('480x170', '960x339'),
+            reverse('posts:resize_image', args=[100, 100, path])
+            + f'?s={resize.signature(100, 100, path)}',
+        ]
+        for url in bad:
+            with self.subTest(url=url):
+                self.assertEqual(Client().get(url).status_code, 404)
+        with self.assertRaises(ValueError):
+            resize.resize_url(path, '100x100')
+
+    def test_concurrent_requests_resize_once(self):
+        """Одновременные запросы к одной картинке уменьшают её один раз."""
+        calls = []
+        original = resize.render
+
+        def slow_render(*args):
+            calls.append(threading.get_ident())
+            time.sleep(0.05)
+            original(*args)
+
+        with mock.patch('posts.resize.render', slow_render):
+            with ThreadPoolExecutor(8) as executor:
+                targets = set(executor.map(
+                    lambda _: resize.ensure(480, 170, self.post.image.name),
+                    range(8)))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(targets), 1)
+        self.assertEqual(resize._locks, {})
+
+    def test_card_srcset(self):
+        """Карточка предлагает уменьшенную картинку через srcset."""
+        response = Client().get(reverse('posts:index'))
+        self.assertContains(response, f'srcset="{self.url} 480w')
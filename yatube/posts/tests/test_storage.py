@@ -0,0 +1,141 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.storage import is_sharded, shard_name
+from posts import resize
+from posts.models import Post
+from posts.tests.test_images import make_image
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ShardedMediaTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def flat_post(self, name):
+        """Пост с картинкой в старом плоском каталоге posts/."""
+        path = os.path.join(TEMP_MEDIA_ROOT, 'posts', name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(make_image().read())
+        post = Post.objects.create(text='Пост', author=self.author,
+                                   image=f'posts/{name}')
+        return post, path
+
+    def test_new_uploads_sharded(self):
+        """Новые картинки называются по sha256 содержимого и
+        раскладываются по двум уровням подкаталогов, upload_to остаётся
+        прежним."""
+        upload = make_image('Photo.PNG')
+        digest = hashlib.sha256(upload.read()).hexdigest()
+        post = Post.objects.create(text='Пост', author=self.author,
+                                   image=upload)
+        self.assertEqual(post.image.name,
+                         f'posts/{digest[:2]}/{digest[2:4]}/{digest}.png')
+        self.assertTrue(os.path.exists(post.image.path))
+        self.assertEqual(Post._meta.get_field('image').upload_to, 'posts/')
+
+    def test_identical_uploads_share_file(self):
+        """Повторная загрузка той же картинки не создаёт новый файл, а
+        ссылки на него считаются по постам."""
+        first = Post.objects.create(text='Пост', author=self.author,
+                                    image=make_image('first.png'))
+        with mock.patch.object(FileSystemStorage, '_save') as save:
+            second = Post.objects.create(text='Пост', author=self.author,
+                                         image=make_image('second.png'))
+        save.assert_not_called()
+        other = Post.objects.create(
+            text='Пост', author=self.author,
+            image=make_image(color=(0, 0, 255)))
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertNotEqual(first.image.name, other.image.name)
+        self.assertEqual(
+            len(os.listdir(os.path.dirname(first.image.path))), 1)
+        self.assertEqual(
+            Post.objects.image_references(
+                [first.image.name, other.image.name, 'posts/none.png']),
+            {first.image.name: 2, other.image.name: 1})
+
+    def test_shardmedia_moves_and_resumes(self):
+        """Команда переносит файлы и пути, повторный запуск ничего не
+        ломает, в том числе после сбоя между переносом и записью в базу."""
+        first, first_path = self.flat_post('first.png')
+        second, second_path = self.flat_post('second.png')
+        # Сбой прошлого запуска: файл уже перенесён, в базе старый путь.
+        target = os.path.join(TEMP_MEDIA_ROOT, shard_name(second.image.name))
+        os.makedirs(os.path.dirname(target))
+        os.replace(second_path, target)
+
+        output = StringIO()
+        call_command('shardmedia', dry_run=True, stdout=output)
+        self.assertIn('Нужно перенести картинок: 2', output.getvalue())
+        self.assertTrue(os.path.exists(first_path))
+
+        call_command('shardmedia', workers=2, batch_size=1,
+                     stdout=StringIO())
+        for post, name in ((first, 'posts/first.png'),
+                           (second, 'posts/second.png')):
+            updated_at = post.updated_at
+            post.refresh_from_db()
+            self.assertGreater(post.updated_at, updated_at)
+            self.assertEqual(post.image.name, shard_name(name))
+            self.assertTrue(is_sharded(post.image.name))
+            self.assertTrue(os.path.exists(post.image.path))
+        self.assertFalse(os.path.exists(first_path))
+
+        output = StringIO()
+        call_command('shardmedia', stdout=output)
+        self.assertIn('Перенесено картинок: 0', output.getvalue())
+
+    def test_shardmedia_target_taken(self):
+        """Если в подкаталоге уже лежит другой файл с тем же именем,
+        картинка переносится под соседним именем."""
+        post, path = self.flat_post('taken.png')
+        target = os.path.join(TEMP_MEDIA_ROOT, shard_name(post.image.name))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as file:
+            file.write(b'other')
+        call_command('shardmedia', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertNotEqual(post.image.name, shard_name('posts/taken.png'))
+        self.assertTrue(is_sharded(post.image.name))
+        self.assertTrue(os.path.exists(post.image.path))
+        self.assertFalse(os.path.exists(path))
+        with open(target, 'rb') as file:
+            self.assertEqual(file.read(), b'other')
+
+    def test_shardmedia_purges_old_derivatives(self):
+        """Миниатюры и уменьшенные копии старого имени удаляются вместе с
+        записями sorl."""
+        from sorl.thumbnail import default, get_thumbnail
+        from sorl.thumbnail.images import ImageFile
+
+        post, _ = self.flat_post('derived.png')
+        thumbnail = get_thumbnail(post.image, '100x100')
+        derivative = resize.ensure(480, 170, post.image.name)
+        call_command('shardmedia', stdout=StringIO())
+        self.assertFalse(
+            os.path.exists(os.path.join(TEMP_MEDIA_ROOT, thumbnail.name)))
+        self.assertFalse(os.path.exists(derivative))
+        self.assertIsNone(default.kvstore.get(
+            ImageFile('posts/derived.png', post.image.storage)))
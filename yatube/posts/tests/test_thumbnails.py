@@ -0,0 +1,94 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from sorl.thumbnail import get_thumbnail
+
+from posts import thumbnails
+from posts.models import Post
+from posts.resize import resize_url
+from posts.tests.test_images import make_image
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PageThumbnailsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        for number in range(3):
+            Post.objects.create(text=f'Пост {number}', author=cls.author,
+                                image=make_image(f'photo{number}.png'))
+        Post.objects.create(text='Без картинки', author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def posts(self):
+        return list(Post.objects.order_by('pk'))
+
+    def test_same_thumbnails_as_sorl(self):
+        """Миниатюры совпадают с теми, что выдаёт тег sorl, у поста без
+        картинки — None."""
+        posts = thumbnails.attach_posts(self.posts())
+        geometry, options = thumbnails.card_thumbnail()
+        for post in posts[:3]:
+            expected = get_thumbnail(post.image, geometry, **options)
+            self.assertEqual(post.thumbnail.url, expected.url)
+            self.assertEqual(post.thumbnail.size, expected.size)
+        self.assertIsNone(posts[3].thumbnail)
+
+    def test_one_round_trip_per_page(self):
+        """Готовые миниатюры страницы читаются одним get_many, а после
+        сброса кеша — одним запросом к базе."""
+        thumbnails.attach_posts(self.posts())
+        posts = self.posts()
+        with mock.patch.object(cache, 'get_many',
+                               wraps=cache.get_many) as get_many:
+            with self.assertNumQueries(0):
+                thumbnails.attach_posts(posts)
+        get_many.assert_called_once()
+        self.assertEqual(len(get_many.call_args[0][0]), 3)
+
+        cache.clear()
+        with self.assertNumQueries(1):
+            thumbnails.attach_posts(posts)
+
+    def test_card_uses_prefetched_thumbnail(self):
+        """Карточки картинок, которые не обработала backfillimages,
+        выводят миниатюры из общего поиска."""
+        Post.objects.update(image_width=None, image_height=None)
+        posts = thumbnails.attach_posts(self.posts())
+        with mock.patch('sorl.thumbnail.templatetags.thumbnail.'
+                        'ThumbnailNode._render') as tag:
+            response = Client().get(reverse('posts:index'))
+        tag.assert_not_called()
+        for post in posts[:3]:
+            self.assertContains(response, post.thumbnail.url)
+
+    def test_backfilled_images_skip_sorl(self):
+        """Картинки с сохранёнными размерами выводятся уменьшенными
+        копиями размеров из настроек, без миниатюр sorl."""
+        with mock.patch('posts.thumbnails._generate') as generate, \
+                mock.patch('posts.thumbnails._read_many') as read_many:
+            response = Client().get(reverse('posts:index'))
+        generate.assert_not_called()
+        read_many.assert_not_called()
+        for post in self.posts()[:3]:
+            self.assertContains(
+                response, resize_url(post.image.name, '960x339'))
+            self.assertContains(
+                response, resize_url(post.image.name, '480x170') + ' 480w')
@@ -12,7 +12,7 @@ from django.urls import reverse
 from posts.models import Comment, Follow, Group, Post
 
 User = get_user_model()
-TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
@@ -21,7 +21,6 @@ class PostViewsTests(TestCase):
     def setUpClass(cls):
         cache.clear()
         super().setUpClass()
-        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
         cls.group = Group.objects.create(
             title='Тестовый заголовок',
             slug='test_slug',
@@ -59,6 +58,11 @@ class PostViewsTests(TestCase):
             author=cls.user,
         )
 
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
     def setUp(self):
         cache.clear()
         self.user = PostViewsTests.user
@@ -79,18 +83,46 @@ class PostViewsTests(TestCase):
                     'page_obj'][0].image, self.post.image.name)
 
     def test_cache_in_index_page(self):
-        """Проверяем кеширование на главной странице"""
-        before_cache = self.authorized_client.get(
-            reverse('posts:index')).content
+        """Проверяем кеширование на главной странице (для анонимов)"""
+        guest_client = Client()
+        before_cache = guest_client.get(reverse('posts:index')).content
         Post.objects.all().delete()
-        after_cache = self.authorized_client.get(
-            reverse('posts:index')).content
+        after_cache = guest_client.get(reverse('posts:index')).content
         self.assertEqual(before_cache, after_cache)
         cache.clear()
-        after_cache = self.authorized_client.get(
-            reverse('posts:index')).content
+        after_cache = guest_client.get(reverse('posts:index')).content
         self.assertNotEqual(before_cache, after_cache)
 
+    def test_index_cache_per_user(self):
+        """Закешированная главная одного пользователя не достаётся другому
+        и анониму: кнопки подписки у каждого свои и сразу отражают
+        изменения подписки."""
+        alice = User.objects.create_user(username='alice')
+        bob = User.objects.create_user(username='bob')
+        Follow.objects.create(user=alice, author=self.user)
+        clients = {}
+        for user in (alice, bob):
+            clients[user] = Client()
+            clients[user].force_login(user)
+        url = reverse('posts:index')
+        self.assertContains(clients[alice].get(url), 'Отписаться')
+        response = clients[bob].get(url)
+        self.assertNotContains(response, 'Отписаться')
+        self.assertContains(response, 'Подписаться')
+        response = Client().get(url)
+        self.assertNotContains(response, 'Отписаться')
+        self.assertNotContains(response, 'Подписаться')
+        Follow.objects.filter(user=alice).delete()
+        self.assertNotContains(clients[alice].get(url), 'Отписаться')
+
+    def test_index_cached_once_for_anonymous(self):
+        """Анонимам главная отдаётся из одной общей копии."""
+        url = reverse('posts:index')
+        first = Client().get(url)
+        with self.assertNumQueries(0):
+            second = Client().get(url)
+        self.assertEqual(first.content, second.content)
+
     def test_views_correct_template(self):
         """Проверяем соответствие view-функций адресам."""
         templates_names = {
@@ -261,9 +293,7 @@ class FollowingTest(TestCase):
 
 
 class PaginatorViewsTest(TestCase):
-    @classmethod
     def setUp(self):
-        super().setUpClass()
         self.user = User.objects.create_user(username='SomeName')
         self.group = Group.objects.create(
             title='Тестовый заголовок',
@@ -289,3 +319,46 @@ class PaginatorViewsTest(TestCase):
         self.assertEqual(len(self.client.get(reverse(
             'posts:index') + '?page=2').context[
                 'page_obj']), settings.PAGINATOR_LIMIT)
+
+
+class StreamingFeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='SomeName')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        Post.objects.create(text='Тестовый пост', author=cls.user,
+                            group=cls.group)
+
+    def test_streamed_feed_matches_regular_render(self):
+        """Потоковая лента отдаёт тот же HTML, что и обычная,
+        а шапка страницы уходит отдельным первым куском."""
+        urls = (
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+        for path in urls:
+            with self.subTest(path=path):
+                regular = self.client.get(path)
+                with override_settings(STREAMING_FEEDS=True):
+                    streamed = self.client.get(path)
+                self.assertTrue(streamed.streaming)
+                chunks = list(streamed.streaming_content)
+                self.assertGreater(len(chunks), 1)
+                self.assertIn(b'</head>', chunks[0])
+                self.assertNotIn('Тестовый пост'.encode(), chunks[0])
+                self.assertEqual(b''.join(chunks), regular.content)
+
+    @override_settings(STREAMING_FEEDS=True)
+    def test_streamed_feed_sets_csrf_cookie(self):
+        """Новый посетитель потоковой ленты получает cookie csrftoken,
+        хотя {% csrf_token %} рендерится уже после заголовков."""
+        path = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        response = Client().get(path)
+        self.assertTrue(response.streaming)
+        self.assertIn(settings.CSRF_COOKIE_NAME, response.cookies)
+        self.assertIn('Cookie', response['Vary'])
@@ -0,0 +1,107 @@
+"""Миниатюры картинок для целой страницы ленты.
+
+Тег ``{% thumbnail %}`` на каждую картинку отдельно обращается к
+хранилищу sorl (кеш, при промахе — база). ``attach_posts`` вычисляет
+имена миниатюр всех постов страницы так же, как sorl, и читает их записи
+одним ``cache.get_many``; промахи ищутся в базе одним запросом, а то, чего
+нет и там, создаётся через sorl одним проходом. Готовая миниатюра
+кладётся в ``post.thumbnail``, и карточка выводит её без тега.
+
+Миниатюры нужны только картинкам, которые ещё не обработала
+backfillimages: у остальных есть сохранённые размеры, и шаблоны выводят
+уменьшенные копии posts.resize.
+"""
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def card_thumbnail():
+    """Геометрия и параметры миниатюры картинки поста."""
+    geometry, options = settings.POST_THUMBNAIL
+    return geometry, dict(options)
+
+
+def _thumbnail_name(source, geometry, options):
+    """Имя файла миниатюры, как его вычисляет sorl в get_thumbnail."""
+    from sorl.thumbnail import default
+    from sorl.thumbnail.conf import defaults as default_settings
+    from sorl.thumbnail.conf import settings as sorl_settings
+
+    backend = default.backend
+    options = dict(options)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    return backend._get_thumbnail_filename(source, geometry, options)
+
+
+def _read_many(kvstore, keys):
+    """Сырые записи хранилища sorl по ключам: из кеша одним get_many,
+    недостающие — из базы одним запросом (и обратно в кеш)."""
+    from sorl.thumbnail.conf import settings as sorl_settings
+    from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+    from sorl.thumbnail.models import KVStore
+
+    found = kvstore.cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        stored = dict(KVStore.objects.filter(
+            key__in=missing).values_list('key', 'value'))
+        kvstore.cache.set_many(stored, sorl_settings.THUMBNAIL_CACHE_TIMEOUT)
+        found.update(stored)
+    return {key: value for key, value in found.items()
+            if value and value != EMPTY_VALUE}
+
+
+def _generate(image, geometry, options):
+    from sorl.thumbnail import get_thumbnail
+
+    try:
+        return get_thumbnail(image, geometry, **options)
+    except Exception:
+        if settings.THUMBNAIL_DEBUG:
+            raise
+        logger.exception('Не удалось создать миниатюру %s', image.name)
+        return None
+
+
+def attach_posts(posts, geometry=None, options=None):
+    """Подставляет в ``post.thumbnail`` миниатюры картинок постов (или
+    None, если картинки нет) и возвращает список постов."""
+    from sorl.thumbnail import default
+    from sorl.thumbnail.images import ImageFile, deserialize_image_file
+    from sorl.thumbnail.kvstores.base import add_prefix
+    from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore
+
+    if geometry is None:
+        geometry, options = card_thumbnail()
+    options = options or {}
+    posts = list(posts)
+    keys = []
+    for post in posts:
+        post.thumbnail = None
+        if post.image:
+            name = _thumbnail_name(ImageFile(post.image), geometry, options)
+            keys.append(
+                (post, add_prefix(ImageFile(name, default.storage).key)))
+    if not keys:
+        return posts
+    if isinstance(default.kvstore, KVStore):
+        found = _read_many(default.kvstore, [key for _, key in keys])
+    else:
+        # Другие хранилища sorl читаются по одной записи в _generate.
+        found = {}
+    for post, key in keys:
+        if key in found:
+            post.thumbnail = deserialize_image_file(found[key])
+        else:
+            post.thumbnail = _generate(post.image, geometry, options)
+    return posts
@@ -1,30 +1,40 @@
 from django.conf import settings
-from django.conf.urls.static import static
 from django.urls import path
 
-from . import views
+from core.routing import lazy_view
 
 app_name = 'posts'
 
+
+def view(name):
+    return lazy_view(f'posts.views.{name}')
+
+
+RESIZE_ROUTE = (f'{settings.MEDIA_URL.lstrip("/")}{settings.RESIZE_PREFIX}/'
+                '<int:width>x<int:height>/<path:path>')
+
+
 urlpatterns = [
-    path('group/<slug:slug>/', views.group_posts, name='group_list'),
-    path('profile/<str:username>/', views.profile, name='profile'),
-    path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
-    path('create/', views.post_create, name='post_create'),
-    path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path('groups/', view('group_index'), name='group_index'),
+    path('group/<slug:slug>/', view('group_posts'), name='group_list'),
+    path('profile/<str:username>/', view('profile'), name='profile'),
+    path('posts/<int:post_id>/', view('post_detail'), name='post_detail'),
+    path('create/', view('post_create'), name='post_create'),
+    path('posts/<int:post_id>/edit/', view('post_edit'), name='post_edit'),
     path('posts/<int:post_id>/comment/',
-         views.add_comment, name='add_comment'),
-    path('', views.index, name='index'),
-    path('follow/', views.follow_index, name='follow_index'),
-    path('profile/<str:username>/follow/', views.profile_follow,
+         view('add_comment'), name='add_comment'),
+    path('', view('index'), name='index'),
+    path('follow/', view('follow_index'), name='follow_index'),
+    path('updates/', view('feed_updates'), name='feed_updates'),
+    path(RESIZE_ROUTE, view('resize_image'), name='resize_image'),
+    path('profile/<str:username>/follow/', view('profile_follow'),
          name='profile_follow'),
-    path('profile/<str:username>/unfollow/', views.profile_unfollow,
+    path('profile/<str:username>/unfollow/', view('profile_unfollow'),
          name='profile_unfollow'),
+    path('profile/<str:username>/followers/', view('follow_list'),
+         {'direction': 'followers'}, name='followers'),
+    path('profile/<str:username>/following/', view('follow_list'),
+         {'direction': 'following'}, name='following'),
 ]
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL,
-                          document_root=settings.MEDIA_ROOT)
-    urlpatterns += static(settings.STATIC_URL,
-                          document_root=settings.STATIC_ROOT)
 handler404 = 'posts.views.page_not_found'
 handler403 = 'posts.views.permission_denied'
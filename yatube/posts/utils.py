@@ -1,8 +1,56 @@
 from django.conf import settings
 from django.core.paginator import Paginator
+from django.shortcuts import render
+from django.utils.functional import SimpleLazyObject
+
+from core.streaming import stream_render
+
+from . import cards, groups
+
+
+def prepare_posts(posts):
+    """Посты страницы ленты списком: группы из справочника вместо JOIN,
+    HTML карточек одним обращением к кешу (миниатюры — только для
+    карточек, которых там нет)."""
+    return cards.attach_posts(groups.attach_posts(posts))
+
+
+class _PreparedPosts:
+    """Ленивая обёртка над постами страницы: запрос выполняется только при
+    обращении к постам, поэтому закешированный фрагмент шаблона его не
+    вызывает."""
+
+    def __init__(self, posts):
+        self.posts = posts
+
+    def __len__(self):
+        return len(self.posts)
+
+    def __iter__(self):
+        return iter(prepare_posts(self.posts))
+
+
+def prepare_page(page):
+    page.object_list = _PreparedPosts(page.object_list)
+    return page
 
 
 def pagination(request, objects):
     paginator = Paginator(objects, settings.PAGINATOR_LIMIT)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
+
+
+def render_feed(request, template_name, posts, context=None):
+    """Рендерит ленту постов со страницей ``page_obj``.
+
+    При STREAMING_FEEDS шапка страницы уходит клиенту сразу, а запросы
+    пагинации выполняются уже во время рендеринга блока content.
+    """
+    context = dict(context or {})
+    if settings.STREAMING_FEEDS:
+        context['page_obj'] = SimpleLazyObject(
+            lambda: prepare_page(pagination(request, posts)))
+        return stream_render(request, template_name, context)
+    context['page_obj'] = prepare_page(pagination(request, posts))
+    return render(request, template_name, context)
@@ -1,52 +1,135 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied, SuspiciousFileOperation
+from django.db.models import Count, Max
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_safe
 
+from core import media
+from core.middleware import session_readonly
+from core.ratelimit import ratelimit
+
+from . import detail, follows, groups, live, resize, tasks
+from .cache import cache_feed_page, feed_version
 from .forms import CommentForm, PostForm
-from .models import Comment, Follow, Group, Post, User
-from .utils import pagination
+from .models import Follow, Group, Post, User
+from .utils import pagination, prepare_page, render_feed
 
 
-@cache_page(20, key_prefix='index_page')
+@session_readonly
+@cache_feed_page(20, key_prefix='index_page')
 def index(request):
-    posts = Post.objects.all()
+    posts = Post.objects.select_related(
+        'author').with_viewer_flags(request.user)
     return render(request, 'posts/index.html', {
-        'page_obj': pagination(request, posts), 'index': index,
+        'page_obj': prepare_page(pagination(request, posts)),
+        'index': index,
     })
 
 
+@session_readonly
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.select_related('group')
-    return render(request, 'posts/group_list.html', {
-        'group': group, 'page_obj': pagination(request, posts)
+    group = groups.get_by_slug_or_404(slug)
+    posts = group.posts.select_related(
+        'author').with_viewer_flags(request.user)
+    return render_feed(request, 'posts/group_list.html', posts, {
+        'group': group,
+    })
+
+
+@session_readonly
+def group_index(request):
+    directory = Group.objects.annotate(
+        post_count=Count('posts'), last_post=Max('posts__pub_date'),
+    ).order_by('title')
+    return render(request, 'posts/group_index.html', {
+        'groups': directory,
     })
 
 
+@session_readonly
 def profile(request, username):
     author = get_object_or_404(User, username=username)
     posts = author.posts.all()
-    follow = request.user.is_authenticated and Follow.objects.filter(
-        user=request.user, author=author).exists()
-    return render(request, 'posts/profile.html', {
-        'author': author, 'page_obj': pagination(request, posts),
-        'following': follow
+    follow = request.user.is_authenticated and follows.is_following(
+        request.user.pk, author.pk)
+    return render_feed(request, 'posts/profile.html', posts, {
+        'author': author, 'following': follow,
+        'follower_count': len(follows.follower_ids(author.pk)),
+        'following_count': len(follows.following_ids(author.pk)),
     })
 
 
+@session_readonly
+def follow_list(request, username, direction):
+    author = get_object_or_404(User, username=username)
+    if direction == follows.FOLLOWERS:
+        ids = follows.follower_ids(author.pk)
+    else:
+        ids = follows.following_ids(author.pk)
+    page = pagination(request, ids)
+    users = User.objects.in_bulk(list(page.object_list))
+    page.object_list = [users[pk] for pk in page.object_list if pk in users]
+    return render(request, 'posts/follow_list.html', {
+        'author': author, 'direction': direction, 'page_obj': page,
+    })
+
+
+@session_readonly
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    form = CommentForm(request.POST or None)
-    comments = Comment.objects.filter(post_id=post_id)
+    post, comments = detail.load(post_id, request.GET.get('page'))
     return render(request, 'posts/post_detail.html', {
         'posts': post,
         'post': post,
-        'form': form,
+        'form': CommentForm(),
         'comments': comments,
     })
 
 
+@session_readonly
+def feed_updates(request):
+    """JSON с постами ленты, появившимися после поста ``since``."""
+    try:
+        posts = live.feed_posts(request)
+    except PermissionDenied:
+        return JsonResponse({'error': 'Нужно войти'}, status=403)
+    try:
+        since = int(request.GET['since']) if 'since' in request.GET else None
+    except ValueError:
+        return JsonResponse({'error': 'since должен быть числом'},
+                            status=400)
+    newest = live.newest_id(posts)
+    etag = quote_etag(f'{newest or 0}-{feed_version()}')
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        data = live.updates(posts, since,
+                            count_only='count_only' in request.GET)
+        data['newest'] = newest
+        response = JsonResponse(data)
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@require_safe
+def resize_image(request, width, height, path):
+    """Картинка поста размера width×height по подписанному адресу."""
+    if not resize.is_allowed(width, height, path, request.GET.get('s', '')):
+        raise Http404
+    try:
+        target = resize.ensure(width, height, path)
+    except (OSError, SuspiciousFileOperation):
+        raise Http404
+    return media.file_response(
+        request, target, resize.derivative_name(width, height, path),
+        max_age=settings.RESIZE_MAX_AGE, immutable=True)
+
+
 @login_required
+@ratelimit('post_create', user='10/m', ip='30/m', methods=('POST',))
 def post_create(request):
     form = PostForm(
         request.POST or None,
@@ -57,6 +140,7 @@ def post_create(request):
     post = form.save(commit=False)
     post.author = request.user
     post.save()
+    tasks.post_saved(post)
     return redirect('posts:profile', post.author)
 
 
@@ -71,7 +155,7 @@ def post_edit(request, post_id):
         instance=post
     )
     if form.is_valid():
-        form.save()
+        tasks.post_saved(form.save())
         return redirect('posts:post_detail', post.pk)
     return render(request, 'posts/create_post.html', {
         'is_edit': True, 'form': form, 'post_id': post_id,
@@ -79,6 +163,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@ratelimit('comment', user='10/m', ip='30/m', methods=('POST',))
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
@@ -87,31 +172,38 @@ def add_comment(request, post_id):
         comment.author = request.user
         comment.post = post
         comment.save()
+        tasks.comment_saved(comment)
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@session_readonly
 @login_required
 def follow_index(request):
-    follow = Post.objects.filter(author__following__user=request.user)
-    return render(request, 'posts/follow.html', {
-        'page_obj': pagination(request, follow),
-    })
+    return render_feed(request, 'posts/follow.html', follows.followed_posts(
+        request.user, follows.following_ids(request.user.pk)))
 
 
 @login_required
+@ratelimit('follow', user='30/m', ip='60/m')
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if request.user != author:
-        Follow.objects.get_or_create(
+        _, created = Follow.objects.get_or_create(
             user=request.user, author=author
         )
+        if created:
+            tasks.follow_changed(request.user.pk, author.pk)
     return redirect('posts:profile', username=username)
 
 
 @login_required
+@ratelimit('follow', user='30/m', ip='60/m')
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    Follow.objects.filter(user=request.user, author=author).delete()
+    deleted, _ = Follow.objects.filter(
+        user=request.user, author=author).delete()
+    if deleted:
+        tasks.follow_changed(request.user.pk, author.pk)
     return redirect('posts:profile', username=username)
 
 
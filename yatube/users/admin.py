@@ -0,0 +1,30 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.db.models import Q
+
+from posts import deletion
+from posts.admin import ChunkedDeleteMixin, bulk_action
+from posts.models import Follow
+
+User = get_user_model()
+
+# Импорт django.contrib.auth.admin уже зарегистрировал стандартную админку.
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class UserAdmin(ChunkedDeleteMixin, BaseUserAdmin):
+    actions = ('remove_follows',)
+
+    def remove_follows(self, request, queryset):
+        follows = Follow.objects.filter(
+            Q(user__in=queryset) | Q(author__in=queryset))
+
+        def perform(data):
+            done = deletion.delete(follows)
+            return f'Удалено подписок: {done[Follow]}'
+        return bulk_action(self, request, queryset,
+                           'Удалить подписки выбранных пользователей',
+                           {Follow: follows.count()}, perform)
+    remove_follows.short_description = 'Удалить подписки (в обе стороны)'
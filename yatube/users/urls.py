@@ -1,30 +1,32 @@
-from django.contrib.auth.views import (LoginView, LogoutView,
-                                       PasswordChangeView, PasswordResetView)
 from django.urls import path
 
-from . import views
+from core.routing import lazy_view
 
 app_name = 'users'
 
 urlpatterns = [
-    path('signup/', views.SignUp.as_view(), name='signup'),
+    path('signup/', lazy_view('users.views.SignUp'), name='signup'),
     path(
         'logout/',
-        LogoutView.as_view(template_name='users/logged_out.html'),
+        lazy_view('django.contrib.auth.views.LogoutView',
+                  template_name='users/logged_out.html'),
         name='logout'
     ),
     path(
         'login/',
-        LoginView.as_view(template_name='users/login.html'),
+        lazy_view('django.contrib.auth.views.LoginView',
+                  template_name='users/login.html'),
         name='login'
     ),
     path(
         'password_reset/',
-        PasswordResetView.as_view(template_name='users/password_reset.html'),
+        lazy_view('django.contrib.auth.views.PasswordResetView',
+                  template_name='users/password_reset.html'),
         name='password_reset'
     ),
     path(
         'password_change/',
-        PasswordChangeView.as_view(template_name='users/password_change.html'),
+        lazy_view('django.contrib.auth.views.PasswordChangeView',
+                  template_name='users/password_change.html'),
         name='password_change'),
 ]
@@ -0,0 +1,8 @@
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+from yatube.wsgi import application as wsgi_application  # noqa: E402
+from core.asgi import ASGIApplication  # noqa: E402
+
+application = ASGIApplication(wsgi_application)
@@ -0,0 +1,18 @@
+"""Настройки проекта собираются из профиля, выбранного через DJANGO_ENV.
+
+dev (по умолчанию) — локальная разработка и тесты,
+prod — боевой профиль, все параметры берутся из окружения.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+DJANGO_ENV = os.environ.get('DJANGO_ENV', 'dev')
+
+if DJANGO_ENV == 'dev':
+    from .dev import *  # noqa: F401,F403
+elif DJANGO_ENV == 'prod':
+    from .prod import *  # noqa: F401,F403
+else:
+    raise ImproperlyConfigured(
+        f'Неизвестный профиль настроек DJANGO_ENV={DJANGO_ENV!r}')
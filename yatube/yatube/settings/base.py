@@ -0,0 +1,317 @@
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+def env(name, default=None):
+    return os.environ.get(name, default)
+
+
+def env_bool(name, default=False):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def env_int(name, default=0):
+    value = os.environ.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ImproperlyConfigured(f'{name} должен быть целым числом')
+
+
+def env_list(name, default=()):
+    value = os.environ.get(name)
+    if value is None:
+        return list(default)
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+
+DEBUG = env_bool('DEBUG', False)
+SECRET_KEY = env('SECRET_KEY')
+ALLOWED_HOSTS = env_list('ALLOWED_HOSTS', [
+    'localhost',
+    '127.0.0.1',
+    '[::1]',
+    'testserver',
+])
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [TEMPLATES_DIR],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year',
+            ]
+        },
+    }
+]
+INSTALLED_APPS = [
+    'about.apps.AboutConfig',
+    'core.apps.CoreConfig',
+    'users.apps.UsersConfig',
+    'posts.apps.PostsConfig',
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'sorl.thumbnail',
+]
+# Админка добавляет к старту воркера импорт admin.options, виджетов и
+# admin.py всех приложений. Публичные воркеры можно запускать без неё
+# (ADMIN_ENABLED=0), оставив её отдельному процессу.
+ADMIN_ENABLED = env_bool('ADMIN_ENABLED', True)
+if not ADMIN_ENABLED:
+    INSTALLED_APPS.remove('django.contrib.admin')
+
+ROOT_URLCONF = 'yatube.urls'
+WSGI_APPLICATION = 'yatube.wsgi.application'
+
+MIDDLEWARE = [
+    'core.middleware.CompressionMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'core.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+DATABASES = {
+    'default': {
+        'ENGINE': env('DB_ENGINE', 'django.db.backends.sqlite3'),
+        'NAME': env('DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+        'USER': env('DB_USER', ''),
+        'PASSWORD': env('DB_PASSWORD', ''),
+        'HOST': env('DB_HOST', ''),
+        'PORT': env('DB_PORT', ''),
+        'CONN_MAX_AGE': env_int('DB_CONN_MAX_AGE', 0),
+    }
+}
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    # Сколько секунд ждать снятия блокировки записи, прежде чем
+    # получить "database is locked".
+    DATABASES['default']['OPTIONS'] = {
+        'timeout': env_int('DB_SQLITE_TIMEOUT', 20),
+    }
+
+CACHES = {
+    'default': {
+        'BACKEND': env('CACHE_BACKEND',
+                       'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': env('CACHE_LOCATION', ''),
+        'TIMEOUT': env_int('CACHE_TIMEOUT', 300),
+        'KEY_PREFIX': env('CACHE_KEY_PREFIX', ''),
+    }
+}
+
+# django.contrib.sessions.backends.signed_cookies — без обращений к базе,
+# ...backends.cache — только кеш, ...backends.cached_db — кеш с базой
+# в качестве запасного хранилища, ...backends.db — только база.
+SESSION_ENGINE = env('SESSION_ENGINE', 'django.contrib.sessions.backends.db')
+SESSION_CACHE_ALIAS = env('SESSION_CACHE_ALIAS', 'default')
+
+EMAIL_BACKEND = env('EMAIL_BACKEND',
+                    'django.core.mail.backends.filebased.EmailBackend')
+EMAIL_FILE_PATH = env('EMAIL_FILE_PATH',
+                      os.path.join(BASE_DIR, 'sent_emails'))
+EMAIL_HOST = env('EMAIL_HOST', 'localhost')
+EMAIL_PORT = env_int('EMAIL_PORT', 25)
+EMAIL_HOST_USER = env('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = env('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = env_bool('EMAIL_USE_TLS', False)
+DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL', 'webmaster@localhost')
+# При EMAIL_BACKEND = 'core.mail.QueuedEmailBackend' письма складываются
+# в очередь, а команда sendqueuedmail доставляет их через этот бэкенд.
+EMAIL_DELIVERY_BACKEND = env('EMAIL_DELIVERY_BACKEND',
+                             'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_QUEUE_BATCH_SIZE = env_int('EMAIL_QUEUE_BATCH_SIZE', 50)
+EMAIL_QUEUE_MAX_ATTEMPTS = env_int('EMAIL_QUEUE_MAX_ATTEMPTS', 5)
+EMAIL_QUEUE_RETRY_DELAY = env_int('EMAIL_QUEUE_RETRY_DELAY', 60)
+# На сколько секунд воркер sendqueuedmail захватывает порцию писем.
+EMAIL_QUEUE_LEASE = env_int('EMAIL_QUEUE_LEASE', 300)
+
+# Фоновые задачи core.taskqueue, воркер — manage.py runtasks.
+TASKS_ALWAYS_EAGER = env_bool('TASKS_ALWAYS_EAGER', False)
+TASKS_BATCH_SIZE = env_int('TASKS_BATCH_SIZE', 20)
+TASKS_MAX_ATTEMPTS = env_int('TASKS_MAX_ATTEMPTS', 5)
+TASKS_RETRY_DELAY = env_int('TASKS_RETRY_DELAY', 10)
+TASKS_LEASE = env_int('TASKS_LEASE', 300)
+
+# Ограничение частоты запросов на запись (core.ratelimit).
+RATELIMIT_ENABLED = env_bool('RATELIMIT_ENABLED', True)
+RATELIMIT_CACHE = env('RATELIMIT_CACHE', 'default')
+# Переопределение частот по областям: {'comment': {'user': '5/m'}}.
+RATELIMIT_RATES = {}
+RATELIMIT_TRUST_FORWARDED = env_bool('RATELIMIT_TRUST_FORWARDED', False)
+# При превышении этого RSS (МБ) ограничения временно не проверяются.
+RATELIMIT_MAX_RSS_MB = env_int('RATELIMIT_MAX_RSS_MB', 0)
+
+LOGIN_URL = 'users:login'
+LOGIN_REDIRECT_URL = 'posts:index'
+
+LANGUAGE_CODE = "ru-en"
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+USE_L10N = True
+USE_TZ = True
+
+
+PAGINATOR_LIMIT = 10
+
+# Кеш графа подписок posts.follows.
+FOLLOW_CACHE_TIMEOUT = env_int('FOLLOW_CACHE_TIMEOUT', 3600)
+# До скольких авторов лента подписок строится через author_id IN (...),
+# дальше — через JOIN (в SQLite не больше 999 параметров в запросе).
+FOLLOW_IN_LIMIT = 500
+# Сколько секунд процесс держит справочник групп posts.groups.
+GROUP_CACHE_TIMEOUT = env_int('GROUP_CACHE_TIMEOUT', 300)
+# Кеш страницы поста posts.detail.
+POST_DETAIL_CACHE_TIMEOUT = env_int('POST_DETAIL_CACHE_TIMEOUT', 300)
+# Кеш HTML карточек ленты posts.cards; ключ меняется при правке поста.
+POST_CARD_CACHE_TIMEOUT = env_int('POST_CARD_CACHE_TIMEOUT', 3600 * 24)
+# Сколько строк posts.deletion удаляет в одной транзакции.
+DELETE_CHUNK_SIZE = env_int('DELETE_CHUNK_SIZE', 500)
+
+# ASGI (yatube.asgi) и server-sent events core.events.
+ASGI_THREADS = env_int('ASGI_THREADS', 16)
+# Асинхронные варианты представлений (<app>/async_views.py) и пулы
+# потоков, через которые они обращаются к базе и к кешу.
+ASGI_ASYNC_VIEWS = env_bool('ASGI_ASYNC_VIEWS', True)
+ASGI_DB_THREADS = env_int('ASGI_DB_THREADS', 8)
+ASGI_CACHE_THREADS = env_int('ASGI_CACHE_THREADS', 4)
+EVENTS_PATH = '/events/'
+EVENTS_CHANNELS = 'posts.live.event_channels'
+# Адрес брокера manage.py eventbroker (host:port) для нескольких
+# процессов; пусто — события раздаются только внутри процесса.
+EVENTS_BROKER = env('EVENTS_BROKER', '')
+EVENTS_KEEPALIVE = 15
+EVENTS_RETRY = 5000
+EVENTS_QUEUE_SIZE = 100
+
+# Сжатие ответов core.middleware.CompressionMiddleware.
+COMPRESS_ENABLED = env_bool('COMPRESS_ENABLED', True)
+COMPRESS_ENCODINGS = env_list('COMPRESS_ENCODINGS', ['br', 'gzip'])
+COMPRESS_MIN_SIZE = env_int('COMPRESS_MIN_SIZE', 500)
+COMPRESS_BROTLI_QUALITY = env_int('COMPRESS_BROTLI_QUALITY', 5)
+COMPRESS_SKIP_TYPES = [
+    'image/',
+    'video/',
+    'audio/',
+    'font/woff',
+    'application/zip',
+    'application/gzip',
+    'application/x-gzip',
+    'application/octet-stream',
+]
+
+# Потоковая отдача лент: <head> и шапка уходят до запросов к базе.
+STREAMING_FEEDS = env_bool('STREAMING_FEEDS', False)
+STREAMING_FLUSH_BLOCKS = ('content',)
+
+STATIC_ROOT = env('STATIC_ROOT', os.path.join(BASE_DIR, 'collected_static'))
+
+STATIC_URL = env('STATIC_URL', '/static/')
+STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+STATICFILES_STORAGE = env(
+    'STATICFILES_STORAGE',
+    'django.contrib.staticfiles.storage.StaticFilesStorage')
+# Раздача собранной статики WSGI-обёрткой core.static.StaticFilesApp.
+STATIC_SERVE = env_bool('STATIC_SERVE', False)
+STATIC_MAX_AGE = env_int('STATIC_MAX_AGE', 3600)
+STATIC_MEMORY_LIMIT = env_int('STATIC_MEMORY_LIMIT', 32 * 1024 * 1024)
+STATIC_COMPRESS_EXTENSIONS = ('.css', '.js', '.svg', '.ico', '.txt', '.map')
+# Из этих файлов при collectstatic вырезаются правила с классами,
+# которые не встречаются в шаблонах и коде проекта.
+STATIC_PURGE_CSS = ['css/bootstrap.min.css']
+STATIC_PURGE_SOURCES = [
+    TEMPLATES_DIR,
+    os.path.join(BASE_DIR, 'about'),
+    os.path.join(BASE_DIR, 'core'),
+    os.path.join(BASE_DIR, 'posts'),
+    os.path.join(BASE_DIR, 'users'),
+]
+STATIC_PURGE_SAFELIST = env_list('STATIC_PURGE_SAFELIST', [])
+
+MEDIA_URL = env('MEDIA_URL', '/media/')
+MEDIA_ROOT = env('MEDIA_ROOT', os.path.join(BASE_DIR, 'media'))
+# Загруженные файлы отдаёт core.media.serve по адресу MEDIA_URL (если он
+# не на другом домене). MEDIA_SENDFILE передаёт отправку файла
+# фронт-серверу: 'x-accel-redirect' для nginx (внутренний location
+# MEDIA_ACCEL_PREFIX с alias на MEDIA_ROOT) или 'x-sendfile' для Apache и
+# lighttpd. Пустое значение — файл отдаёт сам воркер через sendfile.
+MEDIA_SERVE = env_bool('MEDIA_SERVE', True)
+MEDIA_SENDFILE = env('MEDIA_SENDFILE', '')
+MEDIA_ACCEL_PREFIX = env('MEDIA_ACCEL_PREFIX', '/protected-media/')
+MEDIA_MAX_AGE = env_int('MEDIA_MAX_AGE', 3600 * 24 * 30)
+
+THUMBNAIL_DEBUG = env_bool('THUMBNAIL_DEBUG', False)
+THUMBNAIL_KVSTORE = env('THUMBNAIL_KVSTORE',
+                        'sorl.thumbnail.kvstores.cached_db_kvstore.KVStore')
+THUMBNAIL_CACHE_TIMEOUT = env_int('THUMBNAIL_CACHE_TIMEOUT', 3600 * 24 * 30)
+# Картинка поста в карточке и на странице поста — уменьшенные копии
+# posts.resize: основная и для узких экранов (srcset).
+POST_IMAGE_SIZE = env('POST_IMAGE_SIZE', '960x339')
+POST_IMAGE_SMALL_SIZE = env('POST_IMAGE_SMALL_SIZE', '480x170')
+# Миниатюра sorl для картинок, которые ещё не обработала backfillimages.
+POST_THUMBNAIL = (POST_IMAGE_SIZE, {'crop': 'center', 'upscale': True})
+# Картинки постов нужного размера по запросу (posts.resize):
+# MEDIA_URL/RESIZE_PREFIX/<ширина>x<высота>/<путь>?s=<подпись>. Подписать
+# адрес можно только для размеров из RESIZE_SIZES; готовые файлы лежат в
+# MEDIA_ROOT по тому же пути, и веб-сервер отдаёт их сам.
+RESIZE_PREFIX = 'resize'
+RESIZE_SIZES = env_list('RESIZE_SIZES',
+                        [POST_IMAGE_SMALL_SIZE, POST_IMAGE_SIZE])
+RESIZE_QUALITY = env_int('RESIZE_QUALITY', 85)
+RESIZE_MAX_AGE = env_int('RESIZE_MAX_AGE', 3600 * 24 * 365)
+# Картинку, загруженную (в том числе повторно) за последние столько секунд,
+# posts.orphans не удаляет вслед за постом: её может взять пост, который
+# ещё не сохранён. Такие файлы потом убирает gcmedia.
+IMAGE_REUSE_GRACE = env_int('IMAGE_REUSE_GRACE', 600)
+
+CSRF_FAILURE_VIEW = 'posts.views.csrf_failure'
+
+LOG_LEVEL = env('LOG_LEVEL', 'WARNING')
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'verbose': {
+            'format': '%(asctime)s %(levelname)s %(name)s %(message)s',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'verbose',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': LOG_LEVEL,
+    },
+    'loggers': {
+        'django.request': {
+            'level': env('REQUEST_LOG_LEVEL', 'ERROR'),
+        },
+    },
+}
@@ -0,0 +1,13 @@
+from .base import *  # noqa: F401,F403
+from .base import env, env_bool
+
+DEBUG = env_bool('DEBUG', True)
+SECRET_KEY = env('SECRET_KEY',
+                 'e!k$1sn0+jdhd-p5et323m&m=k+1vord)_gq*)f7b7yrc2)%#&')
+
+THUMBNAIL_DEBUG = env_bool('THUMBNAIL_DEBUG', True)
+
+# Локально и в тестах задачи выполняются сразу, без воркера,
+# а частота запросов не ограничивается.
+TASKS_ALWAYS_EAGER = env_bool('TASKS_ALWAYS_EAGER', True)
+RATELIMIT_ENABLED = env_bool('RATELIMIT_ENABLED', False)
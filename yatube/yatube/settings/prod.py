@@ -0,0 +1,44 @@
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+from .base import BASE_DIR, DATABASES, env, env_bool, env_int
+
+DEBUG = env_bool('DEBUG', False)
+SECRET_KEY = env('SECRET_KEY')
+if not SECRET_KEY:
+    raise ImproperlyConfigured('В боевом профиле SECRET_KEY обязателен')
+
+DATABASES['default']['CONN_MAX_AGE'] = env_int('DB_CONN_MAX_AGE', 60)
+
+CACHES = {
+    'default': {
+        'BACKEND': env('CACHE_BACKEND',
+                       'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': env('CACHE_LOCATION',
+                        os.path.join(BASE_DIR, '.cache')),
+        'TIMEOUT': env_int('CACHE_TIMEOUT', 300),
+        'KEY_PREFIX': env('CACHE_KEY_PREFIX', 'yatube'),
+        'OPTIONS': {
+            'MAX_ENTRIES': env_int('CACHE_MAX_ENTRIES', 10000),
+        },
+    }
+}
+
+SESSION_ENGINE = env('SESSION_ENGINE',
+                     'django.contrib.sessions.backends.cached_db')
+
+EMAIL_BACKEND = env('EMAIL_BACKEND', 'core.mail.QueuedEmailBackend')
+
+STATICFILES_STORAGE = env(
+    'STATICFILES_STORAGE',
+    'core.storage.CompressedManifestStaticFilesStorage')
+STATIC_SERVE = env_bool('STATIC_SERVE', True)
+
+THUMBNAIL_DEBUG = env_bool('THUMBNAIL_DEBUG', False)
+
+STREAMING_FEEDS = env_bool('STREAMING_FEEDS', True)
+
+SESSION_COOKIE_SECURE = env_bool('SESSION_COOKIE_SECURE', True)
+CSRF_COOKIE_SECURE = env_bool('CSRF_COOKIE_SECURE', True)
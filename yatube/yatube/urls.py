@@ -1,18 +1,23 @@
 from django.conf import settings
 from django.conf.urls.static import static
-from django.contrib import admin
 from django.urls import include, path
 
+from core.routing import lazy_view
+
 urlpatterns = [
     path('about/', include('about.urls', namespace='about')),
     path('auth/', include('users.urls', namespace='users')),
     path('', include('posts.urls', namespace='posts')),
     path('auth/', include('django.contrib.auth.urls')),
-    path('admin/', admin.site.urls),
 ]
+if settings.ADMIN_ENABLED:
+    from django.contrib import admin
+
+    urlpatterns.append(path('admin/', admin.site.urls))
+if settings.MEDIA_SERVE and settings.MEDIA_URL.startswith('/'):
+    urlpatterns.append(path(f'{settings.MEDIA_URL[1:]}<path:path>',
+                            lazy_view('core.media.serve'), name='media'))
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL,
-                          document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL,
                           document_root=settings.STATIC_ROOT)
 